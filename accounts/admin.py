@@ -1,12 +1,25 @@
 from django.contrib import admin
+from django.db.models import F
+from employees.admin import notify_action
 from .models import EmployeeProfile
 
+
+@admin.action(description='Sign the selected employees out of every device')
+def revoke_sessions(modeladmin, request, queryset):
+    # The same version bump as EmployeeProfile.end_sessions(), in one UPDATE
+    revoked = queryset.update(session_version=F('session_version') + 1)
+    modeladmin.message_user(request, f"Signed out {revoked} employee(s) everywhere.")
+
+
 @admin.register(EmployeeProfile)
 class EmployeeProfileAdmin(admin.ModelAdmin):
     list_display = ('employee_id', 'full_name', 'department', 'is_active', 'security_status')
     list_filter = ('is_active', 'first_login', 'department')
     search_fields = ('employee_id', 'full_name', 'phone')
     readonly_fields = ('employee_id', 'temp_password')
+    actions = [notify_action(lambda queryset: {"employees": queryset},
+                             'Send a notification to the selected employees'),
+               revoke_sessions]
 
     fieldsets = (
         ('Authentication & Status', {
@@ -35,4 +48,4 @@ class EmployeeProfileAdmin(admin.ModelAdmin):
         if obj.first_login:
             return "Force Password Change"
         return "Active"
-    security_status.short_description = 'Login Requirement'
\ No newline at end of file
+    security_status.short_description = 'Login Requirement'
@@ -1,17 +1,7 @@
-from .models import EmployeeProfile
+from .middleware import get_employee
 
 def global_employee(request):
-    employee_id = request.session.get("employee_id")
-
-    if employee_id:
-        try:
-            profile = EmployeeProfile.objects.get(employee_id=employee_id)
-        except EmployeeProfile.DoesNotExist:
-            profile = None
-        return {
-            "global_profile": profile
-        }
-
+    # Lazy: only queried if the template actually uses the profile
     return {
-        "global_profile": None
+        "global_profile": request.employee if hasattr(request, "employee") else get_employee(request)
     }
@@ -0,0 +1,89 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from accounts.models import EmployeeProfile
+from accounts.passwords import employee_hasher, hash_password
+from employees.management.benchmark import BenchmarkCommand, p99
+
+PASSWORD = "morning-peak"
+DEFAULT_CONFIGS = [
+    "pbkdf2_sha256:iterations=100000",
+    "pbkdf2_sha256:iterations=390000",
+    "pbkdf2_sha256:iterations=600000",
+]
+
+
+def parse_config(value):
+    """'pbkdf2_sha256:iterations=390000' -> ('pbkdf2_sha256', {'iterations': 390000})"""
+    algorithm, _, raw_options = value.partition(":")
+    options = {}
+    for item in filter(None, raw_options.split(",")):
+        name, _, number = item.partition("=")
+        options[name.strip()] = int(number)
+    return algorithm.strip(), options
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Measure employee login latency (p50/p99) per password hasher and work factor."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--config", nargs="+", default=DEFAULT_CONFIGS,
+            help="hasher[:option=value,...] from PASSWORD_HASHERS, e.g. bcrypt_sha256:rounds=12",
+        )
+        parser.add_argument("--employees", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--legacy", action="store_true", help="Start from plaintext passwords so every login also re-hashes")
+
+    def _login(self, employee_id):
+        started = time.perf_counter()
+        response = Client().post(reverse("accounts:employee_login_page"), {"employee_id": employee_id, "password": PASSWORD})
+        return time.perf_counter() - started, response.status_code == 302 and "login" not in response["Location"]
+
+    def benchmark(self, *args, **options):
+        configs = [parse_config(value) for value in options["config"]]
+        for algorithm, hasher_options in configs:
+            try:
+                employee_hasher(algorithm, hasher_options)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        EmployeeProfile.objects.bulk_create([
+            EmployeeProfile(employee_id=f"BENCH{i:06d}", full_name=f"Bench {i}", phone="000000", temp_password="x", first_login=False)
+            for i in range(options["employees"])
+        ])
+        employee_ids = list(EmployeeProfile.objects.values_list("employee_id", flat=True))
+        self.stdout.write(
+            f"{len(employee_ids)} logins per configuration, concurrency {options['concurrency']}"
+            f"{', from plaintext' if options['legacy'] else ''}"
+        )
+
+        for algorithm, hasher_options in configs:
+            hasher = employee_hasher(algorithm, hasher_options)
+            started = time.perf_counter()
+            encoded = hash_password(PASSWORD, hasher)
+            hash_ms = (time.perf_counter() - started) * 1000
+            # Every row shares one hash (and salt); fine for timing verification
+            EmployeeProfile.objects.update(password=PASSWORD if options["legacy"] else encoded)
+
+            with override_settings(EMPLOYEE_PASSWORD_HASHER=algorithm, EMPLOYEE_PASSWORD_HASHER_OPTIONS=hasher_options):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                    results = list(pool.map(self._login, employee_ids))
+                elapsed = time.perf_counter() - started
+
+            timings = sorted(timing for timing, _ in results)
+            failures = sum(not ok for _, ok in results)
+            label = algorithm + "".join(f" {name}={value}" for name, value in hasher_options.items())
+            self.stdout.write(
+                f"{label:<36} hash={hash_ms:7.1f}ms  {len(timings) / elapsed:7.1f} logins/s  "
+                f"p50={statistics.median(timings) * 1000:7.1f}ms  p99={p99(timings) * 1000:7.1f}ms  failures={failures}"
+            )
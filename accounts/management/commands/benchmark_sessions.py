@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from accounts.models import EmployeeProfile
+from employees.management.benchmark import BenchmarkCommand, p99
+
+PASSWORD = "session-bench"
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Compare per-request overhead of the session backends on an employee "
+        "page and check that logout retires the old cookie."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", nargs="+", default=list(settings.SESSION_ENGINES), choices=list(settings.SESSION_ENGINES))
+        parser.add_argument("--requests", type=int, default=500)
+
+    def _measure(self, url, requests):
+        client = Client()
+        client.post(reverse("accounts:employee_login_page"), {"employee_id": self.employee_id, "password": PASSWORD})
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        timings, session_queries = [], 0
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"{url} answered {response.status_code}; the benchmark session was not accepted.")
+            session_queries += sum('"django_session"' in query["sql"] for query in queries.captured_queries)
+
+        # Replay the pre-logout cookie: server-side backends reject it, signed cookies cannot
+        client.get(reverse("accounts:logout"))
+        replay = Client()
+        replay.cookies[settings.SESSION_COOKIE_NAME] = cookie
+        logged_out = replay.get(url).status_code == 302
+        return timings, session_queries / requests, len(cookie), logged_out
+
+    def benchmark(self, *args, **options):
+        with override_settings(EMPLOYEE_PASSWORD_HASHER_OPTIONS={"iterations": 1000}):
+            employee = EmployeeProfile.objects.create(full_name="Session Bench", phone="0123456789", first_login=False)
+            employee.set_password(PASSWORD)
+        self.employee_id = employee.employee_id
+        url = reverse("employees:profile")
+
+        self.stdout.write(f"{options['requests']} GET {url} per backend")
+        for backend in options["backend"]:
+            cache.clear()
+            with override_settings(
+                SESSION_ENGINE=settings.SESSION_ENGINES[backend],
+                EMPLOYEE_PASSWORD_HASHER_OPTIONS={"iterations": 1000},
+            ):
+                timings, session_queries, cookie_bytes, logged_out = self._measure(url, options["requests"])
+            timings.sort()
+            self.stdout.write(
+                f"{backend:<15} mean={statistics.mean(timings) * 1000:6.2f}ms  "
+                f"p50={statistics.median(timings) * 1000:6.2f}ms  p99={p99(timings) * 1000:6.2f}ms  "
+                f"session queries/request={session_queries:.2f}  cookie={cookie_bytes}B  "
+                f"logout {'invalidates' if logged_out else 'DOES NOT invalidate'} old cookie"
+            )
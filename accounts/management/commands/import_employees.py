@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import onboarding
+
+
+class Command(BaseCommand):
+    help = "Onboard employees in bulk from a CSV or XLSX staff list."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help=f"Staff list with a header row; columns: {', '.join(onboarding.COLUMNS)} (full_name and phone required)",
+        )
+        parser.add_argument("--format", choices=onboarding.FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--rejects", help="Write rejected rows to this CSV file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("xlsx" if path.endswith(".xlsx") else "csv")
+        try:
+            with open(path, "rb") as stream:
+                report = onboarding.import_employees(stream, fmt=fmt, batch_size=options["batch_size"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        if options["rejects"]:
+            with open(options["rejects"], "w", newline="", encoding="utf-8") as stream:
+                report.write_rejects(stream)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report.rows} rows -> {report.created} employees in {report.seconds:.2f}s "
+            f"({report.rows_per_second} rows/s), {len(report.rejects)} rejected."
+        ))
+        for line_no, raw, reason in report.rejects[:20]:
+            self.stdout.write(f"  line {line_no}: {reason} [{raw}]")
@@ -0,0 +1,50 @@
+from django.utils.functional import SimpleLazyObject
+
+from .models import EmployeeProfile
+
+SESSION_VERSION_KEY = "session_version"
+
+
+def login_employee(request, employee):
+    """Store the employee and its current session version in the session."""
+    request.session["employee_id"] = employee.employee_id
+    request.session[SESSION_VERSION_KEY] = employee.session_version
+    request._cached_employee = employee
+
+
+def employee_for_session(session, queryset=None):
+    """
+    The employee a session belongs to, or None. Sessions issued before the
+    employee's last logout carry an older version and no longer match.
+    """
+    employee_id = session.get("employee_id")
+    if not employee_id:
+        return None
+    queryset = EmployeeProfile.objects.all() if queryset is None else queryset
+    return queryset.filter(employee_id=employee_id, session_version=session.get(SESSION_VERSION_KEY, 0)).first()
+
+
+def get_employee(request):
+    """
+    The employee logged in on this request, or None. Loaded with its
+    department on first use and memoized on the request.
+    """
+    if not hasattr(request, "_cached_employee"):
+        request._cached_employee = employee_for_session(
+            request.session, EmployeeProfile.objects.select_related("department")
+        )
+    return request._cached_employee
+
+
+class EmployeeMiddleware:
+    """
+    Attach a lazy `request.employee` so views, decorators and context
+    processors share a single profile query per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.employee = SimpleLazyObject(lambda: get_employee(request))
+        return self.get_response(request)
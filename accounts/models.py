@@ -1,22 +1,69 @@
-from django.db import models
+import re
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from datetime import datetime
 from adminpanel.models import Department
+from .passwords import hash_password, verify_password
 
 # ===============================
-# Employee ID Generator
+# Employee ID Sequence
 # ===============================
+EMPLOYEE_ID_PATTERN = re.compile(r"^EM(\d{4})(\d+)$")
+
+
+class EmployeeIdSequence(models.Model):
+    """Last employee number handed out per year; IDs read EM<year><number>."""
+    year = models.PositiveSmallIntegerField(primary_key=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+
+
+def format_employee_id(year, number):
+    # At least three digits; wider numbers simply grow the suffix
+    return f"EM{year}{number:03d}"
+
+
+def _highest_issued(year):
+    """Largest number already used in `year`, read once when the year's row is created."""
+    numbers = [0]
+    for employee_id in EmployeeProfile.objects.filter(employee_id__startswith=f"EM{year}").values_list("employee_id", flat=True):
+        match = EMPLOYEE_ID_PATTERN.match(employee_id)
+        if match and int(match.group(1)) == year:
+            numbers.append(int(match.group(2)))
+    return max(numbers)
+
+
+def allocate_employee_ids(count=1, year=None):
+    """
+    Reserve `count` consecutive employee IDs and return them. The counter is
+    moved with a single UPDATE, so concurrent callers never get the same
+    number; IDs of rolled-back inserts are skipped, not reused.
+    """
+    year = year or datetime.now().year
+    sequence = EmployeeIdSequence.objects.filter(year=year)
+    with transaction.atomic():
+        if not sequence.update(last_value=F("last_value") + count):
+            try:
+                with transaction.atomic():
+                    EmployeeIdSequence.objects.create(year=year, last_value=_highest_issued(year) + count)
+            except IntegrityError:
+                # Another request created the year's row first
+                sequence.update(last_value=F("last_value") + count)
+        last = sequence.values_list("last_value", flat=True).get()
+    return [format_employee_id(year, number) for number in range(last - count + 1, last + 1)]
+
+
 def generate_employee_id():
-    current_year = datetime.now().year
-    last_employee = EmployeeProfile.objects.filter(
-        employee_id__startswith=f"EM{current_year}"
-    ).order_by('id').last()
+    return allocate_employee_ids(1)[0]
 
-    if not last_employee:
-        return f"EM{current_year}001"
 
-    last_number = int(last_employee.employee_id[-3:])
-    new_number = last_number + 1
-    return f"EM{current_year}{new_number:03d}"
+def next_employee_id(year=None):
+    """The ID the next allocation will most likely get, for display only; nothing is reserved."""
+    year = year or datetime.now().year
+    last = EmployeeIdSequence.objects.filter(year=year).values_list("last_value", flat=True).first()
+    return format_employee_id(year, (_highest_issued(year) if last is None else last) + 1)
 
 
 # ===============================
@@ -58,6 +105,8 @@ class EmployeeProfile(models.Model):
     emergency_contact = models.CharField(max_length=20, blank=True, null=True)
     emergency_address = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # Bumped by end_sessions(); sessions carrying an older value are no longer accepted
+    session_version = models.PositiveIntegerField(default=0, editable=False)
 
     # ===============================
     # Save Override
@@ -67,7 +116,7 @@ class EmployeeProfile(models.Model):
             self.employee_id = generate_employee_id()
         if not self.temp_password and self.phone:
             self.temp_password = self.phone[-6:]
-            self.password = self.temp_password
+            self.password = hash_password(self.temp_password)
             self.first_login = True
         super().save(*args, **kwargs)
 
@@ -75,15 +124,21 @@ class EmployeeProfile(models.Model):
     # Authentication Helpers
     # ===============================
     def check_password(self, raw_password):
-        return self.password == raw_password
+        """Verify a password, upgrading plaintext or outdated hashes on success."""
+        return verify_password(raw_password, self.password, setter=self.set_password)
 
     def set_password(self, raw_password):
-        self.password = raw_password
+        self.password = hash_password(raw_password)
         if self.pk:
             self.save(update_fields=["password"])
         else:
             self.save()
 
+    def end_sessions(self):
+        """Invalidate every session of this employee, whatever the session backend."""
+        EmployeeProfile.objects.filter(pk=self.pk).update(session_version=F("session_version") + 1)
+        self.refresh_from_db(fields=["session_version"])
+
     # ===============================
     # Admin Utilities
     # ===============================
@@ -96,7 +151,7 @@ class EmployeeProfile(models.Model):
 
     def reset_login_with_temp_password(self):
         self.temp_password = self.phone[-6:] if self.phone else ""
-        self.password = self.temp_password
+        self.password = hash_password(self.temp_password)
         self.first_login = True
         if self.pk:
             self.save(update_fields=["temp_password", "password", "first_login"])
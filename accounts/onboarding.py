@@ -0,0 +1,205 @@
+"""
+Bulk employee onboarding from CSV or XLSX staff lists.
+
+Rows are read lazily (openpyxl in read-only mode for XLSX), validated in
+batches against one prefetched department map, given IDs from a block
+reserved on EmployeeIdSequence and inserted with bulk_create, so memory stays
+flat however long the file is. The temporary password is stored as legacy
+plaintext, the same as older rows, and hashed on the employee's first login:
+hashing every row here would cost a full work factor per row.
+"""
+import csv
+import time as clock
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from adminpanel import departments as department_stats
+from adminpanel.models import Department
+from employees.reports import BulkReport
+
+from .models import GENDER_CHOICES, EmployeeProfile, allocate_employee_ids
+
+FORMATS = ("csv", "xlsx")
+COLUMNS = ("full_name", "phone", "department", "designation", "role", "joining_date", "gender", "email")
+GENDERS = {value.lower(): value for value, _ in GENDER_CHOICES}
+
+
+class ImportReport(BulkReport):
+    """Counters and rejected rows collected during one import."""
+    counters = ("rows", "created")
+    rate_counter = "rows"
+    rows_per_second = BulkReport.per_second
+
+
+# ===============================
+# Reading
+# ===============================
+def _cell(value):
+    """Normalise a CSV or spreadsheet cell to a stripped string (dates stay dates)."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # phone numbers typed into a numeric cell
+    return str(value).strip()
+
+
+def _header(names):
+    return [str(name or "").strip().lower().replace(" ", "_") for name in names]
+
+
+def _csv_records(stream):
+    lines = (line.decode("utf-8-sig") if isinstance(line, bytes) else line for line in stream)
+    reader = csv.reader(lines)
+    header = _header(next(reader, []))
+    for values in reader:
+        if any(value.strip() for value in values):
+            yield reader.line_num, ",".join(values), dict(zip(header, map(_cell, values)))
+
+
+def _xlsx_records(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import needs openpyxl; upload a CSV file instead.")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        for line_no, values in enumerate(rows, start=2):
+            record = dict(zip(header, map(_cell, values)))
+            if any(record.values()):
+                yield line_no, ",".join(str(value) for value in record.values()), record
+    finally:
+        workbook.close()
+
+
+def read_rows(stream, fmt):
+    """Lazily yield (line number, raw row, record) from a staff list."""
+    if fmt == "csv":
+        return _csv_records(stream)
+    if fmt == "xlsx":
+        return _xlsx_records(stream)
+    raise ValueError(f"Unsupported import format '{fmt}'.")
+
+
+# ===============================
+# Validation
+# ===============================
+def _employee(record, departments):
+    """Build an unsaved EmployeeProfile from a record or raise ValueError."""
+    full_name = record.get("full_name", "")
+    phone = record.get("phone", "")
+    if not full_name:
+        raise ValueError("missing full_name")
+    if len(phone) < 6:
+        raise ValueError("phone needs at least 6 digits")
+
+    department_pk = None
+    if record.get("department"):
+        department_pk = departments.get(record["department"].casefold())
+        if department_pk is None:
+            raise ValueError(f"unknown department '{record['department']}'")
+
+    joining_date = record.get("joining_date") or None
+    if isinstance(joining_date, str):
+        joining_date = date.fromisoformat(joining_date)
+
+    gender = record.get("gender") or None
+    if gender:
+        if gender.lower() not in GENDERS:
+            raise ValueError(f"gender must be one of {', '.join(GENDERS.values())}")
+        gender = GENDERS[gender.lower()]
+
+    email = record.get("email") or None
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            raise ValueError(f"invalid email '{email}'")
+
+    return EmployeeProfile(
+        full_name=full_name, phone=phone, department_id=department_pk,
+        designation=record.get("designation") or None, role=record.get("role") or None,
+        joining_date=joining_date, gender=gender, email=email,
+        temp_password=phone[-6:], password=phone[-6:], first_login=True,
+    )
+
+
+def _insert(batch, report):
+    """Drop rows whose email is already taken, then insert the rest under one ID block."""
+    emails = {employee.email.lower() for _, _, employee in batch if employee.email}
+    taken = {
+        email.lower(): employee_id
+        for email, employee_id in EmployeeProfile.objects.filter(email__in=emails).values_list("email", "employee_id")
+    } if emails else {}
+
+    rows = []
+    for line_no, raw, employee in batch:
+        email = (employee.email or "").lower()
+        if email in taken:
+            report.reject(line_no, raw, f"email already used by {taken[email]}")
+            continue
+        if email:
+            taken[email] = f"line {line_no}"
+        rows.append((line_no, raw, employee))
+
+    if not rows:
+        return
+    # Reserved before the insert, so a batch that fails skips its IDs rather than reusing them
+    for (_, _, employee), employee_id in zip(rows, allocate_employee_ids(len(rows))):
+        employee.employee_id = employee_id
+    try:
+        with transaction.atomic():
+            employees = EmployeeProfile.objects.bulk_create([employee for _, _, employee in rows])
+    except IntegrityError:
+        # A constraint the checks above cannot see (e.g. an ID issued outside
+        # the sequence): insert row by row so only the offending rows are rejected
+        employees = []
+        for line_no, raw, employee in rows:
+            try:
+                with transaction.atomic():
+                    employees += EmployeeProfile.objects.bulk_create([employee])
+            except IntegrityError as exc:
+                report.reject(line_no, raw, f"could not be saved: {exc}")
+    if not employees:
+        return
+    # bulk_create skips the post_save handlers that keep department figures fresh
+    department_stats.department_changed(*{employee.department_id for employee in employees})
+    report.created += len(employees)
+
+
+def import_employees(stream, fmt="csv", batch_size=500):
+    """
+    Import a staff list and return an ImportReport. Each batch commits on its
+    own, so a bad row never blocks the rest; it is listed in `rejects` with its
+    line number and reason.
+    """
+    records = read_rows(stream, fmt)
+    report = ImportReport()
+    started = clock.perf_counter()
+
+    departments = {name.casefold(): pk for pk, name in Department.objects.values_list("id", "name")}
+    batch = []
+    for line_no, raw, record in records:
+        report.rows += 1
+        try:
+            batch.append((line_no, raw, _employee(record, departments)))
+        except ValueError as exc:
+            report.reject(line_no, raw, str(exc))
+            continue
+        if len(batch) >= batch_size:
+            _insert(batch, report)
+            batch = []
+    if batch:
+        _insert(batch, report)
+
+    report.seconds = clock.perf_counter() - started
+    return report
@@ -0,0 +1,58 @@
+"""
+Password hashing for employee portal accounts.
+
+Uses django.contrib.auth.hashers with a hasher and work factor chosen per
+deployment (EMPLOYEE_PASSWORD_HASHER / EMPLOYEE_PASSWORD_HASHER_OPTIONS).
+Rows still holding a plaintext password, or a hash made with other settings,
+are re-hashed the next time the employee logs in.
+"""
+import copy
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.utils.crypto import constant_time_compare
+
+
+def employee_hasher(algorithm=None, options=None):
+    """
+    The configured hasher instance with its work factor applied, e.g.
+    options={"iterations": 390000} for PBKDF2 or {"rounds": 12} for bcrypt.
+    """
+    hasher = get_hasher(algorithm or getattr(settings, "EMPLOYEE_PASSWORD_HASHER", "default"))
+    options = getattr(settings, "EMPLOYEE_PASSWORD_HASHER_OPTIONS", {}) if options is None else options
+    if options:
+        hasher = copy.copy(hasher)
+        for name, value in options.items():
+            if not hasattr(hasher, name):
+                raise ValueError(f"{hasher.algorithm} has no work factor option '{name}'.")
+            setattr(hasher, name, value)
+    return hasher
+
+
+def hash_password(raw_password, hasher=None):
+    return make_password(raw_password, hasher=hasher or employee_hasher())
+
+
+def is_hashed(encoded):
+    try:
+        identify_hasher(encoded)
+    except ValueError:
+        return False
+    return True
+
+
+def verify_password(raw_password, encoded, setter, hasher=None):
+    """
+    Check `raw_password` against the stored value. On success `setter(raw)`
+    is called when the stored value is plaintext or uses another hasher or
+    work factor, so it can be replaced with a current hash.
+    """
+    if not encoded or raw_password is None:
+        return False
+    if not is_hashed(encoded):
+        # Legacy plaintext row
+        if not constant_time_compare(encoded, raw_password):
+            return False
+        setter(raw_password)
+        return True
+    return check_password(raw_password, encoded, setter=setter, preferred=hasher or employee_hasher())
@@ -1,3 +1,330 @@
-from django.test import TestCase
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth.models import User
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from adminpanel.models import Department
+
+from . import onboarding
+from .middleware import employee_for_session
+from .models import (
+    EmployeeIdSequence, EmployeeProfile, allocate_employee_ids, format_employee_id, next_employee_id,
+)
+from .passwords import is_hashed
+
+# A cheap work factor keeps the hashing in these tests fast
+FAST_HASHER = {"EMPLOYEE_PASSWORD_HASHER": "pbkdf2_sha256", "EMPLOYEE_PASSWORD_HASHER_OPTIONS": {"iterations": 1000}}
+
+
+# ===============================
+# Password Hashing
+# ===============================
+@override_settings(**FAST_HASHER)
+class PasswordRehashTests(TestCase):
+    def setUp(self):
+        self.employee = EmployeeProfile.objects.create(full_name="Hash Employee", phone="0123456789")
+
+    def login(self, password):
+        return self.client.post(
+            reverse("accounts:employee_login_page"),
+            {"employee_id": self.employee.employee_id, "password": password},
+        )
+
+    def stored(self):
+        return EmployeeProfile.objects.values_list("password", flat=True).get(pk=self.employee.pk)
+
+    def test_new_employee_gets_a_hashed_temp_password(self):
+        self.assertTrue(is_hashed(self.stored()))
+        self.assertTrue(check_password("456789", self.stored()))
+
+    def test_plaintext_password_is_hashed_on_login(self):
+        EmployeeProfile.objects.filter(pk=self.employee.pk).update(password="secret1")
+
+        self.assertEqual(self.login("wrong").status_code, 200)
+        self.assertEqual(self.stored(), "secret1")
+
+        self.assertEqual(self.login("secret1").status_code, 302)
+        self.assertTrue(is_hashed(self.stored()))
+        self.assertTrue(check_password("secret1", self.stored()))
+
+    def test_outdated_work_factor_is_upgraded_on_login(self):
+        self.employee.set_password("secret1")
+        self.assertEqual(self.stored().split("$")[1], "1000")
+
+        with override_settings(EMPLOYEE_PASSWORD_HASHER_OPTIONS={"iterations": 2000}):
+            self.assertEqual(self.login("secret1").status_code, 302)
+
+        self.assertEqual(self.stored().split("$")[1], "2000")
+        self.assertTrue(check_password("secret1", self.stored()))
+
+
+# ===============================
+# Session Revocation
+# ===============================
+@override_settings(**FAST_HASHER)
+class SessionRevocationTests(TestCase):
+    def setUp(self):
+        self.employee = EmployeeProfile.objects.create(full_name="Session Employee", phone="0123456789")
+        self.employee.first_login = False
+        self.employee.save(update_fields=["first_login"])
+
+    def login(self, client):
+        client.post(
+            reverse("accounts:employee_login_page"),
+            {"employee_id": self.employee.employee_id, "password": "456789"},
+        )
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def engines(self):
+        for backend in ("db", "cache", "signed_cookies"):
+            with self.subTest(backend=backend), override_settings(
+                SESSION_ENGINE=f"django.contrib.sessions.backends.{backend}"
+            ):
+                yield backend
+
+    def replay(self, client, cookie):
+        client.cookies[settings.SESSION_COOKIE_NAME] = cookie
+        return client.get(reverse("employees:profile")).status_code
+
+    def test_logout_ends_only_this_session(self):
+        for backend in self.engines():
+            client, other_device = Client(), Client()
+            cookie = self.login(client)
+            self.login(other_device)
+            self.assertEqual(client.get(reverse("employees:profile")).status_code, 200)
+
+            client.get(reverse("accounts:logout"))
+
+            self.assertEqual(client.get(reverse("employees:profile")).status_code, 302)
+            self.assertEqual(other_device.get(reverse("employees:profile")).status_code, 200)
+            if backend != "signed_cookies":
+                # Server-side sessions are gone; a copied cookie points at nothing
+                self.assertEqual(self.replay(client, cookie), 302)
+
+    def test_password_change_retires_every_session(self):
+        for _ in self.engines():
+            client, other_device = Client(), Client()
+            cookie = self.login(client)
+            self.login(other_device)
+            client.post(
+                reverse("accounts:change_password_first_login"),
+                {"new_password": "456789", "confirm_password": "456789"},
+            )
+
+            self.assertEqual(self.replay(client, cookie), 302)
+            self.assertEqual(other_device.get(reverse("employees:profile")).status_code, 302)
+
+    def test_admin_revoke_retires_every_session(self):
+        admin = User.objects.create_superuser("admin", password="admin")
+        for _ in self.engines():
+            device = Client()
+            cookie = self.login(device)
+            staff = Client()
+            staff.force_login(admin)
+            staff.post(reverse("admin:accounts_employeeprofile_changelist"), {
+                "action": "revoke_sessions", ACTION_CHECKBOX_NAME: [self.employee.pk],
+            })
+
+            self.assertEqual(self.replay(device, cookie), 302)
+
+    def test_saving_a_profile_keeps_its_sessions(self):
+        client = Client()
+        self.login(client)
+        self.employee.full_name = "Renamed"
+        self.employee.save()
+        self.assertEqual(client.get(reverse("employees:profile")).status_code, 200)
+
+    def test_session_version_must_match(self):
+        session = {"employee_id": self.employee.employee_id, "session_version": 0}
+        self.assertEqual(employee_for_session(session), self.employee)
+
+        self.employee.end_sessions()
+
+        self.assertIsNone(employee_for_session(session))
+        self.assertIsNone(employee_for_session({"employee_id": self.employee.employee_id}))
+
+
+# ===============================
+# Request Employee
+# ===============================
+@override_settings(**FAST_HASHER)
+class RequestEmployeeTests(TestCase):
+    def setUp(self):
+        self.employee = EmployeeProfile.objects.create(full_name="Page Employee", phone="0123456789")
+        session = self.client.session
+        session["employee_id"] = self.employee.employee_id
+        session.save()
+
+    def profile_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries if 'FROM "accounts_employeeprofile"' in query["sql"]]
+
+    def test_employee_pages_load_the_profile_once(self):
+        # The view, the top bar and both context processors all read request.employee
+        for name in ("dashboard", "attendance", "leave", "payroll", "performance", "projects", "profile"):
+            with self.subTest(view=name):
+                queries = self.profile_queries(reverse(f"employees:{name}"))
+                self.assertEqual(len(queries), 1, queries)
+                self.assertIn("adminpanel_department", queries[0])
+
+    def test_anonymous_request_has_no_employee(self):
+        self.client.logout()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("accounts:employee_login_page"))
+            self.assertFalse(response.wsgi_request.employee)
+
+
+# ===============================
+# Employee IDs
+# ===============================
+@override_settings(**FAST_HASHER)
+class EmployeeIdSequenceTests(TestCase):
+    def test_blocks_are_consecutive_and_never_reused(self):
+        self.assertEqual(allocate_employee_ids(2, year=2030), ["EM2030001", "EM2030002"])
+        self.assertEqual(allocate_employee_ids(3, year=2030), ["EM2030003", "EM2030004", "EM2030005"])
+        self.assertEqual(allocate_employee_ids(1, year=2031), ["EM2031001"])
+        self.assertEqual(EmployeeIdSequence.objects.get(year=2030).last_value, 5)
+
+    def test_new_year_row_continues_after_existing_ids(self):
+        EmployeeProfile.objects.create(employee_id="EM2030041", phone="0123456789")
+        EmployeeProfile.objects.create(employee_id="EM2030007", phone="0123456789")
+        EmployeeProfile.objects.create(employee_id="EM20301", phone="0123456789")
+
+        self.assertEqual(next_employee_id(2030), "EM2030042")
+        self.assertFalse(EmployeeIdSequence.objects.filter(year=2030).exists())
+        self.assertEqual(allocate_employee_ids(1, year=2030), ["EM2030042"])
+        self.assertEqual(next_employee_id(2030), "EM2030043")
+
+    def test_numbers_widen_past_999(self):
+        EmployeeIdSequence.objects.create(year=2030, last_value=998)
+        self.assertEqual(allocate_employee_ids(2, year=2030), ["EM2030999", "EM20301000"])
+        self.assertEqual(allocate_employee_ids(1, year=2030), ["EM20301001"])
+
+    def test_saving_without_an_id_allocates_one(self):
+        first = EmployeeProfile.objects.create(phone="0123456789")
+        second = EmployeeProfile.objects.create(phone="0123456789")
+        self.assertNotEqual(first.employee_id, second.employee_id)
+        self.assertEqual(int(second.employee_id[6:]), int(first.employee_id[6:]) + 1)
+
+
+# ===============================
+# Employee Import
+# ===============================
+@override_settings(**FAST_HASHER)
+class EmployeeImportTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="Engineering")
+        EmployeeProfile.objects.create(employee_id="EM2030001", phone="0123456789", email="taken@example.com")
+
+    def import_csv(self, *rows, batch_size=500):
+        lines = ["full_name,phone,department,joining_date,gender,email", *rows]
+        return onboarding.import_employees(StringIO("\n".join(lines) + "\n"), batch_size=batch_size)
+
+    def test_valid_rows_are_created_with_legacy_temp_passwords(self):
+        report = self.import_csv(
+            "Ada Lovelace,0711223344,engineering,2024-01-15,female,ada@example.com",
+            "Alan Turing,0799887766,,,,",
+        )
+
+        self.assertEqual((report.rows, report.created, report.rejects), (2, 2, []))
+        ada = EmployeeProfile.objects.get(email="ada@example.com")
+        self.assertEqual((ada.department, ada.gender, ada.temp_password), (self.department, "Female", "223344"))
+        self.assertTrue(ada.first_login)
+        # Stored like a legacy row and hashed on the first successful login
+        self.assertFalse(is_hashed(ada.password))
+        self.assertFalse(ada.check_password("wrong"))
+        self.assertTrue(ada.check_password("223344"))
+        stored = EmployeeProfile.objects.values_list("password", flat=True).get(pk=ada.pk)
+        self.assertTrue(is_hashed(stored))
+        self.assertTrue(check_password("223344", stored))
+
+    @override_settings(EMPLOYEE_PASSWORD_HASHER_OPTIONS={})
+    def test_import_does_not_hash_per_row(self):
+        rows = [f"Employee {number},07{number:08d},,,," for number in range(200)]
+
+        with mock.patch("accounts.passwords.make_password", wraps=make_password) as hashed:
+            started = time.perf_counter()
+            report = self.import_csv(*rows)
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(report.created, 200)
+        hashed.assert_not_called()
+        # Hashing each row at the default work factor takes about a minute
+        self.assertLess(elapsed, 5)
+
+    def test_bad_rows_are_rejected_with_line_and_reason(self):
+        report = self.import_csv(
+            ",0711223344,,,,",
+            "Short Phone,123,,,,",
+            "No Department,0711223344,Finance,,,",
+            "Bad Date,0711223344,,15/01/2024,,",
+            "Bad Gender,0711223344,,,robot,",
+            "Bad Email,0711223344,,,,not-an-email",
+            "Good Row,0711223344,,,,",
+        )
+
+        self.assertEqual((report.rows, report.created), (7, 1))
+        self.assertEqual([line_no for line_no, _, _ in report.rejects], [2, 3, 4, 5, 6, 7])
+        reasons = [reason for _, _, reason in report.rejects]
+        self.assertEqual(reasons[0], "missing full_name")
+        self.assertEqual(reasons[1], "phone needs at least 6 digits")
+        self.assertEqual(reasons[2], "unknown department 'Finance'")
+        self.assertIn("15/01/2024", reasons[3])
+        self.assertTrue(reasons[4].startswith("gender must be one of"))
+        self.assertEqual(reasons[5], "invalid email 'not-an-email'")
+        self.assertEqual(report.rejects[1][1], "Short Phone,123,,,,")
+
+        stream = StringIO()
+        report.write_rejects(stream)
+        self.assertEqual(stream.getvalue().splitlines()[0], "line,raw,reason")
+        self.assertEqual(len(stream.getvalue().splitlines()), 7)
+
+    def test_duplicate_emails_are_rejected(self):
+        report = self.import_csv(
+            "Existing,0711223344,,,,Taken@example.com",
+            "First,0711223344,,,,dup@example.com",
+            "Second,0711223344,,,,DUP@example.com",
+            batch_size=1,
+        )
+
+        first = EmployeeProfile.objects.get(full_name="First")
+        self.assertEqual(report.created, 1)
+        self.assertEqual(report.rejects, [
+            (2, "Existing,0711223344,,,,Taken@example.com", "email already used by EM2030001"),
+            (4, "Second,0711223344,,,,DUP@example.com", f"email already used by {first.employee_id}"),
+        ])
+
+    def test_duplicate_emails_within_a_batch_are_rejected(self):
+        report = self.import_csv("First,0711223344,,,,dup@example.com", "Second,0711223344,,,,dup@example.com")
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual(report.rejects, [(3, "Second,0711223344,,,,dup@example.com", "email already used by line 2")])
+
+    def test_clashing_batch_falls_back_to_row_by_row_inserts(self):
+        # An ID handed out outside the sequence: the block reserved for this batch runs into it
+        year = int(next_employee_id()[2:6])
+        EmployeeIdSequence.objects.create(year=year, last_value=0)
+        EmployeeProfile.objects.create(employee_id=format_employee_id(year, 2), phone="0123456789")
+
+        report = self.import_csv("First,0711223344,,,,", "Second,0722334455,,,,", "Third,0733445566,,,,")
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([(line_no, raw) for line_no, raw, _ in report.rejects], [(3, "Second,0722334455,,,,")])
+        self.assertTrue(report.rejects[0][2].startswith("could not be saved: "))
+        self.assertEqual(
+            sorted(EmployeeProfile.objects.filter(full_name__in=["First", "Third"]).values_list("employee_id", flat=True)),
+            [format_employee_id(year, 1), format_employee_id(year, 3)],
+        )
+        self.assertEqual(report.as_dict()["rejected"], 1)
+        self.assertEqual(list(report.as_dict())[:2], ["rows", "created"])
 
-# Create your tests here.
@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.views.decorators.cache import never_cache
 from .models import EmployeeProfile
+from .middleware import get_employee, login_employee
 
 
 # ---------------------------
@@ -27,7 +28,7 @@ def employee_login_page(request):
             return render(request, "employee_login.html")
 
         # ✅ Save session
-        request.session["employee_id"] = profile.employee_id
+        login_employee(request, profile)
 
         # First login → force password change
         if profile.first_login:
@@ -44,14 +45,12 @@ def employee_login_page(request):
 # FIRST LOGIN PASSWORD CHANGE
 # ---------------------------
 def change_password_first_login(request):
-    employee_id = request.session.get("employee_id")
-    if not employee_id:
+    if not request.session.get("employee_id"):
         messages.error(request, "Session expired. Please login again.")
         return redirect("accounts:employee_login_page")
 
-    try:
-        profile = EmployeeProfile.objects.get(employee_id=employee_id)
-    except EmployeeProfile.DoesNotExist:
+    profile = get_employee(request)
+    if profile is None:
         messages.error(request, "Employee not found.")
         return redirect("accounts:employee_login_page")
 
@@ -73,6 +72,7 @@ def change_password_first_login(request):
         profile.save(update_fields=["password", "first_login"])
 
         messages.success(request, "Password changed successfully. Please login again.")
+        profile.end_sessions()
         request.session.flush()  # logout after password change
         return redirect("accounts:employee_login_page")
 
@@ -84,6 +84,8 @@ def change_password_first_login(request):
 # ---------------------------
 @never_cache
 def logout_view(request):
+    # Ends this device's session only; a password change or an admin revoke
+    # retires every session through EmployeeProfile.end_sessions()
     request.session.flush()
     messages.success(request, "You have been logged out.")
     response = redirect("accounts:employee_login_page")
@@ -1,3 +1,12 @@
 from django.contrib import admin
 
 # Register your models here.
+from employees.admin import notify_action
+from .models import Department
+
+@admin.register(Department)
+class DepartmentAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+    actions = [notify_action(lambda queryset: {"departments": queryset},
+                             'Send a notification to members of the selected departments')]
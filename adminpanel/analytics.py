@@ -0,0 +1,136 @@
+"""
+Organisation-wide figures for the admin dashboard.
+
+Everything the dashboard shows is built in a handful of aggregate queries and
+kept in the cache as one snapshot. A snapshot older than ANALYTICS_TTL is
+still served while a background worker rebuilds it, so a dashboard load costs
+one cache read whatever the size of the tables. On a cold cache the dashboard
+shell counts its four headline figures directly and leaves building the
+snapshot to the first chart request.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from accounts.models import EmployeeProfile
+from employees import background, leaderboards
+from employees.models import LeaveRequest, Project
+from employees.stats import daily_attendance_total, monthly_attendance_trend
+
+ANALYTICS_TTL = getattr(settings, "ADMIN_ANALYTICS_TTL", 300)
+REFRESH_LOCK_TIMEOUT = getattr(settings, "ADMIN_ANALYTICS_REFRESH_LOCK_TIMEOUT", 60)
+SNAPSHOT_KEY = "admin-analytics:snapshot"
+REFRESH_LOCK_KEY = "admin-analytics:refreshing"
+LEAVE_STATUSES = ("Approved", "Pending", "Rejected")
+HEADLINE_KEYS = ("total_employees", "total_projects", "pending_leaves", "today_attendance")
+TOP_SIZE = 5
+
+
+# ===============================
+# Queries
+# ===============================
+def top_performers(limit=TOP_SIZE):
+    """(name, rating out of 5) for the company leaderboard."""
+    return [(row["employee__full_name"], row["rating"]) for row in leaderboards.company(limit)]
+
+
+def build_headline():
+    """The dashboard's headline counters, one cheap query each."""
+    return {
+        "total_employees": EmployeeProfile.objects.count(),
+        "total_projects": Project.objects.count(),
+        "pending_leaves": LeaveRequest.objects.filter(status="Pending").count(),
+        "today_attendance": daily_attendance_total(),
+    }
+
+
+def build_snapshot():
+    leaves = LeaveRequest.objects.aggregate(
+        **{status.lower(): Count("id", filter=Q(status=status)) for status in LEAVE_STATUSES}
+    )
+    projects = list(Project.objects.order_by("-progress").values_list("title", "progress")[:TOP_SIZE])
+    trend = monthly_attendance_trend(months=6)
+    performers = top_performers()
+
+    return {
+        "total_employees": EmployeeProfile.objects.count(),
+        "total_projects": Project.objects.count(),
+        "pending_leaves": leaves["pending"],
+        "today_attendance": daily_attendance_total(),
+        "project_labels": [title for title, _ in projects],
+        "project_progress": [progress for _, progress in projects],
+        "leave_values": [leaves[status.lower()] for status in LEAVE_STATUSES],
+        "monthly_labels": [label for label, _ in trend],
+        "monthly_attendance": [count for _, count in trend],
+        "perf_names": [name for name, _ in performers],
+        "perf_scores": [score for _, score in performers],
+    }
+
+
+# ===============================
+# Snapshot Cache
+# ===============================
+def refresh():
+    """Rebuild the snapshot now and return it."""
+    snapshot = {"built_at": time.time(), "data": build_snapshot()}
+    # Kept past its TTL so a stale copy can be served during the next rebuild
+    cache.set(SNAPSHOT_KEY, snapshot, None)
+    return snapshot
+
+
+def _refresh_in_background():
+    try:
+        refresh()
+    finally:
+        cache.delete(REFRESH_LOCK_KEY)
+
+
+def snapshot():
+    """
+    The cached dashboard figures and the timestamp they were built at. Built
+    inline only when no snapshot exists yet; a stale one is returned as is and
+    a single background rebuild is queued.
+    """
+    cached = cache.get(SNAPSHOT_KEY)
+    if cached is None:
+        cached = refresh()
+    elif time.time() - cached["built_at"] > ANALYTICS_TTL and cache.add(REFRESH_LOCK_KEY, True, REFRESH_LOCK_TIMEOUT):
+        background.submit("admin-analytics", _refresh_in_background)
+    return cached["data"], cached["built_at"]
+
+
+def headline():
+    """
+    The headline counters and the build time of the snapshot they come from.
+    Without a cached snapshot they are counted directly and the build time is
+    None; the snapshot itself is left to the chart requests.
+    """
+    cached = cache.get(SNAPSHOT_KEY)
+    if cached is None:
+        return build_headline(), None
+    return {key: cached["data"][key] for key in HEADLINE_KEYS}, cached["built_at"]
+
+
+# ===============================
+# Charts
+# ===============================
+# Chart name -> (labels, values) keys in the snapshot; a tuple of labels is fixed
+CHARTS = {
+    "attendance-trend": ("monthly_labels", "monthly_attendance"),
+    "leave-status": (LEAVE_STATUSES, "leave_values"),
+    "project-progress": ("project_labels", "project_progress"),
+    "performance-scores": ("perf_names", "perf_scores"),
+}
+
+
+def chart(name):
+    """({"labels": [...], "values": [...]}, built_at) for one dashboard chart."""
+    labels, values = CHARTS[name]
+    data, built_at = snapshot()
+    payload = {
+        "labels": list(labels) if isinstance(labels, tuple) else data[labels],
+        "values": data[values],
+    }
+    return payload, built_at
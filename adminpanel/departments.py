@@ -0,0 +1,111 @@
+"""
+Headcount, project and payroll figures per department.
+
+The listing annotates every department with correlated subqueries, so it is
+one query however many departments exist. The detail page reads one cached
+entry per department (headcount plus payroll grouped by month over the last
+PAYROLL_MONTHS months), dropped whenever an employee, project or payroll row
+of that department changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from accounts.models import EmployeeProfile
+from employees.models import Payroll, Project
+from employees.stats import shift_month
+
+from .models import Department
+
+PAYROLL_MONTHS = getattr(settings, "DEPARTMENT_PAYROLL_MONTHS", 12)
+# Also bounds how long an employee or project moving out takes to show in the old department
+DEPARTMENT_CACHE_TIMEOUT = getattr(settings, "DEPARTMENT_CACHE_TIMEOUT", 3600)
+
+
+def _key(department_pk):
+    return f"department-stats:{department_pk}"
+
+
+def payroll_start(today=None):
+    """First month counted in the payroll figures."""
+    return shift_month(today or timezone.localdate(), -(PAYROLL_MONTHS - 1))
+
+
+# ===============================
+# Listing
+# ===============================
+def _per_department(model, department, aggregate, **filters):
+    """Correlated subquery aggregating the `model` rows whose `department` path is the outer row."""
+    return Subquery(
+        model.objects.filter(**{department: OuterRef("pk")}, **filters)
+        .order_by().values(department).annotate(total=aggregate).values("total")[:1]
+    )
+
+
+def with_stats(queryset=None, today=None):
+    """
+    Departments annotated with `headcount`, `project_total` and
+    `payroll_total` (gross pay over the last PAYROLL_MONTHS months).
+    """
+    queryset = Department.objects.all() if queryset is None else queryset
+    payroll = _per_department(
+        Payroll, "employee__department", Sum("gross_salary"), month__gte=payroll_start(today)
+    )
+    return queryset.annotate(
+        headcount=Coalesce(_per_department(EmployeeProfile, "department", Count("pk")), 0),
+        project_total=Coalesce(_per_department(Project, "assigned_to__department", Count("pk")), 0),
+        payroll_total=Coalesce(payroll, Value(0), output_field=DecimalField(max_digits=14, decimal_places=2)),
+    )
+
+
+# ===============================
+# Detail
+# ===============================
+def build(department_pk, today=None):
+    start = payroll_start(today)
+    headcount = EmployeeProfile.objects.filter(department=department_pk).aggregate(
+        total=Count("id"), active=Count("id", filter=Q(is_active=True))
+    )
+    months = (
+        Payroll.objects.filter(employee__department=department_pk, month__gte=start)
+        .annotate(period=TruncMonth("month")).values("period")
+        .annotate(gross=Sum("gross_salary"), net=Sum("net_pay"), paid=Count("employee", distinct=True))
+        .order_by("period")
+    )
+    payroll = [
+        {"month": row["period"], "gross": row["gross"], "net": row["net"], "paid": row["paid"]}
+        for row in months
+    ]
+    return {
+        "headcount": headcount["total"],
+        "active": headcount["active"],
+        "projects": Project.objects.filter(assigned_to__department=department_pk).count(),
+        "payroll_since": start,
+        "payroll_total": sum(row["gross"] for row in payroll),
+        "payroll": payroll,
+    }
+
+
+def stats(department_pk):
+    """The cached detail figures for one department, built on a miss."""
+    figures = cache.get(_key(department_pk))
+    if figures is None:
+        figures = build(department_pk)
+        cache.set(_key(department_pk), figures, DEPARTMENT_CACHE_TIMEOUT)
+    return figures
+
+
+# ===============================
+# Invalidation
+# ===============================
+def department_changed(*department_pks):
+    cache.delete_many([_key(pk) for pk in department_pks if pk])
+
+
+def employee_changed(employee_pk):
+    """Drop the figures of the employee's department."""
+    department_changed(
+        EmployeeProfile.objects.filter(pk=employee_pk).values_list("department_id", flat=True).first()
+    )
@@ -11,12 +11,18 @@ class Department(models.Model):
     # --------------------
     # Reverse Relations
     # --------------------
+    # The counts come from adminpanel.departments.with_stats() annotations
+    # when present; otherwise each runs its own query.
     def employee_count(self):
+        if hasattr(self, "headcount"):
+            return self.headcount
         # Import here to avoid circular import
         from accounts.models import EmployeeProfile
         return EmployeeProfile.objects.filter(department=self).count()
 
     def project_count(self):
+        if hasattr(self, "project_total"):
+            return self.project_total
         from employees.models import Project
         # Assuming Project has assigned_to ForeignKey to EmployeeProfile
         return Project.objects.filter(assigned_to__department=self).count()
@@ -1,3 +1,391 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import EmployeeProfile
+from accounts.passwords import hash_password
+from employees.models import LeaveRequest, Payroll, Performance, Project
+from employees.utils import STATUS_BADGES
+
+from . import analytics
+from . import departments as department_stats
+from .models import Department
+
+
+# ===============================
+# Dashboard Analytics
+# ===============================
+class AnalyticsSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        EmployeeProfile.objects.create(employee_id="EM2030001", phone="0123456789")
+
+    def age(self, seconds):
+        """Backdate the cached snapshot by `seconds`."""
+        cached = cache.get(analytics.SNAPSHOT_KEY)
+        cached["built_at"] -= seconds
+        cache.set(analytics.SNAPSHOT_KEY, cached, None)
+
+    def test_missing_snapshot_is_built_inline(self):
+        with mock.patch.object(analytics.background, "submit") as submit:
+            data, built_at = analytics.snapshot()
+
+        self.assertEqual(data["total_employees"], 1)
+        self.assertAlmostEqual(built_at, time.time(), delta=5)
+        submit.assert_not_called()
+
+    def test_fresh_snapshot_is_served_from_cache(self):
+        analytics.snapshot()
+        EmployeeProfile.objects.create(employee_id="EM2030002", phone="0123456789")
+
+        with mock.patch.object(analytics.background, "submit") as submit, self.assertNumQueries(0):
+            data, _ = analytics.snapshot()
+
+        self.assertEqual(data["total_employees"], 1)
+        submit.assert_not_called()
+
+    def test_stale_snapshot_is_served_while_one_rebuild_runs(self):
+        analytics.snapshot()
+        EmployeeProfile.objects.create(employee_id="EM2030002", phone="0123456789")
+        self.age(analytics.ANALYTICS_TTL + 1)
+
+        with mock.patch.object(analytics.background, "submit") as submit, \
+                mock.patch.object(analytics.cache, "add", wraps=cache.add) as add:
+            data, _ = analytics.snapshot()
+            analytics.snapshot()  # the refresh lock is held: nothing else is queued
+
+        self.assertEqual(data["total_employees"], 1)
+        submit.assert_called_once_with("admin-analytics", analytics._refresh_in_background)
+        add.assert_called_with(analytics.REFRESH_LOCK_KEY, True, analytics.REFRESH_LOCK_TIMEOUT)
+        self.assertTrue(cache.get(analytics.REFRESH_LOCK_KEY))
+
+        analytics._refresh_in_background()
+
+        self.assertIsNone(cache.get(analytics.REFRESH_LOCK_KEY))
+        with mock.patch.object(analytics.background, "submit") as submit:
+            data, built_at = analytics.snapshot()
+        self.assertEqual(data["total_employees"], 2)
+        self.assertAlmostEqual(built_at, time.time(), delta=5)
+        submit.assert_not_called()
+
+    def test_failed_rebuild_releases_the_lock_and_keeps_the_stale_copy(self):
+        analytics.snapshot()
+        self.age(analytics.ANALYTICS_TTL + 1)
+
+        with mock.patch.object(analytics.background, "submit") as submit:
+            analytics.snapshot()
+        # background.submit logs whatever the task raises
+        with mock.patch.object(analytics, "build_snapshot", side_effect=RuntimeError("boom")), \
+                self.assertRaises(RuntimeError):
+            submit.call_args.args[1]()
+
+        self.assertIsNone(cache.get(analytics.REFRESH_LOCK_KEY))
+        with mock.patch.object(analytics.background, "submit") as submit:
+            data, _ = analytics.snapshot()
+        self.assertEqual(data["total_employees"], 1)
+        submit.assert_called_once()
+
+
+class DashboardShellTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        EmployeeProfile.objects.create(employee_id="EM2030001", phone="0123456789")
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+
+    def test_cold_cache_counts_headlines_and_charts_build_the_snapshot(self):
+        with mock.patch.object(analytics, "build_snapshot", wraps=analytics.build_snapshot) as build:
+            response = self.client.get(reverse("admin_dashboard"))
+
+            self.assertEqual(response.context["total_employees"], 1)
+            self.assertIsNone(response.context["snapshot_age"])
+            self.assertContains(response, "charts are loading")
+            build.assert_not_called()
+            self.assertIsNone(cache.get(analytics.SNAPSHOT_KEY))
+
+            self.client.get(reverse("admin_chart_data", args=["leave-status"]))
+            self.client.get(reverse("admin_chart_data", args=["attendance-trend"]))
+            build.assert_called_once()
+
+        EmployeeProfile.objects.create(employee_id="EM2030002", phone="0123456789")
+        with mock.patch.object(analytics, "build_headline") as counted:
+            response = self.client.get(reverse("admin_dashboard"))
+        counted.assert_not_called()
+        self.assertEqual(response.context["total_employees"], 1)  # from the snapshot
+        self.assertIsNotNone(response.context["snapshot_age"])
+
+
+# ===============================
+# Chart Data
+# ===============================
+class ChartDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        EmployeeProfile.objects.create(employee_id="EM2030001", phone="0123456789")
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+        self.url = reverse("admin_chart_data", args=["leave-status"])
+
+    def test_chart_is_served_with_validators(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"labels": ["Approved", "Pending", "Rejected"], "values": [0, 0, 0]})
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_matching_etag_gets_an_empty_304(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_unmodified_since_build_gets_a_304(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_rebuilt_snapshot_with_new_data_gets_a_new_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        LeaveRequest.objects.create(
+            employee=EmployeeProfile.objects.get(), leave_type="Annual", number_of_days=2,
+            start_date=date(2030, 1, 6), end_date=date(2030, 1, 7), reason="Trip",
+        )
+        analytics.refresh()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["values"], [0, 1, 0])
+
+    def test_unknown_chart_is_404(self):
+        self.assertEqual(self.client.get(reverse("admin_chart_data", args=["nope"])).status_code, 404)
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+
+# ===============================
+# Projects
+# ===============================
+class ProjectListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        owner = EmployeeProfile.objects.create(employee_id="EM2030001", phone="0123456789")
+        today = timezone.localdate()
+        rows = [(100, today)] * 3 + [(50, today - timedelta(days=1))] * 14 + [(0, today + timedelta(days=9))]
+        Project.objects.bulk_create([
+            Project(title=f"P{number}", description="-", assigned_to=owner, assigned_by="HR",
+                    progress=progress, due_date=due_date)
+            for number, (progress, due_date) in enumerate(rows)
+        ])
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+
+    def test_status_filter_and_pagination(self):
+        response = self.client.get(reverse("admin_project_list"), {"status": "Overdue", "page": 2})
+
+        page = response.context["page_obj"]
+        self.assertEqual((page.number, page.paginator.count, page.paginator.num_pages), (2, 14, 2))
+        self.assertEqual([project.dynamic_status for project in page], ["Overdue"] * 2)
+        self.assertEqual(response.context["portfolio"]["dynamic_status"], {"Completed": 3, "Overdue": 14, "In Progress": 1})
+
+    def test_unknown_status_lists_everything(self):
+        response = self.client.get(reverse("admin_project_list"), {"status": "Upcoming"})
+        self.assertIsNone(response.context["status"])
+        self.assertEqual(response.context["page_obj"].paginator.count, 18)
+
+    def test_detail_shows_the_dynamic_status_badge(self):
+        project = Project.objects.filter(progress=50).first()
+
+        response = self.client.get(reverse("admin_project_detail", args=[project.pk]))
+
+        self.assertEqual(response.context["project_status"], {"label": "Overdue", "badge": STATUS_BADGES["Overdue"]})
+        self.assertContains(response, STATUS_BADGES["Overdue"])
+
+
+# ===============================
+# Department Stats
+# ===============================
+class DepartmentStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.department = Department.objects.create(name="Sales")
+        self.employees = [
+            EmployeeProfile.objects.create(employee_id=f"EM203000{number}", phone="0123456789", department=self.department)
+            for number in range(1, 4)
+        ]
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+
+    def payroll(self, employee, gross):
+        return Payroll.objects.create(
+            employee=employee, month=timezone.localdate().replace(day=1),
+            gross_salary=gross, deductions=0, net_pay=gross,
+        )
+
+    def test_bulk_activation_refreshes_headcount(self):
+        self.assertEqual(department_stats.stats(self.department.pk)["active"], 3)
+        ids = [employee.pk for employee in self.employees[:2]]
+
+        self.client.post(reverse("admin_employee_list"), {"action": "deactivate", "employee_ids": ids})
+        self.assertEqual(department_stats.stats(self.department.pk)["active"], 1)
+
+        self.client.post(reverse("admin_employee_list"), {"action": "activate", "employee_ids": ids[:1]})
+        self.assertEqual(department_stats.stats(self.department.pk)["active"], 2)
+
+    def test_payroll_and_project_changes_refresh_the_department(self):
+        self.assertEqual(department_stats.stats(self.department.pk)["payroll_total"], 0)
+
+        payroll = self.payroll(self.employees[0], Decimal("1000.00"))
+        self.assertEqual(department_stats.stats(self.department.pk)["payroll_total"], Decimal("1000.00"))
+
+        Project.objects.create(
+            title="Roadmap", description="-", assigned_to=self.employees[1], assigned_by="HR",
+            due_date=timezone.localdate(),
+        )
+        self.assertEqual(department_stats.stats(self.department.pk)["projects"], 1)
+
+        Payroll.objects.get(pk=payroll.pk).delete()  # employee not loaded: looked up instead
+        self.assertEqual(department_stats.stats(self.department.pk)["payroll_total"], 0)
+
+    def test_moves_and_reassignments_refresh_both_departments(self):
+        support = Department.objects.create(name="Support")
+        project = Project.objects.create(
+            title="Roadmap", description="-", assigned_to=self.employees[0], assigned_by="HR",
+            due_date=timezone.localdate(),
+        )
+        self.assertEqual(department_stats.stats(self.department.pk)["projects"], 1)
+        self.assertEqual(department_stats.stats(support.pk)["active"], 0)
+
+        self.employees[0].department = support
+        self.employees[0].save()
+        self.assertEqual(department_stats.stats(self.department.pk)["active"], 2)
+        self.assertEqual(department_stats.stats(self.department.pk)["projects"], 0)
+        self.assertEqual(department_stats.stats(support.pk)["active"], 1)
+        self.assertEqual(department_stats.stats(support.pk)["projects"], 1)
+
+        project.assigned_to = self.employees[1]
+        project.save()
+        self.assertEqual(department_stats.stats(support.pk)["projects"], 0)
+        self.assertEqual(department_stats.stats(self.department.pk)["projects"], 1)
+
+    @mock.patch.object(department_stats, "PAYROLL_MONTHS", 6)
+    def test_list_card_labels_the_payroll_window(self):
+        response = self.client.get(reverse("admin_department_list"))
+        self.assertEqual(response.context["payroll_months"], 6)
+        self.assertContains(response, "last 6 months")
+
+    def test_loaded_employee_saves_the_lookup(self):
+        payroll = Payroll.objects.select_related("employee").get(pk=self.payroll(self.employees[0], 10).pk)
+
+        with self.assertNumQueries(1):
+            payroll.save()
+
+    def test_cascade_delete_does_not_look_up_each_row(self):
+        def delete_queries(employee, payrolls):
+            for _ in range(payrolls):
+                self.payroll(employee, 10)
+            with CaptureQueriesContext(connection) as queries:
+                EmployeeProfile.objects.get(pk=employee.pk).delete()
+            return len(queries)
+
+        self.assertEqual(delete_queries(self.employees[0], 1), delete_queries(self.employees[1], 5))
+
+
+# ===============================
+# Performance
+# ===============================
+class PerformanceListTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+
+    def add_employees(self, count):
+        department = Department.objects.create(name=f"Team {Department.objects.count()}")
+        for _ in range(count):
+            employee = EmployeeProfile.objects.create(phone="0123456789", department=department)
+            Performance.objects.create(employee=employee, rating=4.0)
+
+    def test_list_query_count_does_not_grow_with_employees(self):
+        self.add_employees(1)
+        # Session, admin user, the sidebar's two permission lookups, then the
+        # employee list with its department and rating
+        with self.assertNumQueries(5):
+            self.client.get(reverse("admin_performance_list"))
+
+        self.add_employees(10)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("admin_performance_list"))
+        self.assertEqual([employee.overall_rating for employee in response.context["performance_list"]], [4.0] * 11)
+
+    def test_list_and_detail_show_the_latest_record(self):
+        self.add_employees(1)
+        employee = EmployeeProfile.objects.get()
+        latest = Performance.objects.create(employee=employee, rating=2.5)
+
+        response = self.client.get(reverse("admin_performance_list"))
+        self.assertEqual([row.overall_rating for row in response.context["performance_list"]], [2.5])
+        response = self.client.get(reverse("admin_performance_detail", args=[employee.pk]))
+        self.assertEqual(response.context["performance"], latest)
+
+
+# ===============================
+# Employees
+# ===============================
+class EmployeeAddTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+
+    def test_add_hashes_once_and_writes_one_row(self):
+        with mock.patch("accounts.models.hash_password", wraps=hash_password) as hashed, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("admin_employee_add"), {"full_name": "New Hire", "phone": "0712345678"})
+
+        self.assertRedirects(response, reverse("admin_employee_list"), fetch_redirect_response=False)
+        hashed.assert_called_once_with("345678")
+        writes = [
+            query["sql"] for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE")) and '"accounts_employeeprofile"' in query["sql"]
+        ]
+        self.assertEqual(len(writes), 1, writes)
+        employee = EmployeeProfile.objects.get(full_name="New Hire")
+        self.assertTrue(employee.first_login)
+        self.assertTrue(employee.check_password("345678"))
+
+    def test_import_answers_api_clients_and_browsers(self):
+        def upload():
+            return SimpleUploadedFile("staff.csv", b"full_name,phone\nAda Lovelace,0711223344\nNo Phone,\n")
+
+        response = self.client.post(reverse("admin_employee_import"), {"file": upload()}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual(response.json()["rejects"], [{"line": 3, "raw": "No Phone,", "reason": "phone needs at least 6 digits"}])
+
+        response = self.client.post(reverse("admin_employee_import"), {"file": upload()})
+        self.assertTemplateUsed(response, "admin_employee_import.html")
+        self.assertEqual(response.context["report"].created, 1)
+
+        response = self.client.post(reverse("admin_employee_import"), {}, HTTP_ACCEPT="application/json")
+        self.assertEqual((response.status_code, response.json()), (400, {"error": "Please choose a staff list."}))
+        response = self.client.post(reverse("admin_employee_import"), {})
+        self.assertRedirects(response, reverse("admin_employee_add"), fetch_redirect_response=False)
 
-# Create your tests here.
@@ -12,6 +12,7 @@ urlpatterns = [
     
     # Dashboard
     path('dashboard/', views.dashboard_view, name='admin_dashboard'),
+    path('dashboard/charts/<slug:chart>/', views.admin_chart_data, name='admin_chart_data'),
     
     #========================
     # payroll management
@@ -29,6 +30,7 @@ urlpatterns = [
      
     path('employees/', views.admin_employee_list, name='admin_employee_list'),
     path('employees/add/', views.admin_employee_add, name='admin_employee_add'),
+    path('employees/import/', views.admin_employee_import, name='admin_employee_import'),
     path('employees/message/<int:pk>/', views.admin_employee_message,
          name='admin_employee_message'),
 
@@ -58,6 +60,8 @@ urlpatterns = [
      
     path('attendance/', views.admin_attendance_view,
          name='admin_attendance_list'),
+    path('attendance/import/', views.admin_attendance_import,
+         name='admin_attendance_import'),
     path("leaves/", views.admin_leave_list, name="admin_leave_list"),
     path("leaves/<int:pk>/<str:action>/",
          views.admin_leave_update, name="admin_leave_update"),
@@ -67,6 +71,8 @@ urlpatterns = [
      
     path("performance/", views.admin_performance_list,
          name="admin_performance_list"),
+    path("performance/leaderboard/", views.admin_performance_leaderboard,
+         name="admin_performance_leaderboard"),
     path("performance/<int:pk>/", views.admin_performance_detail,
          name="admin_performance_detail"),
     path("performance/<int:employee_id>/edit/",
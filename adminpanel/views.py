@@ -10,71 +10,54 @@ from datetime import datetime, timedelta
 from django.db.models import Count
 
 #@login_required(login_url="/adminportal/admin/")
+import hashlib
 import json
+import time
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.db.models import Count
 from datetime import datetime, timedelta
 from accounts.models import EmployeeProfile
 from employees.models import Project, LeaveRequest, Attendance, Performance
+from . import analytics
 
 @login_required(login_url="/adminportal/admin/")
 def dashboard_view(request):
-    # --- 1. Basic Stats (SQLite Counts) ---
-    total_employees = EmployeeProfile.objects.count()
-    total_projects = Project.objects.count()
-    pending_leaves = LeaveRequest.objects.filter(status="Pending").count()
-    today_attendance = Attendance.objects.filter(date=datetime.today().date()).count()
-
-    # --- 2. Project Progress Data ---
-    projects = Project.objects.all().order_by('-progress')[:5]
-    project_labels = [p.title for p in projects]
-    project_progress = [p.progress for p in projects]
-
-    # --- 3. Leave Status Data ---
-    leave_data = LeaveRequest.objects.values('status').annotate(count=Count('status'))
-    # Dict to ensure correct order in chart
-    leave_map = {"Approved": 0, "Pending": 0, "Rejected": 0}
-    for item in leave_data:
-        if item['status'] in leave_map:
-            leave_map[item['status']] = item['count']
-    
-    leave_values = [leave_map["Approved"], leave_map["Pending"], leave_map["Rejected"]]
-
-    # --- 4. Attendance Trend (Last 6 Months) ---
-    monthly_labels = []
-    monthly_attendance = []
-    today = datetime.today()
-    for i in range(5, -1, -1):
-        month_date = today - timedelta(days=i*30)
-        label = month_date.strftime('%b %Y')
-        monthly_labels.append(label)
-        count = Attendance.objects.filter(date__year=month_date.year, date__month=month_date.month).count()
-        monthly_attendance.append(count)
-
-    # --- 5. Performance Scores ---
-    perf_records = Performance.objects.select_related('employee').all()[:5]
-    perf_names = [p.employee.full_name for p in perf_records]
-    perf_scores = [p.overall_rating() for p in perf_records] # Assuming it's a method
-
-    context = {
-        "total_employees": total_employees,
-        "total_projects": total_projects,
-        "pending_leaves": pending_leaves,
-        "today_attendance": today_attendance,
-        
-        # Serialization for JavaScript
-        "project_labels_js": json.dumps(project_labels),
-        "project_progress_js": json.dumps(project_progress),
-        "leave_values_js": json.dumps(leave_values),
-        "monthly_labels_js": json.dumps(monthly_labels),
-        "monthly_attendance_js": json.dumps(monthly_attendance),
-        "perf_names_js": json.dumps(perf_names),
-        "perf_scores_js": json.dumps(perf_scores),
-    }
+    # Only the headline figures; each chart fetches its own JSON (admin_chart_data),
+    # which also builds the snapshot when the cache is cold
+    context, built_at = analytics.headline()
+    context["snapshot_age"] = None if built_at is None else int(time.time() - built_at)
 
     return render(request, "admindashboard.html", context)
 
+
+@login_required(login_url="/adminportal/admin/")
+@require_GET
+def admin_chart_data(request, chart):
+    """
+    JSON data for one dashboard chart. The ETag is a digest of the data and
+    Last-Modified the snapshot build time, so a browser revalidating an
+    unchanged chart gets an empty 304.
+    """
+    if chart not in analytics.CHARTS:
+        raise Http404("Unknown chart")
+    payload, built_at = analytics.chart(chart)
+
+    etag = quote_etag(hashlib.md5(json.dumps(payload, sort_keys=True).encode()).hexdigest())
+    last_modified = int(built_at)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(payload)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # Always revalidate; the snapshot may be rebuilt at any time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 #==============
 # Payroll View
 #==============
@@ -305,6 +288,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db.models import Q
 from accounts.models import EmployeeProfile
+from employees import kiosk
+from . import departments as department_stats
 from django.contrib.auth.decorators import login_required
 
 @login_required
@@ -335,11 +320,17 @@ def admin_employee_list(request):
             action = request.POST['action']
             employee_ids = request.POST.getlist('employee_ids')
 
+            selected = EmployeeProfile.objects.filter(id__in=employee_ids)
+            # update() skips the post_save handlers; drop the cached figures they would
+            department_pks = set(selected.values_list('department_id', flat=True))
             if action == 'activate':
-                EmployeeProfile.objects.filter(id__in=employee_ids).update(is_active=True)
+                selected.update(is_active=True)
+                department_stats.department_changed(*department_pks)
                 messages.success(request, "Selected employees have been activated.")
             elif action == 'deactivate':
-                EmployeeProfile.objects.filter(id__in=employee_ids).update(is_active=False)
+                kiosk.forget(*selected.values_list('employee_id', flat=True))
+                selected.update(is_active=False)
+                department_stats.department_changed(*department_pks)
                 messages.success(request, "Selected employees have been deactivated.")
         
         return redirect('admin_employee_list')
@@ -382,30 +373,17 @@ def admin_employee_message(request, pk):
 #======================
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from accounts.models import EmployeeProfile
-from datetime import datetime
-import re
+from accounts.models import EmployeeProfile, next_employee_id
 from django.contrib.auth.decorators import login_required
 
 @login_required
 def admin_employee_add(request):
     """
     Admin can add a new employee with only name and phone.
-    Employee ID is auto-generated as EMYYYYNNN and shown in form.
+    Employee ID is allocated from EmployeeIdSequence as EMYYYYNNN on save
+    (the form shows a preview).
     Temporary password is last 6 digits of phone number.
     """
-    # Generate auto Employee ID for display
-    year = datetime.now().year
-    last_employee = EmployeeProfile.objects.order_by('-id').first()
-    if last_employee:
-        match = re.search(r'EM\d{4}(\d+)$', last_employee.employee_id)
-        last_number = int(match.group(1)) if match else 0
-        new_number = last_number + 1
-    else:
-        new_number = 1
-
-    auto_employee_id = f"EM{year}{new_number:03d}"
-
     if request.method == "POST":
         full_name = request.POST.get("full_name")
         phone = request.POST.get("phone")
@@ -414,27 +392,65 @@ def admin_employee_add(request):
             messages.error(request, "Please enter a valid name and phone number (at least 6 digits).")
             return redirect('admin_employee_add')
 
-        # Temporary password: last 6 digits of phone
-        temp_password = phone[-6:]
-
-        # Create employee
-        employee = EmployeeProfile(
-            employee_id=auto_employee_id,
-            full_name=full_name,
-            phone=phone,
-            first_login=True
-        )
-        employee.set_password(temp_password)
-        employee.save()
+        # Create employee; save() takes the ID from the sequence and hashes
+        # the temporary password (last 6 digits of phone) exactly once
+        employee = EmployeeProfile.objects.create(full_name=full_name, phone=phone)
 
         messages.success(
             request,
-            f"Employee {full_name} created with Employee ID {auto_employee_id} and temporary password: {temp_password}"
+            f"Employee {full_name} created with Employee ID {employee.employee_id} and temporary password: {employee.temp_password}"
         )
         return redirect('admin_employee_list')
 
-    return render(request, "admin_employee_add.html", {"employee_id": auto_employee_id})
+    # Preview only; the ID is reserved when the employee is saved
+    return render(request, "admin_employee_add.html", {"employee_id": next_employee_id()})
+
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from accounts import onboarding
 
+def _import_upload(request, importer, guess_format, back_to, missing, done):
+    """
+    Shared body of the bulk upload views: check the user and the file, run
+    `importer(upload, fmt=...)` and answer API clients with the report as JSON.
+    Browsers get `done(report)`, or a message and a redirect to `back_to`.
+    """
+    upload = request.FILES.get("file")
+    wants_json = "application/json" in request.headers.get("Accept", "")
+    if not request.user.is_staff or not upload:
+        error = "Permission denied." if not request.user.is_staff else missing
+        if wants_json:
+            return JsonResponse({"error": error}, status=403 if not request.user.is_staff else 400)
+        messages.error(request, error)
+        return redirect(back_to)
+
+    fmt = request.POST.get("format") or guess_format(upload.name)
+    try:
+        report = importer(upload, fmt=fmt)
+    except ValueError as exc:
+        if wants_json:
+            return JsonResponse({"error": str(exc)}, status=400)
+        messages.error(request, str(exc))
+        return redirect(back_to)
+
+    if wants_json:
+        return JsonResponse(report.as_dict())
+    return done(report)
+
+@login_required(login_url='/admin/')
+@require_POST
+def admin_employee_import(request):
+    """
+    Onboard employees from a CSV or XLSX staff list. Returns the import report
+    as JSON for API clients, otherwise renders it with every rejected row.
+    """
+    return _import_upload(
+        request, onboarding.import_employees,
+        guess_format=lambda name: "xlsx" if name.endswith(".xlsx") else "csv",
+        back_to="admin_employee_add", missing="Please choose a staff list.",
+        done=lambda report: render(request, "admin_employee_import.html", {"report": report}),
+    )
 
 @login_required
 def admin_employee_view(request, pk):
@@ -503,15 +519,15 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import Department
 from .forms import DepartmentForm
-from employees.models import Project, Payroll
-from django.db.models import Sum
+from . import departments as department_stats
 
 @login_required(login_url='/admin/')
 def admin_department_list(request):
     """
-    List all departments, add new department via form/modal.
+    List all departments with headcount, project and payroll figures (one
+    annotated query), add new department via form/modal.
     """
-    departments = Department.objects.all().order_by('name')
+    departments = department_stats.with_stats().order_by('name')
     form = DepartmentForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
         form.save()
@@ -520,25 +536,20 @@ def admin_department_list(request):
 
     return render(request, 'admin_department_list.html', {
         'departments': departments,
-        'form': form
+        'form': form,
+        'payroll_months': department_stats.PAYROLL_MONTHS,
     })
 
 
 @login_required(login_url='/admin/')
 def admin_department_detail(request, pk):
     """
-    Show department full info: employees, projects, total payroll
+    Show department full info: employees, plus cached headcount, project and
+    monthly payroll figures
     """
     department = get_object_or_404(Department, pk=pk)
-
-    # ✅ Use the correct related_name for employees
-    employees = department.employees.all()  # instead of employeeprofile_set
-
-    # Count all projects for employees
-    projects = Project.objects.filter(assigned_to__in=employees).count()
-
-    # Sum payroll for all employees in this department
-    total_payroll = Payroll.objects.filter(employee__in=employees).aggregate(total=Sum('gross_salary'))['total'] or 0
+    employees = department.employees.all()
+    stats = department_stats.stats(department.pk)
 
     # Edit form
     form = DepartmentForm(request.POST or None, instance=department)
@@ -550,8 +561,8 @@ def admin_department_detail(request, pk):
     return render(request, 'admin_department_detail.html', {
         'department': department,
         'employees': employees,
-        'project_count': projects,
-        'total_payroll': total_payroll,
+        'stats': stats,
+        'payroll_months': department_stats.PAYROLL_MONTHS,
         'form': form,
     })
 
@@ -605,6 +616,11 @@ def admin_attendance_view(request):
 #----------------------
 # ADMIN ATTENDANCE VIEW
 #----------------------
+from datetime import timedelta
+from django.utils.dateparse import parse_date
+from employees.stats import overtime_report, shift_month
+
+OVERTIME_ROWS = 10
 
 @login_required(login_url='/admin/')
 def admin_attendance_view(request):
@@ -646,14 +662,64 @@ def admin_attendance_view(request):
         attendance.save()
         return redirect(request.path + f"?employee_id={employee_id}&date={date_filter}")
 
+    # Overtime for the month being looked at: the filtered date's, else this month's
+    try:
+        day = parse_date(date_filter) or timezone.localdate()
+    except ValueError:
+        day = timezone.localdate()
+    month_start = day.replace(day=1)
+    month_end = shift_month(month_start, 1) - timedelta(days=1)
+    overtime = [
+        {
+            "employee": row["employee__full_name"],
+            "employee_id": row["employee__employee_id"],
+            "days": row["days"],
+            "hours": round(row["overtime_seconds"] / 3600, 1),
+        }
+        for row in overtime_report(month_start, month_end)[:OVERTIME_ROWS]
+    ]
+
     context = {
         "attendances": attendances,
         "employees": employees,
         "employee_id": employee_id,
         "date_filter": date_filter,
+        "overtime": overtime,
+        "overtime_month": month_start,
     }
     return render(request, "admin_attendance.html", context)
 
+#----------------------
+# BULK PUNCH IMPORT
+#----------------------
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from employees import ingest
+
+@login_required(login_url='/admin/')
+@require_POST
+def admin_attendance_import(request):
+    """
+    Import a badge reader / biometric punch file (CSV or JSON lines).
+    Returns the ingestion report as JSON for API clients, otherwise redirects
+    back to the attendance list with a summary message.
+    """
+    def done(report):
+        messages.success(
+            request,
+            f"Imported {report.punches} punches into {report.rows_written} attendance rows "
+            f"({len(report.rejects)} rejected).",
+        )
+        for line_no, raw, reason in report.rejects[:10]:
+            messages.warning(request, f"Line {line_no}: {reason}")
+        return redirect("admin_attendance_list")
+
+    return _import_upload(
+        request, ingest.ingest,
+        guess_format=lambda name: "jsonl" if name.endswith((".jsonl", ".json")) else "csv",
+        back_to="admin_attendance_list", missing="Please choose a punch file.", done=done,
+    )
+
 #======================
 #Manage leave requests
 #======================
@@ -663,6 +729,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from accounts.models import EmployeeProfile
 from employees.models import LeaveRequest
+from employees import leave_balances
 
 @login_required
 def admin_leave_list(request):
@@ -685,19 +752,18 @@ def admin_leave_update(request, pk, action):
         messages.error(request, "You do not have permission to perform this action.")
         return redirect("dashboard")
 
-    leave = get_object_or_404(LeaveRequest, pk=pk)
+    leave = get_object_or_404(LeaveRequest.objects.select_related("employee"), pk=pk)
     
     if action.lower() == "approve":
-        leave.status = "Approved"
+        leave_balances.set_status(leave, "Approved")
         messages.success(request, f"{leave.employee.full_name}'s leave approved.")
     elif action.lower() == "reject":
-        leave.status = "Rejected"
+        leave_balances.set_status(leave, "Rejected")
         messages.success(request, f"{leave.employee.full_name}'s leave rejected.")
     else:
         messages.error(request, "Invalid action.")
         return redirect("admin_leave_list")
 
-    leave.save()
     return redirect("admin_leave_list")
   
   
@@ -707,7 +773,11 @@ def admin_leave_update(request, pk, action):
 
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from accounts.models import EmployeeProfile
+from adminpanel.models import Department
+from employees import leaderboards
 from employees.models import Performance
 
 @login_required
@@ -715,31 +785,38 @@ def admin_performance_list(request):
     if not request.user.is_staff:
         return redirect('dashboard')
 
-    employees = EmployeeProfile.objects.all().select_related()
-
-    # Fetch performance for each employee
-    performance_list = []
-    for emp in employees:
-        perf = Performance.objects.filter(employee=emp).first()
-        overall = perf.overall_rating() if perf else 0
-        performance_list.append({
-            "employee": emp,
-            "performance": perf,
-            "overall_rating": overall
-        })
+    # One query: the rating of each employee's latest performance record rides along
+    latest_rating = Performance.objects.filter(employee=OuterRef("pk")).order_by("-pk").values("rating")[:1]
+    employees = EmployeeProfile.objects.select_related("department").annotate(
+        overall_rating=Coalesce(Subquery(latest_rating), 0.0)
+    )
 
     context = {
-        "performance_list": performance_list
+        "performance_list": employees
     }
     return render(request, "admin_performance_list.html", context)
 
+@login_required
+def admin_performance_leaderboard(request):
+    if not request.user.is_staff:
+        return redirect('dashboard')
+
+    departments = list(Department.objects.order_by("name"))
+    boards = leaderboards.departments([department.pk for department in departments], limit=5)
+
+    context = {
+        "company_board": leaderboards.company(),
+        "department_boards": [(department, boards[department.pk]) for department in departments],
+    }
+    return render(request, "admin_performance_leaderboard.html", context)
+
 @login_required
 def admin_performance_detail(request, pk):
     if not request.user.is_staff:
         return redirect('dashboard')
 
     employee = get_object_or_404(EmployeeProfile, pk=pk)
-    performance = Performance.objects.filter(employee=employee).first()
+    performance = Performance.objects.filter(employee=employee).last()
 
     if performance:
         skills = performance.skills.select_related("skill").all()  # Keep as queryset of PerformanceSkill
@@ -862,8 +939,11 @@ def admin_performance_feedback_delete(request, feedback_id):
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.paginator import Paginator
 from accounts.models import EmployeeProfile
+from employees import portfolio
 from employees.models import Project
+from employees.utils import DYNAMIC_STATUSES, STATUS_BADGES, get_project_status, with_dynamic_status
 
 # ===============================
 # Project List
@@ -873,10 +953,55 @@ def admin_project_list(request):
     if not request.user.is_staff:
         return redirect('dashboard')
 
-    projects = Project.objects.select_related('assigned_to').all()
+    # Filter and paginate by dynamic status in SQL
+    status = request.GET.get("status")
+    if status not in DYNAMIC_STATUSES:
+        status = None
+    projects = with_dynamic_status(Project.objects.select_related('assigned_to'), status).order_by("due_date", "pk")
+    page = Paginator(projects, 12).get_page(request.GET.get("page"))
+    for project in page:
+        project.status_badge = STATUS_BADGES[project.dynamic_status]
+
+    # Org-wide figures from the cached portfolio stats, never the project rows
+    figures = portfolio.stats()
+    project_stats = [
+        {
+            "label": "Total Projects",
+            "value": figures["total"],
+            "icon": "fas fa-layer-group",
+            "icon_color": "text-slate-600",
+            "icon_bg": "bg-slate-100 dark:bg-slate-800",
+        },
+        {
+            "label": "In Progress",
+            "value": figures["dynamic_status"]["In Progress"],
+            "icon": "fas fa-tasks",
+            "icon_color": "text-blue-600",
+            "icon_bg": "bg-blue-100 dark:bg-blue-950/30",
+        },
+        {
+            "label": "Overdue",
+            "value": figures["dynamic_status"]["Overdue"],
+            "icon": "fas fa-exclamation-circle",
+            "icon_color": "text-rose-600",
+            "icon_bg": "bg-rose-100 dark:bg-rose-950/30",
+        },
+        {
+            "label": "Success Rate",
+            "value": f"{figures['success_rate']}%",
+            "icon": "fas fa-percentage",
+            "icon_color": "text-emerald-600",
+            "icon_bg": "bg-emerald-100 dark:bg-emerald-950/30",
+        },
+    ]
 
     context = {
-        "projects": projects,
+        "projects": page,
+        "page_obj": page,
+        "statuses": DYNAMIC_STATUSES,
+        "status": status,
+        "project_stats": project_stats,
+        "portfolio": figures,
     }
     return render(request, "admin_project_list.html", context)
 
@@ -889,10 +1014,11 @@ def admin_project_detail(request, pk):
     if not request.user.is_staff:
         return redirect('dashboard')
 
-    project = get_object_or_404(Project, pk=pk)
+    project = get_object_or_404(with_dynamic_status(Project.objects.all()), pk=pk)
 
     context = {
         "project": project,
+        "project_status": get_project_status(project),
     }
     return render(request, "admin_project_detail.html", context)
 
@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'channels',
     'accounts',
     'employees',
     'adminpanel', 
@@ -62,6 +63,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.EmployeeMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -85,13 +87,13 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                  'accounts.context_processors.global_employee',
                  "employees.context_processors.notifications_processor",
-                 'employees.views.base_notifications',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'employeemanagement.wsgi.application'
+ASGI_APPLICATION = 'employeemanagement.asgi.application'
 
 
 # Database
@@ -171,6 +173,85 @@ LOGIN_REDIRECT_URL = '/admin/dashboard/'
 LOGOUT_REDIRECT_URL = '/admin/'
 
 
+#==============================
+# Employee Portal Passwords
+#==============================
+# Hasher (an algorithm from PASSWORD_HASHERS) and work factor for employee
+# logins, e.g. {'iterations': 390000} for PBKDF2 or {'rounds': 12} for bcrypt.
+# Pick a value with `manage.py benchmark_login`; existing hashes and legacy
+# plaintext passwords are upgraded on the employee's next login.
+EMPLOYEE_PASSWORD_HASHER = 'pbkdf2_sha256'
+EMPLOYEE_PASSWORD_HASHER_OPTIONS = {}
+
+
+#==============================
+# Sessions
+#==============================
+# Selected per deployment with EMPLOYEE_SESSION_BACKEND:
+#   db             - django_session table (default)
+#   cached_db      - cache in front of the table; reads skip the database
+#   cache          - cache only; sessions are lost if the cache is cleared
+#   signed_cookies - no server-side storage; the cookie holds the employee id and session version
+# Logout flushes the current session. A password change or the admin's revoke action
+# bumps EmployeeProfile.session_version, which retires sessions on every backend.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('EMPLOYEE_SESSION_BACKEND', 'db')]
+
+
+#==============================
+# Cache Settings
+#==============================
+# Local memory is per process; point this at Redis or Memcached when running
+# several workers so cache invalidation is shared between them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'employeemanagement',
+        # Per-employee entries (dashboards, notification counters) exceed the default 300
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+# Seconds a cached employee dashboard may live before it is rebuilt
+EMPLOYEE_DASHBOARD_CACHE_TIMEOUT = 300
+
+# Days notifications stay in the hot table before archive_notifications moves them
+NOTIFICATION_RETAIN_READ_DAYS = 90
+NOTIFICATION_RETAIN_UNREAD_DAYS = 365
+
+# Seconds before the admin dashboard analytics snapshot is rebuilt in the background
+ADMIN_ANALYTICS_TTL = 300
+# Seconds one rebuild may hold the refresh lock; a worker that dies holding it delays the next try this long
+ADMIN_ANALYTICS_REFRESH_LOCK_TIMEOUT = 60
+
+
+#==============================
+# Channels (live notifications)
+#==============================
+# The in-memory layer only reaches websockets served by the same process;
+# use channels_redis when notifications are created from other workers.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+
+
+#==============================
+# Kiosk Punch API
+#==============================
+# Comma separated tokens accepted in "Authorization: Token <token>" headers
+KIOSK_API_TOKENS = [t for t in os.environ.get('KIOSK_API_TOKENS', '').split(',') if t]
+
+# How long a kiosk punch response is replayed for the same Idempotency-Key
+KIOSK_IDEMPOTENCY_TIMEOUT = 24 * 3600
+
+
 #==============================
 # Email Settings
 #==============================
@@ -1,8 +1,17 @@
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.shortcuts import render
+from django.urls import path, reverse
+from django.utils.html import format_html
+from . import fanout
+from .forms import CompanyBroadcastForm, NotificationBroadcastForm
 from .models import (
     Attendance, LeaveRequest, Payroll, Skill, 
     Performance, PerformanceSkill, Feedback, 
-    Project, Document, EmployeeData
+    Project, Document, EmployeeData, LeavePolicy, LeaveBalance, Notification, NotificationBroadcast,
+    ArchivedNotification
 )
 
 # --- Inlines for a more cohesive UI ---
@@ -18,12 +27,37 @@ class FeedbackInline(admin.TabularInline):
 
 # --- Admin Registrations ---
 
+class WorkedHoursFilter(admin.SimpleListFilter):
+    title = 'worked hours'
+    parameter_name = 'hours'
+    RANGES = {
+        'none': ('No hours', 0, 1),
+        'short': ('Under 4h', 1, 4 * 3600),
+        'regular': ('4h - 8h', 4 * 3600, 8 * 3600),
+        'overtime': ('Over 8h', 8 * 3600, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(key, label) for key, (label, _, _) in self.RANGES.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.RANGES:
+            return queryset
+        _, low, high = self.RANGES[self.value()]
+        queryset = queryset.filter(worked_seconds__gte=low)
+        return queryset.filter(worked_seconds__lt=high) if high else queryset
+
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
-    list_display = ('employee', 'date', 'check_in', 'check_out', 'status', 'working_hours')
-    list_filter = ('status', 'date', 'employee__department')
+    list_display = ('employee', 'date', 'check_in', 'check_out', 'status', 'hours_worked', 'late_minutes')
+    list_filter = ('status', WorkedHoursFilter, 'date', 'employee__department')
     search_fields = ('employee__full_name', 'employee__employee_id')
     date_hierarchy = 'date'
+    list_select_related = ('employee',)
+
+    @admin.display(description='Working hours', ordering='worked_seconds')
+    def hours_worked(self, obj):
+        return obj.working_hours()
 
 @admin.register(LeaveRequest)
 class LeaveRequestAdmin(admin.ModelAdmin):
@@ -31,6 +65,17 @@ class LeaveRequestAdmin(admin.ModelAdmin):
     list_filter = ('status', 'leave_type')
     search_fields = ('employee__full_name', 'reason')
 
+@admin.register(LeavePolicy)
+class LeavePolicyAdmin(admin.ModelAdmin):
+    list_display = ('leave_type', 'days_per_year', 'gender')
+
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'leave_type', 'year', 'entitled', 'used', 'remaining')
+    list_filter = ('year', 'leave_type')
+    search_fields = ('employee__full_name', 'employee__employee_id')
+    readonly_fields = ('used',)
+
 @admin.register(Payroll)
 class PayrollAdmin(admin.ModelAdmin):
     list_display = ('employee', 'month', 'gross_salary', 'deductions', 'net_pay')
@@ -63,4 +108,92 @@ class DocumentAdmin(admin.ModelAdmin):
 @admin.register(EmployeeData)
 class EmployeeDataAdmin(admin.ModelAdmin):
     list_display = ('employee', 'designation', 'department', 'joining_date')
-    search_fields = ('employee__full_name', 'employee__employee_id')
\ No newline at end of file
+    search_fields = ('employee__full_name', 'employee__employee_id')
+
+
+# --- Notification fan-out ---
+
+def _start_broadcast(modeladmin, request, data, **recipients):
+    job_id = fanout.start(data["title"], data["message"], data["link"], **recipients)
+    url = reverse("admin:employees_notification_broadcast_progress", args=[job_id])
+    modeladmin.message_user(request, format_html('Sending "{}" in the background. <a href="{}">Track progress</a>', data["title"], url))
+    return HttpResponseRedirect(url)
+
+
+def notify_action(recipients_for, description):
+    """
+    Admin action that asks for a title and message on an intermediate page,
+    then fans a notification out in the background. `recipients_for(queryset)`
+    returns the departments/employees keyword arguments for fanout.start().
+    """
+    def send_notification(modeladmin, request, queryset):
+        if not request.user.has_perm("employees.add_notification"):
+            raise PermissionDenied
+        form = NotificationBroadcastForm(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            return _start_broadcast(modeladmin, request, form.cleaned_data, **recipients_for(queryset))
+        return render(request, "admin/employees/notification/broadcast.html", {
+            **modeladmin.admin_site.each_context(request),
+            "title": description,
+            "form": form,
+            "opts": modeladmin.model._meta,
+            "selected": queryset.values_list("pk", flat=True),
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+        })
+
+    return admin.action(description=description)(send_notification)
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('title', 'employee', 'timestamp', 'is_read')
+    list_filter = ('is_read',)
+    search_fields = ('title', 'employee__full_name', 'employee__employee_id')
+    list_select_related = ('employee',)
+    change_list_template = "admin/employees/notification/change_list.html"
+
+    def get_urls(self):
+        return [
+            path("broadcast/", self.admin_site.admin_view(self.broadcast_view), name="employees_notification_broadcast"),
+            path("broadcast/<int:job_id>/", self.admin_site.admin_view(self.progress_view),
+                 name="employees_notification_broadcast_progress"),
+        ] + super().get_urls()
+
+    def broadcast_view(self, request):
+        """Notify one department or every active employee."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = CompanyBroadcastForm(request.POST or None)
+        if form.is_valid():
+            department = form.cleaned_data["department"]
+            return _start_broadcast(self, request, form.cleaned_data, departments=[department] if department else None)
+        return render(request, "admin/employees/notification/broadcast.html", {
+            **self.admin_site.each_context(request), "title": "Broadcast notification", "form": form, "opts": self.model._meta,
+        })
+
+    def progress_view(self, request, job_id):
+        state = fanout.progress(job_id)
+        if state is None:
+            raise Http404("Unknown fan-out job.")
+        if request.GET.get("format") == "json":
+            return JsonResponse(state)
+        return render(request, "admin/employees/notification/broadcast_progress.html", {
+            **self.admin_site.each_context(request), "title": "Notification fan-out", "opts": self.model._meta,
+            "state": state, "percent": round(100 * state["sent"] / state["total"]) if state["total"] else 0,
+        })
+
+
+@admin.register(NotificationBroadcast)
+class NotificationBroadcastAdmin(admin.ModelAdmin):
+    list_display = ('title', 'status', 'sent', 'total', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('title',)
+    readonly_fields = ('status', 'total', 'sent', 'chunks', 'last_employee_pk', 'error', 'created_at', 'updated_at')
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ('title', 'employee', 'timestamp', 'is_read', 'archived_at')
+    list_filter = ('is_read',)
+    search_fields = ('title', 'employee__full_name', 'employee__employee_id')
+    list_select_related = ('employee',)
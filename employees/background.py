@@ -0,0 +1,38 @@
+"""
+In-process background threads for work that should not hold up a request.
+
+Anything submitted here is lost if the process exits first, so it is only
+for work that is safe to lose or that is also persisted and picked up again
+by a management command (see fanout and `manage.py send_broadcasts`).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def _executor(name, max_workers):
+    with _lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        return _executors[name]
+
+
+def _run(name, fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", name)
+    finally:
+        connections.close_all()  # this worker thread's connections only
+
+
+def submit(name, fn, *args, max_workers=1, **kwargs):
+    """Run fn(*args, **kwargs) on the `name` pool; failures are logged."""
+    return _executor(name, max_workers).submit(_run, name, fn, args, kwargs)
@@ -0,0 +1,43 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from accounts.middleware import employee_for_session
+from accounts.models import EmployeeProfile
+
+from . import notifications
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live top-bar feed for the logged-in employee. Every open tab joins the
+    employee's group and receives new notifications and unread-count changes.
+    """
+
+    group_name = None
+
+    async def connect(self):
+        employee_pk = await self._employee_pk()
+        if employee_pk is None:
+            await self.close()
+            return
+
+        self.group_name = notifications.group_name(employee_pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        unread = await database_sync_to_async(notifications.unread_count)(employee_pk)
+        await self.send_json({"type": "unread", "unread_count": unread})
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_push(self, event):
+        await self.send_json(event["payload"])
+
+    @database_sync_to_async
+    def _employee_pk(self):
+        session = self.scope.get("session")
+        if session is None:
+            return None
+        employee = employee_for_session(session, EmployeeProfile.objects.filter(is_active=True).only("pk"))
+        return employee.pk if employee else None
@@ -1,6 +1,8 @@
-from .views import base_notifications
+from accounts.middleware import get_employee
+
+from .notifications import NotificationBar
 
 def notifications_processor(request):
-    if request.user.is_authenticated:
-        return base_notifications(request)
-    return {"notifications": [], "unread_count": 0}
+    # Lazy: the cache is only read if the template shows the notification bar
+    employee = request.employee if hasattr(request, "employee") else get_employee(request)
+    return {"notification_bar": NotificationBar(employee)}
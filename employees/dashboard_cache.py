@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.cache import cache
+
+# How long a built dashboard payload may live without being invalidated
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, "EMPLOYEE_DASHBOARD_CACHE_TIMEOUT", 300)
+
+
+# ===============================
+# Version Counters
+# ===============================
+# Every payload key carries the employee's version and a shared one, so a
+# change that affects everyone (e.g. a leave policy) is a single increment.
+ALL_EMPLOYEES = "all"
+
+
+def _version_key(employee_pk):
+    return f"employee-dashboard-version:{employee_pk}"
+
+
+def get_version(employee_pk):
+    version = cache.get(_version_key(employee_pk))
+    if version is None:
+        cache.add(_version_key(employee_pk), 1, timeout=None)
+        version = cache.get(_version_key(employee_pk), 1)
+    return version
+
+
+def bump_version(employee_pk):
+    """
+    Invalidate every cached dashboard payload for an employee. Old payloads are
+    never read again and simply expire.
+    """
+    if not employee_pk:
+        return
+    try:
+        cache.incr(_version_key(employee_pk))
+    except ValueError:
+        cache.add(_version_key(employee_pk), 1, timeout=None)
+
+
+def bump_all():
+    """Invalidate the cached dashboard payloads of every employee."""
+    bump_version(ALL_EMPLOYEES)
+
+
+# ===============================
+# Payload Cache
+# ===============================
+def get_or_build(employee, day, build):
+    """
+    Return the cached dashboard payload for `employee` on `day`, calling
+    `build()` to create it on a miss. The key carries the day so payloads
+    roll over at midnight without an explicit invalidation. Payloads hold
+    plain values only, never model instances.
+    """
+    versions = f"{get_version(employee.pk)}.{get_version(ALL_EMPLOYEES)}"
+    key = f"employee-dashboard:{employee.pk}:{versions}:{day.isoformat()}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, DASHBOARD_CACHE_TIMEOUT)
+    return payload
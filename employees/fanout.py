@@ -0,0 +1,160 @@
+"""
+Bulk notification fan-out to a department, a set of employees or everyone.
+
+A fan-out is stored as a NotificationBroadcast row, so the request that
+starts it only inserts that row. Recipients are streamed as primary keys and
+written with one bulk_create per chunk, in the same transaction that records
+the job's progress, so a job interrupted by a restart resumes without sending
+anything twice. Jobs are kicked off on a background thread as soon as they
+are queued; `manage.py send_broadcasts` picks up any a restart left behind.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from accounts.models import EmployeeProfile
+
+from . import background, notifications
+from .models import Notification, NotificationBroadcast
+
+logger = logging.getLogger(__name__)
+
+FANOUT_CHUNK_SIZE = getattr(settings, "NOTIFICATION_FANOUT_CHUNK_SIZE", 1000)
+FANOUT_WORKERS = getattr(settings, "NOTIFICATION_FANOUT_WORKERS", 2)
+# A running job whose progress has not moved for this long is taken to be orphaned
+STALE_AFTER = timedelta(minutes=10)
+
+
+# ===============================
+# Recipients
+# ===============================
+def recipients(departments=None, employees=None):
+    """
+    Primary keys of the active employees to notify: members of `departments`,
+    the given `employees` (a queryset or iterable of pks), or everyone.
+    """
+    queryset = EmployeeProfile.objects.filter(is_active=True)
+    if departments is not None:
+        queryset = queryset.filter(department__in=departments)
+    if employees is not None:
+        queryset = queryset.filter(pk__in=employees)
+    return queryset.order_by("pk").values_list("pk", flat=True)
+
+
+def _pks(items):
+    if items is None:
+        return None
+    if isinstance(items, QuerySet):
+        return list(items.values_list("pk", flat=True))
+    return [getattr(item, "pk", item) for item in items]
+
+
+def _chunks(recipient_pks, chunk_size):
+    chunk = []
+    for pk in recipient_pks.iterator(chunk_size=chunk_size):
+        chunk.append(pk)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ===============================
+# Progress
+# ===============================
+def progress(job_id):
+    """Progress dict of a fan-out job, or None if there is no such job."""
+    return NotificationBroadcast.objects.filter(pk=job_id).values("status", "total", "sent", "chunks", "error").first()
+
+
+def _report(broadcast_pk, **state):
+    NotificationBroadcast.objects.filter(pk=broadcast_pk).update(updated_at=timezone.now(), **state)
+
+
+# ===============================
+# Delivery
+# ===============================
+def claim(broadcast_pk, now=None):
+    """Mark a queued (or orphaned running) job as running; False if another worker has it."""
+    now = now or timezone.now()
+    return bool(
+        NotificationBroadcast.objects.filter(
+            Q(status=NotificationBroadcast.QUEUED)
+            | Q(status=NotificationBroadcast.RUNNING, updated_at__lt=now - STALE_AFTER),
+            pk=broadcast_pk,
+        ).update(status=NotificationBroadcast.RUNNING, updated_at=now)
+    )
+
+
+def deliver(broadcast, chunk_size=FANOUT_CHUNK_SIZE):
+    """
+    Write one notification per remaining recipient of a claimed job, chunk by
+    chunk, and return the number written in this run.
+    """
+    remaining = recipients(broadcast.departments, broadcast.employees).filter(pk__gt=broadcast.last_employee_pk)
+    if broadcast.total is None:
+        broadcast.total = remaining.count()
+        _report(broadcast.pk, total=broadcast.total)
+
+    written = 0
+    try:
+        for chunk in _chunks(remaining, chunk_size):
+            with transaction.atomic():
+                created = Notification.objects.bulk_create([
+                    Notification(
+                        employee_id=pk, title=broadcast.title, message=broadcast.message,
+                        link=broadcast.link or None, timestamp=broadcast.created_at,
+                    )
+                    for pk in chunk
+                ])
+                broadcast.sent, broadcast.chunks = broadcast.sent + len(created), broadcast.chunks + 1
+                broadcast.last_employee_pk = chunk[-1]
+                _report(
+                    broadcast.pk, sent=broadcast.sent, chunks=broadcast.chunks,
+                    last_employee_pk=broadcast.last_employee_pk,
+                )
+                notifications.bulk_created(created)
+            written += len(created)
+    except Exception as exc:
+        logger.exception("Notification fan-out %s failed", broadcast.pk)
+        _report(broadcast.pk, status=NotificationBroadcast.FAILED, error=str(exc))
+        raise
+    _report(broadcast.pk, status=NotificationBroadcast.DONE)
+    return written
+
+
+def run(broadcast_pk, chunk_size=FANOUT_CHUNK_SIZE):
+    """Claim and deliver one job; returns the number written (0 if it was not claimable)."""
+    if not claim(broadcast_pk):
+        return 0
+    return deliver(NotificationBroadcast.objects.get(pk=broadcast_pk), chunk_size)
+
+
+def pending(now=None):
+    """Primary keys of queued jobs and running jobs that look orphaned, oldest first."""
+    now = now or timezone.now()
+    return NotificationBroadcast.objects.filter(
+        Q(status=NotificationBroadcast.QUEUED)
+        | Q(status=NotificationBroadcast.RUNNING, updated_at__lt=now - STALE_AFTER)
+    ).order_by("pk").values_list("pk", flat=True)
+
+
+def start(title, message, link="", departments=None, employees=None):
+    """
+    Queue a fan-out to `recipients(departments, employees)` and return its job
+    id. Delivery starts on a background thread once the caller's transaction
+    commits (e.g. a new department member is visible).
+    """
+    broadcast = NotificationBroadcast.objects.create(
+        title=title, message=message, link=link or None,
+        departments=_pks(departments), employees=_pks(employees),
+    )
+    transaction.on_commit(
+        lambda: background.submit("notification-fanout", run, broadcast.pk, max_workers=FANOUT_WORKERS)
+    )
+    return broadcast.pk
@@ -1,5 +1,6 @@
 # employees/forms.py
 from django import forms
+from adminpanel.models import Department
 from .models import LeaveRequest
 
 class LeaveRequestForm(forms.ModelForm):
@@ -13,3 +14,15 @@ class LeaveRequestForm(forms.ModelForm):
             "end_date": forms.DateInput(attrs={"type": "date", "class": "w-full p-2 rounded border"}),
             "reason": forms.Textarea(attrs={"rows": 3, "class": "w-full p-2 rounded border"}),
         }
+
+
+class NotificationBroadcastForm(forms.Form):
+    title = forms.CharField(max_length=200)
+    message = forms.CharField(widget=forms.Textarea(attrs={"rows": 4}))
+    link = forms.URLField(required=False)
+
+
+class CompanyBroadcastForm(NotificationBroadcastForm):
+    department = forms.ModelChoiceField(
+        queryset=Department.objects.order_by("name"), required=False, empty_label="All active employees",
+    )
@@ -0,0 +1,192 @@
+"""
+Bulk attendance ingestion for badge reader and biometric punch exports.
+
+Punch streams (CSV or JSON lines) are parsed lazily, folded into one
+check-in/check-out pair per (employee, date) and upserted into Attendance in
+chunked bulk_create(update_conflicts=True) batches. The rollups get per-row
+deltas, so only the touched months and days change.
+"""
+import csv
+import json
+import time as clock
+from datetime import date, datetime, time
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import EmployeeProfile
+
+from . import dashboard_cache, rollups
+from .models import Attendance
+from .reports import BulkReport
+
+FORMATS = ("csv", "jsonl")
+UPSERT_FIELDS = ["check_in", "check_out", "status", "worked_seconds", "late_minutes"]
+
+
+class IngestReport(BulkReport):
+    """Counters and rejected lines collected during one ingestion run."""
+    counters = ("punches", "rows_written")
+    rate_counter = "punches"
+    punches_per_second = BulkReport.per_second
+
+
+# ===============================
+# Parsing
+# ===============================
+def _text_lines(stream):
+    """Yield decoded lines from a text or binary stream."""
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8-sig")
+        yield line
+
+
+def _parse_moment(record):
+    """
+    Return local (date, time) from a record holding either `timestamp`
+    (ISO 8601, with or without an offset) or separate `date` and `time` values.
+    """
+    timestamp = (record.get("timestamp") or "").strip()
+    if timestamp:
+        moment = datetime.fromisoformat(timestamp)
+        if timezone.is_aware(moment):
+            moment = timezone.localtime(moment)
+        return moment.date(), moment.time().replace(microsecond=0)
+    return (
+        date.fromisoformat(record["date"].strip()),
+        time.fromisoformat(record["time"].strip()).replace(microsecond=0),
+    )
+
+
+def _records(stream, fmt):
+    """
+    Yield (line number, raw line, record) with CSV records already split. A CSV
+    row that cannot be split into the header's columns comes back as a
+    ValueError in place of the record.
+    """
+    lines = _text_lines(stream)
+    if fmt == "csv":
+        reader = csv.reader(lines)
+        header = [name.strip().lower() for name in next(reader, [])]
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            raw = ",".join(values)
+            if len(values) > len(header):
+                yield reader.line_num, raw, ValueError(f"expected {len(header)} columns, got {len(values)}")
+                continue
+            yield reader.line_num, raw, dict(zip(header, values))
+        return
+
+    for line_no, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if line.strip():
+            yield line_no, line, line
+
+
+def read_punches(stream, fmt, report):
+    """
+    Lazily yield (line number, raw line, employee_id, date, time) punches from
+    `stream`. Malformed lines are recorded on `report` and skipped.
+    """
+    for line_no, raw, record in _records(stream, fmt):
+        report.punches += 1
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            if isinstance(record, str):
+                record = json.loads(record)
+            employee_id = str(record.get("employee_id") or "").strip()
+            if not employee_id:
+                raise ValueError("missing employee_id")
+            day, moment = _parse_moment(record)
+        except (ValueError, KeyError, AttributeError, TypeError) as exc:
+            report.reject(line_no, raw, str(exc) or exc.__class__.__name__)
+            continue
+        yield line_no, raw, employee_id, day, moment
+
+
+# ===============================
+# Upsert
+# ===============================
+def _fold(days, key, moment):
+    first, last = days.get(key, (moment, moment))
+    days[key] = (min(first, moment), max(last, moment))
+
+
+def _upsert(days, chunk_size, report):
+    """
+    Merge folded punches with stored rows and upsert them in chunks. Each
+    chunk's stored rows are locked and snapshotted first, so its rollup deltas
+    are applied in the same transaction as the upsert.
+    """
+    keys = list(days)
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        employee_pks = {employee_pk for employee_pk, _ in chunk}
+        dates = {day for _, day in chunk}
+
+        with transaction.atomic():
+            existing = {
+                (row["employee_id"], row["date"]): row
+                for row in Attendance.objects.select_for_update()
+                .filter(employee_id__in=employee_pks, date__in=dates)
+                .values(*rollups.ROLLUP_FIELDS, "check_in", "check_out")
+            }
+
+            rows, changes = [], []
+            for key in chunk:
+                employee_pk, day = key
+                first, last = days[key]
+                stored = existing.get(key)
+                stored_in, stored_out = (stored["check_in"], stored["check_out"]) if stored else (None, None)
+                check_in = min(filter(None, (first, stored_in)))
+                latest = max(filter(None, (last, stored_out)))
+                check_out = latest if latest > check_in else None
+                worked_seconds, late_minutes = Attendance.durations(day, check_in, check_out)
+                row = Attendance(
+                    employee_id=employee_pk, date=day, check_in=check_in, check_out=check_out,
+                    status=Attendance.status_for(check_in),
+                    worked_seconds=worked_seconds, late_minutes=late_minutes,
+                )
+                rows.append(row)
+                previous = {field: stored[field] for field in rollups.ROLLUP_FIELDS} if stored else None
+                changes.append((previous, rollups.snapshot(row)))
+
+            Attendance.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=["employee", "date"], update_fields=UPSERT_FIELDS,
+            )
+            # bulk_create bypasses the Attendance signals
+            rollups.replace_many(changes)
+        report.rows_written += len(rows)
+
+
+def ingest(stream, fmt="csv", chunk_size=1000):
+    """
+    Ingest a punch stream and return an IngestReport. The earliest punch of an
+    (employee, date) becomes check-in and the latest check-out; existing
+    attendance rows are merged rather than overwritten.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported punch format '{fmt}'.")
+    report = IngestReport()
+    started = clock.perf_counter()
+
+    employee_pks = dict(EmployeeProfile.objects.values_list("employee_id", "id"))
+    days = {}
+    for line_no, raw, employee_id, day, moment in read_punches(stream, fmt, report):
+        employee_pk = employee_pks.get(employee_id)
+        if employee_pk is None:
+            report.reject(line_no, raw, f"unknown employee '{employee_id}'")
+            continue
+        _fold(days, (employee_pk, day), moment)
+
+    if days:
+        _upsert(days, chunk_size, report)
+        for employee_pk in {employee_pk for employee_pk, _ in days}:
+            dashboard_cache.bump_version(employee_pk)
+
+    report.seconds = clock.perf_counter() - started
+    return report
+
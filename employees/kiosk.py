@@ -0,0 +1,148 @@
+"""
+Fast check-in / check-out path used by kiosks and the mobile app.
+
+A check-in is one conditional UPDATE of today's placeholder row, falling back
+to a single INSERT; a repeated punch never overwrites the first one. An
+idempotency key is reserved before the punch runs and then holds its result,
+so a retried request gets the same answer and never punches twice.
+"""
+import hmac
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from accounts.models import EmployeeProfile
+
+from . import dashboard_cache, rollups
+from .models import Attendance
+
+IDEMPOTENCY_TIMEOUT = getattr(settings, "KIOSK_IDEMPOTENCY_TIMEOUT", 24 * 3600)
+# How long a reserved key stays claimed if its request dies before storing a result
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+PENDING = "pending"
+EMPLOYEE_PK_TIMEOUT = 3600
+
+
+# ===============================
+# Lookups
+# ===============================
+def employee_pk(employee_id):
+    """Resolve an employee code to its primary key, cached for an hour."""
+    key = f"kiosk-employee-pk:{employee_id}"
+    pk = cache.get(key)
+    if pk is None:
+        pk = EmployeeProfile.objects.filter(employee_id=employee_id, is_active=True).values_list("id", flat=True).first()
+        if pk is not None:
+            cache.set(key, pk, EMPLOYEE_PK_TIMEOUT)
+    return pk
+
+
+def forget(*employee_ids):
+    """Drop cached employee codes, e.g. once the employees are deactivated."""
+    cache.delete_many([f"kiosk-employee-pk:{employee_id}" for employee_id in employee_ids])
+
+
+def valid_token(token):
+    return any(hmac.compare_digest(token.encode(), known.encode()) for known in settings.KIOSK_API_TOKENS)
+
+
+# ===============================
+# Idempotency
+# ===============================
+def _idempotency_key(idempotency_key):
+    return f"kiosk-idempotency:{idempotency_key}"
+
+
+def reserve(idempotency_key):
+    """
+    Claim an idempotency key before punching. Returns None when this request
+    owns the key, else the first request's result, or PENDING while that
+    request is still running.
+    """
+    key = _idempotency_key(idempotency_key)
+    if cache.add(key, PENDING, IDEMPOTENCY_LOCK_TIMEOUT):
+        return None
+    return cache.get(key, PENDING)
+
+
+def remember(idempotency_key, result):
+    if idempotency_key:
+        cache.set(_idempotency_key(idempotency_key), result, IDEMPOTENCY_TIMEOUT)
+
+
+def release(idempotency_key):
+    """Free a reserved key whose punch failed, so a retry can run it."""
+    if idempotency_key:
+        cache.delete(_idempotency_key(idempotency_key))
+
+
+# ===============================
+# Punches
+# ===============================
+def _result(action, moment, status):
+    return {"result": action, "time": moment.strftime("%H:%M:%S"), "status": status}
+
+
+def check_in(pk, now=None):
+    now = now or timezone.localtime()
+    today, moment = now.date(), now.time().replace(microsecond=0)
+    status = Attendance.status_for(moment)
+    _, late_minutes = Attendance.durations(today, moment, None)
+
+    # Common case: the nightly job already created an Absent placeholder row.
+    # The row and its rollup delta commit together or not at all.
+    with transaction.atomic():
+        updated = Attendance.objects.filter(
+            employee_id=pk, date=today, check_in__isnull=True, status="Absent"
+        ).update(check_in=moment, status=status, late_minutes=late_minutes)
+        if updated:
+            placeholder = {"employee_id": pk, "date": today, "status": "Absent", "worked_seconds": 0}
+            rollups.replace(placeholder, {**placeholder, "status": status})
+    if updated:
+        dashboard_cache.bump_version(pk)
+        return _result("checked_in", moment, status)
+
+    try:
+        with transaction.atomic():
+            Attendance.objects.create(employee_id=pk, date=today, check_in=moment, status=status)
+        return _result("checked_in", moment, status)
+    except IntegrityError:
+        record = Attendance.objects.get(employee_id=pk, date=today)
+
+    if record.check_in:
+        return _result("already_checked_in", record.check_in, record.status)
+    # A row an admin edited by hand; take the regular save path
+    record.check_in, record.status = moment, status
+    record.save()
+    return _result("checked_in", moment, status)
+
+
+def check_out(pk, now=None):
+    now = now or timezone.localtime()
+    today, moment = now.date(), now.time().replace(microsecond=0)
+
+    record = Attendance.objects.filter(employee_id=pk, date=today).values(*rollups.ROLLUP_FIELDS, "check_in", "check_out").first()
+    if not record or not record["check_in"]:
+        return {"result": "not_checked_in"}
+    if record["check_out"]:
+        return _result("already_checked_out", record["check_out"], record["status"])
+
+    worked_seconds, _ = Attendance.durations(today, record["check_in"], moment)
+    with transaction.atomic():
+        updated = Attendance.objects.filter(
+            employee_id=pk, date=today, check_out__isnull=True
+        ).update(check_out=moment, worked_seconds=worked_seconds)
+        if updated:
+            previous = {field: record[field] for field in rollups.ROLLUP_FIELDS}
+            rollups.replace(previous, {**previous, "worked_seconds": worked_seconds})
+    if not updated:
+        stored = Attendance.objects.get(employee_id=pk, date=today)
+        return _result("already_checked_out", stored.check_out, stored.status)
+
+    dashboard_cache.bump_version(pk)
+    return _result("checked_out", moment, record["status"])
+
+
+ACTIONS = {"check_in": check_in, "check_out": check_out}
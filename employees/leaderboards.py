@@ -0,0 +1,96 @@
+"""
+Top-performer leaderboards, company-wide and per department.
+
+Employees are ranked in SQL with RANK() window functions on their latest
+performance record, by stored rating, then goals achieved, then projects
+completed. Top-N is a filter on the window,
+so only the leaders leave the database. Each department's board (and the
+company board) is cached under its own key and dropped when a performance
+record in it changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+
+from accounts.models import EmployeeProfile
+
+from .models import Performance
+
+LEADERBOARD_SIZE = getattr(settings, "LEADERBOARD_SIZE", 10)
+# Also bounds how long an employee's department move takes to show
+LEADERBOARD_CACHE_TIMEOUT = getattr(settings, "LEADERBOARD_CACHE_TIMEOUT", 3600)
+COMPANY = "company"
+
+ORDERING = (F("rating").desc(), F("goals_achieved").desc(), F("projects_completed").desc())
+FIELDS = (
+    "employee_id", "employee__employee_id", "employee__full_name",
+    "employee__department_id", "employee__department__name",
+    "rating", "goals_achieved", "projects_completed", "rank",
+)
+
+
+def _key(scope):
+    return f"leaderboard:{scope}"
+
+
+# ===============================
+# Queries
+# ===============================
+def ranked(per_department=False):
+    """Active employees' latest performance records annotated with their `rank`."""
+    partition = {"partition_by": F("employee__department")} if per_department else {}
+    return Performance.latest().filter(employee__is_active=True).annotate(
+        rank=Window(Rank(), order_by=ORDERING, **partition)
+    )
+
+
+def company(limit=LEADERBOARD_SIZE):
+    """Company-wide leaders, best first (ties share a rank)."""
+    board = cache.get(_key(COMPANY))
+    if board is None:
+        board = list(
+            ranked().filter(rank__lte=LEADERBOARD_SIZE).order_by("rank", "pk").values(*FIELDS)
+        )
+        cache.set(_key(COMPANY), board, LEADERBOARD_CACHE_TIMEOUT)
+    return board[:limit]
+
+
+def departments(department_pks, limit=LEADERBOARD_SIZE):
+    """
+    {department pk: leaders} for the given departments. Boards missing from
+    the cache are built together in one partitioned query.
+    """
+    department_pks = list(department_pks)
+    cached = cache.get_many([_key(pk) for pk in department_pks])
+    boards = {pk: cached[_key(pk)] for pk in department_pks if _key(pk) in cached}
+
+    missing = [pk for pk in department_pks if pk not in boards]
+    if missing:
+        fresh = {pk: [] for pk in missing}
+        rows = (
+            ranked(per_department=True).filter(employee__department__in=missing, rank__lte=LEADERBOARD_SIZE)
+            .order_by("employee__department", "rank", "pk").values(*FIELDS)
+        )
+        for row in rows:
+            fresh[row["employee__department_id"]].append(row)
+        cache.set_many({_key(pk): board for pk, board in fresh.items()}, LEADERBOARD_CACHE_TIMEOUT)
+        boards.update(fresh)
+
+    return {pk: boards[pk][:limit] for pk in department_pks}
+
+
+def department(department_pk, limit=LEADERBOARD_SIZE):
+    return departments([department_pk], limit)[department_pk]
+
+
+# ===============================
+# Invalidation
+# ===============================
+def performance_changed(employee_pk):
+    """Drop the company board and the board of the employee's department."""
+    department_pk = EmployeeProfile.objects.filter(pk=employee_pk).values_list("department_id", flat=True).first()
+    keys = [_key(COMPANY)]
+    if department_pk:
+        keys.append(_key(department_pk))
+    cache.delete_many(keys)
@@ -0,0 +1,155 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Subquery, Sum
+from django.db.models.functions import Coalesce, ExtractYear
+from django.utils import timezone
+
+from .models import LeaveRequest, LeavePolicy, LeaveBalance
+
+POLICY_CACHE_KEY = "leave-policies"
+LEAVE_TYPE_ORDER = [choice for choice, _ in LeaveRequest.LEAVE_CHOICES]
+
+
+# ===============================
+# Policies
+# ===============================
+def leave_policies():
+    """All leave policies in LEAVE_CHOICES order, cached until a policy changes."""
+    policies = cache.get(POLICY_CACHE_KEY)
+    if policies is None:
+        policies = sorted(LeavePolicy.objects.all(), key=lambda p: LEAVE_TYPE_ORDER.index(p.leave_type))
+        cache.set(POLICY_CACHE_KEY, policies, None)
+    return policies
+
+
+def policy_changed(policy):
+    """Drop cached policies and carry a new entitlement into this year's balances."""
+    cache.delete(POLICY_CACHE_KEY)
+    LeaveBalance.objects.filter(
+        leave_type=policy.leave_type, year=timezone.localdate().year
+    ).update(entitled=policy.days_per_year)
+
+
+def _entitlement(leave_type):
+    for policy in leave_policies():
+        if policy.leave_type == leave_type:
+            return policy.days_per_year
+    return 0
+
+
+# ===============================
+# Reads
+# ===============================
+def balances_for(employee, year=None):
+    """
+    Remaining days per leave type for `employee`, as an ordered dict limited to
+    the policies that apply to them. One indexed query against LeaveBalance.
+    """
+    year = year or timezone.localdate().year
+    stored = {
+        leave_type: entitled - used
+        for leave_type, entitled, used in LeaveBalance.objects.filter(
+            employee=employee, year=year
+        ).values_list("leave_type", "entitled", "used")
+    }
+    return {
+        policy.leave_type: stored.get(policy.leave_type, policy.days_per_year)
+        for policy in leave_policies()
+        if policy.applies_to(employee)
+    }
+
+
+# ===============================
+# Writes
+# ===============================
+# Fields read from a LeaveRequest to work out which balance it counts toward
+LEDGER_FIELDS = ("employee_id", "leave_type", "start_date", "number_of_days", "status")
+
+
+def snapshot(leave):
+    """Return the ledger-relevant fields of a LeaveRequest instance as a dict."""
+    return {field: getattr(leave, field) for field in LEDGER_FIELDS}
+
+
+def _recount(employee_id, leave_type, year, create=True):
+    """
+    Set `used` to the approved days on record for one balance. Recounting
+    instead of adding deltas keeps the balance right whatever order writes
+    land in, and it can never go negative.
+    """
+    approved = (
+        LeaveRequest.objects.filter(
+            employee_id=employee_id, leave_type=leave_type, status="Approved", start_date__year=year
+        )
+        .order_by().values("employee_id").annotate(total=Sum("number_of_days")).values("total")
+    )
+    used = Coalesce(Subquery(approved), 0)
+    lookup = {"employee_id": employee_id, "leave_type": leave_type, "year": year}
+    if not LeaveBalance.objects.filter(**lookup).update(used=used) and create:
+        LeaveBalance.objects.get_or_create(**lookup, defaults={"entitled": _entitlement(leave_type)})
+        LeaveBalance.objects.filter(**lookup).update(used=used)
+
+
+def replace(previous, current):
+    """
+    Recount the balances a leave request counted toward before and after a
+    write (previous is None for a new request). Called from the LeaveRequest
+    signals, so the admin panel and the Django admin both keep the ledger in sync.
+    """
+    if previous == current:
+        return
+    balances = {
+        (row["employee_id"], row["leave_type"], row["start_date"].year)
+        for row in (previous, current)
+        if row and row["status"] == "Approved"
+    }
+    for balance in sorted(balances):
+        _recount(*balance)
+
+
+def removed(leave):
+    """
+    Recount the balance of a deleted request. Its in-memory status may be
+    stale, so the balance is recounted whatever it says.
+    """
+    _recount(leave.employee_id, leave.leave_type, leave.start_date.year, create=False)
+
+
+def set_status(leave, status):
+    """
+    Change a leave request's status. The request row is locked so two admins
+    acting at once are serialised; the LeaveRequest signals recount the
+    employee's balance in the same transaction.
+    """
+    with transaction.atomic():
+        LeaveRequest.objects.select_for_update().get(pk=leave.pk)
+        leave.status = status
+        leave.save(update_fields=["status"])
+
+
+# ===============================
+# Rebuild
+# ===============================
+def rebuild(batch_size=2000):
+    """
+    Re-derive every balance from approved leave history. Returns the number of
+    balance rows written.
+    """
+    usage = (
+        LeaveRequest.objects.filter(status="Approved")
+        .annotate(year=ExtractYear("start_date"))
+        .values("employee_id", "leave_type", "year")
+        .annotate(used=Sum("number_of_days"))
+        .order_by()
+    )
+    balances = [
+        LeaveBalance(
+            employee_id=row["employee_id"], leave_type=row["leave_type"], year=row["year"],
+            entitled=_entitlement(row["leave_type"]), used=row["used"],
+        )
+        for row in usage
+    ]
+    with transaction.atomic():
+        LeaveBalance.objects.all().delete()
+        LeaveBalance.objects.bulk_create(balances, batch_size=batch_size)
+    return len(balances)
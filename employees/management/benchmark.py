@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+def p99(timings):
+    """99th percentile of an already sorted list of timings."""
+    return timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Base for the benchmark_* commands that write data. handle() creates a
+    throwaway SQLite database, runs benchmark() against it and removes it
+    again, so the configured database is never touched.
+    """
+
+    def create_parser(self, prog_name, subcommand, **kwargs):
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.description = f"{self.help} Runs against a throwaway SQLite file, never the configured database."
+        return parser
+
+    def benchmark(self, *args, **options):
+        raise NotImplementedError("subclasses of BenchmarkCommand must provide a benchmark() method")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("Benchmarks run on a throwaway SQLite file; run them with a SQLite DATABASES setting.")
+
+        setup_test_environment()
+        self.workdir = tempfile.mkdtemp(prefix=f"{self.__module__.rsplit('.', 1)[-1]}-")
+        settings.DATABASES["default"].setdefault("TEST", {})["NAME"] = os.path.join(self.workdir, "bench.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.benchmark(*args, **options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            teardown_test_environment()
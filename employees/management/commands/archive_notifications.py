@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from employees import notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Move notifications past retention (NOTIFICATION_RETAIN_READ_DAYS / "
+        "NOTIFICATION_RETAIN_UNREAD_DAYS) into the archive table in short batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+        parser.add_argument("--purge", action="store_true", help="Delete expired notifications instead of archiving them")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        moved = batches = 0
+        for count in notifications.archive_expired(
+            batch_size=options["batch_size"], pause=options["pause"], purge=options["purge"],
+        ):
+            moved, batches = moved + count, batches + 1
+            if options["verbosity"] > 1:
+                self.stdout.write(f"batch {batches}: {count} notifications")
+
+        verb = "Purged" if options["purge"] else "Archived"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {moved} notifications in {batches} batches ({time.perf_counter() - started:.1f}s)."
+        ))
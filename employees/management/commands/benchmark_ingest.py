@@ -0,0 +1,53 @@
+import io
+import random
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import EmployeeProfile
+from employees import ingest
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure punch ingestion throughput with synthetic punches for existing "
+        "employees. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--punches", type=int, default=50000)
+        parser.add_argument("--days", type=int, default=5)
+        parser.add_argument("--chunk-size", type=int, nargs="+", default=[500, 1000, 5000])
+        parser.add_argument("--format", choices=ingest.FORMATS, default="csv")
+
+    def _punch_file(self, employee_ids, punches, days, fmt):
+        random.seed(punches)
+        start = timezone.localdate() - timedelta(days=days)
+        lines = ["employee_id,timestamp"] if fmt == "csv" else []
+        for _ in range(punches):
+            day = start + timedelta(days=random.randrange(days))
+            moment = datetime.combine(day, time(7)) + timedelta(seconds=random.randrange(12 * 3600))
+            employee_id = random.choice(employee_ids)
+            if fmt == "csv":
+                lines.append(f"{employee_id},{moment.isoformat()}")
+            else:
+                lines.append(f'{{"employee_id": "{employee_id}", "timestamp": "{moment.isoformat()}"}}')
+        return "\n".join(lines) + "\n"
+
+    def handle(self, *args, **options):
+        employee_ids = list(EmployeeProfile.objects.values_list("employee_id", flat=True))
+        if not employee_ids:
+            raise CommandError("Create some employees before benchmarking ingestion.")
+
+        text = self._punch_file(employee_ids, options["punches"], options["days"], options["format"])
+        self.stdout.write(f"{options['punches']} punches, {len(employee_ids)} employees, {options['days']} days")
+        for chunk_size in options["chunk_size"]:
+            with transaction.atomic():
+                report = ingest.ingest(io.StringIO(text), fmt=options["format"], chunk_size=chunk_size)
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"chunk={chunk_size:>6}  rows={report.rows_written:>7}  "
+                f"{report.seconds:6.2f}s  {report.punches_per_second:>8} punches/s"
+            )
@@ -0,0 +1,71 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.test import Client
+from django.test.utils import override_settings
+
+from accounts.models import EmployeeProfile
+from employees.management.benchmark import BenchmarkCommand, p99
+from employees.models import Attendance, AttendanceMonthlySummary, AttendanceDailySummary
+
+TOKEN = "kiosk-benchmark"
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Load test the kiosk punch endpoint at morning-peak concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+        parser.add_argument("--double-tap", action="store_true", help="Send every check-in twice with the same Idempotency-Key")
+
+    def _punch(self, employee_id, double_tap):
+        client = Client()
+        timings, errors = [], 0
+        for _ in range(2 if double_tap else 1):
+            started = time.perf_counter()
+            response = client.post(
+                "/employees/api/punch/",
+                {"employee_id": employee_id, "action": "check_in"},
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Token {TOKEN}",
+                HTTP_IDEMPOTENCY_KEY=f"{employee_id}-morning",
+            )
+            timings.append(time.perf_counter() - started)
+            errors += response.status_code != 200
+        return timings, errors
+
+    def _reset(self):
+        Attendance.objects.all().delete()
+        AttendanceMonthlySummary.objects.all().delete()
+        AttendanceDailySummary.objects.all().delete()
+        cache.clear()
+
+    def benchmark(self, *args, **options):
+        EmployeeProfile.objects.bulk_create([
+            EmployeeProfile(employee_id=f"BENCH{i:06d}", full_name=f"Bench {i}", phone="000000", password="x", temp_password="x")
+            for i in range(options["employees"])
+        ])
+        employee_ids = list(EmployeeProfile.objects.values_list("employee_id", flat=True))
+
+        self.stdout.write(f"{len(employee_ids)} employees checking in, SQLite file {self.workdir}")
+        with override_settings(KIOSK_API_TOKENS=[TOKEN]):
+            for concurrency in options["concurrency"]:
+                self._reset()
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    results = list(pool.map(lambda e: self._punch(e, options["double_tap"]), employee_ids))
+                elapsed = time.perf_counter() - started
+
+                timings = sorted(t for result, _ in results for t in result)
+                errors = sum(errors for _, errors in results)
+                self.stdout.write(
+                    f"concurrency={concurrency:>3}  requests={len(timings):>6}  "
+                    f"{len(timings) / elapsed:8.1f} req/s  "
+                    f"p50={statistics.median(timings) * 1000:7.2f}ms  p99={p99(timings) * 1000:7.2f}ms  "
+                    f"errors={errors}  rows={Attendance.objects.count()}"
+                )
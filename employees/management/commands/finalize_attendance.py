@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import EmployeeProfile
+from employees import dashboard_cache, rollups
+from employees.models import Attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the day's attendance rows for every active employee and mark "
+        "everyone who never checked in as Absent. Schedule it shortly after "
+        "midnight with --date for the previous day; running it in the morning "
+        "as well pre-creates the rows the kiosk check-in updates in place."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Day to finalize (YYYY-MM-DD), default today")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options["date"]) if options["date"] else timezone.localdate()
+        except ValueError:
+            raise CommandError(f"Invalid date '{options['date']}', expected YYYY-MM-DD.")
+        batch_size = options["batch_size"]
+
+        with transaction.atomic():
+            # 1. Placeholder rows for active employees without one
+            recorded = Attendance.objects.filter(date=day).values("employee_id")
+            missing = list(
+                EmployeeProfile.objects.filter(is_active=True).exclude(id__in=recorded).values_list("id", flat=True)
+            )
+            Attendance.objects.bulk_create(
+                [Attendance(employee_id=pk, date=day, status="Absent") for pk in missing],
+                batch_size=batch_size, ignore_conflicts=True,
+            )
+            # A check-in may have created some of these rows first, and the
+            # insert skipped them; only rows still placeholders count as Absent
+            created = list(
+                Attendance.objects.filter(
+                    date=day, employee_id__in=missing, check_in__isnull=True, status="Absent"
+                ).values_list("employee_id", flat=True)
+            ) if missing else []
+
+            # 2. Rows with no punch at all that still claim another status. A
+            # check-out without a check-in is a real (Late) attendance and stays.
+            stale = list(
+                Attendance.objects.filter(date=day, check_in__isnull=True, check_out__isnull=True)
+                .exclude(status="Absent")
+            )
+            previous = [rollups.snapshot(row) for row in stale]
+            for row in stale:
+                row.status = "Absent"
+            Attendance.objects.bulk_update(stale, ["status"], batch_size=batch_size)
+
+            # bulk_create / bulk_update bypass the Attendance signals
+            rollups.replace_many(
+                [(None, {"employee_id": pk, "date": day, "status": "Absent", "worked_seconds": 0}) for pk in created]
+                + [(before, rollups.snapshot(row)) for before, row in zip(previous, stale)]
+            )
+
+        for pk in {*created, *(row.employee_id for row in stale)}:
+            dashboard_cache.bump_version(pk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{day}: created {len(created)} absent rows, marked {len(stale)} rows without a punch as Absent."
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from employees import ingest
+
+
+class Command(BaseCommand):
+    help = "Import badge reader / biometric punches (CSV or JSON lines) into Attendance."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Punch file; CSV needs employee_id and timestamp (or date + time) columns")
+        parser.add_argument("--format", choices=ingest.FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--rejects", help="Write rejected lines to this CSV file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as stream:
+                report = ingest.ingest(stream, fmt=fmt, chunk_size=options["chunk_size"])
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        if options["rejects"]:
+            with open(options["rejects"], "w", newline="", encoding="utf-8") as stream:
+                report.write_rejects(stream)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report.punches} punches -> {report.rows_written} attendance rows in "
+            f"{report.seconds:.2f}s ({report.punches_per_second} punches/s), "
+            f"{len(report.rejects)} rejected."
+        ))
+        for line_no, raw, reason in report.rejects[:20]:
+            self.stdout.write(f"  line {line_no}: {reason} [{raw}]")
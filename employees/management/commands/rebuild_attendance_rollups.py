@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly and daily attendance rollup tables from raw attendance."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", help="First month to rebuild (YYYY-MM)")
+        parser.add_argument("--to", dest="end", help="Last month to rebuild (YYYY-MM)")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def _month(self, value):
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%Y-%m").date()
+        except ValueError:
+            raise CommandError(f"Invalid month '{value}', expected YYYY-MM.")
+
+    def handle(self, *args, **options):
+        monthly, daily = rollups.rebuild(
+            start=self._month(options["start"]),
+            end=self._month(options["end"]),
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {monthly} monthly and {daily} daily attendance rollups."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from employees import leave_balances
+
+
+class Command(BaseCommand):
+    help = "Re-derive every leave balance from approved leave history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        written = leave_balances.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} leave balances."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from employees import fanout
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued notification broadcasts and resume any a restart cut "
+        "short. Schedule it every few minutes; jobs already running elsewhere are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=fanout.FANOUT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        jobs = sent = failed = 0
+        for broadcast_pk in list(fanout.pending()):
+            try:
+                written = fanout.run(broadcast_pk, chunk_size=options["chunk_size"])
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Broadcast {broadcast_pk} failed: {exc}")
+                continue
+            jobs, sent = jobs + 1, sent + written
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Delivered {sent} notifications for {jobs} broadcasts ({failed} failed)."
+        ))
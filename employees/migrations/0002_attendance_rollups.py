@@ -0,0 +1,71 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:02
+
+from datetime import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_rollups(apps, schema_editor):
+    Attendance = apps.get_model('employees', 'Attendance')
+    MonthlySummary = apps.get_model('employees', 'AttendanceMonthlySummary')
+    DailySummary = apps.get_model('employees', 'AttendanceDailySummary')
+    status_fields = {'Present': 'present', 'Late': 'late', 'Absent': 'absent'}
+
+    months, days = {}, {}
+    rows = Attendance.objects.values_list('employee_id', 'date', 'status', 'check_in', 'check_out')
+    for employee_id, day, status, check_in, check_out in rows.iterator():
+        counts = {}
+        if status in status_fields:
+            counts[status_fields[status]] = 1
+        if check_in and check_out:
+            worked = datetime.combine(day, check_out) - datetime.combine(day, check_in)
+            counts['worked_seconds'] = max(int(worked.total_seconds()), 0)
+        for totals in (months.setdefault((employee_id, day.replace(day=1)), {}), days.setdefault(day, {})):
+            for field, value in counts.items():
+                totals[field] = totals.get(field, 0) + value
+
+    MonthlySummary.objects.bulk_create([
+        MonthlySummary(employee_id=employee_id, month=month, **totals)
+        for (employee_id, month), totals in months.items()
+    ])
+    DailySummary.objects.bulk_create([DailySummary(date=day, **totals) for day, totals in days.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('present', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('worked_seconds', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AttendanceMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('present', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('worked_seconds', models.BigIntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to='accounts.employeeprofile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='attendancemonthlysummary',
+            constraint=models.UniqueConstraint(fields=('employee', 'month'), name='unique_attendance_month_per_employee'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
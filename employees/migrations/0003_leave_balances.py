@@ -0,0 +1,80 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:04
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractYear
+import django.db.models.deletion
+
+DEFAULT_POLICIES = [
+    ('Annual', 18, ''),
+    ('Sick', 8, ''),
+    ('Personal', 5, ''),
+    ('Maternity', 90, 'Female'),
+    ('Emergency', 5, ''),
+]
+
+
+def seed_policies_and_balances(apps, schema_editor):
+    LeavePolicy = apps.get_model('employees', 'LeavePolicy')
+    LeaveBalance = apps.get_model('employees', 'LeaveBalance')
+    LeaveRequest = apps.get_model('employees', 'LeaveRequest')
+
+    LeavePolicy.objects.bulk_create([
+        LeavePolicy(leave_type=leave_type, days_per_year=days, gender=gender)
+        for leave_type, days, gender in DEFAULT_POLICIES
+    ])
+    entitlements = {leave_type: days for leave_type, days, _ in DEFAULT_POLICIES}
+
+    usage = (
+        LeaveRequest.objects.filter(status='Approved')
+        .annotate(year=ExtractYear('start_date'))
+        .values('employee_id', 'leave_type', 'year')
+        .annotate(used=Sum('number_of_days'))
+        .order_by()
+    )
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(
+            employee_id=row['employee_id'], leave_type=row['leave_type'], year=row['year'],
+            entitled=entitlements.get(row['leave_type'], 0), used=row['used'],
+        )
+        for row in usage
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('employees', '0002_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeavePolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('Annual', 'Annual'), ('Sick', 'Sick'), ('Personal', 'Personal'), ('Maternity', 'Maternity'), ('Emergency', 'Emergency')], max_length=20, unique=True)),
+                ('days_per_year', models.PositiveIntegerField()),
+                ('gender', models.CharField(blank=True, choices=[('Male', 'Male'), ('Female', 'Female'), ('Other', 'Other')], max_length=10)),
+            ],
+            options={
+                'verbose_name_plural': 'Leave policies',
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leave_type', models.CharField(choices=[('Annual', 'Annual'), ('Sick', 'Sick'), ('Personal', 'Personal'), ('Maternity', 'Maternity'), ('Emergency', 'Emergency')], max_length=20)),
+                ('year', models.PositiveIntegerField()),
+                ('entitled', models.PositiveIntegerField(default=0)),
+                ('used', models.PositiveIntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_balances', to='accounts.employeeprofile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='leavebalance',
+            constraint=models.UniqueConstraint(fields=('employee', 'year', 'leave_type'), name='unique_leave_balance'),
+        ),
+        migrations.RunPython(seed_policies_and_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:05
+
+from datetime import datetime, time
+
+from django.db import migrations, models
+
+LATE_AFTER = time(9, 30)
+
+
+def backfill_durations(apps, schema_editor):
+    Attendance = apps.get_model('employees', 'Attendance')
+    batch = []
+    for row in Attendance.objects.exclude(check_in=None).only('date', 'check_in', 'check_out').iterator():
+        if row.check_out:
+            worked = datetime.combine(row.date, row.check_out) - datetime.combine(row.date, row.check_in)
+            row.worked_seconds = max(int(worked.total_seconds()), 0)
+        if row.check_in > LATE_AFTER:
+            late = datetime.combine(row.date, row.check_in) - datetime.combine(row.date, LATE_AFTER)
+            row.late_minutes = int(late.total_seconds() // 60)
+        batch.append(row)
+        if len(batch) >= 1000:
+            Attendance.objects.bulk_update(batch, ['worked_seconds', 'late_minutes'])
+            batch = []
+    Attendance.objects.bulk_update(batch, ['worked_seconds', 'late_minutes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_leave_balances'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='late_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='worked_seconds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_durations, migrations.RunPython.noop),
+    ]
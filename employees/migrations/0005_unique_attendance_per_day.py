@@ -0,0 +1,60 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:06
+
+from datetime import datetime, time
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+LATE_AFTER = time(9, 30)
+
+
+def merge_duplicate_days(apps, schema_editor):
+    """
+    Fold duplicate (employee, date) rows into the oldest one, keeping the
+    earliest check-in and latest check-out, so the unique constraint can be added.
+    """
+    Attendance = apps.get_model('employees', 'Attendance')
+    duplicates = (
+        Attendance.objects.values('employee_id', 'date')
+        .annotate(rows=Count('id'), keep=Min('id'), first_in=Min('check_in'), last_out=Max('check_out'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    merged = False
+    for group in duplicates:
+        kept = Attendance.objects.get(pk=group['keep'])
+        kept.check_in, kept.check_out = group['first_in'], group['last_out']
+        kept.worked_seconds = kept.late_minutes = 0
+        if kept.check_in:
+            kept.status = 'Present' if kept.check_in <= LATE_AFTER else 'Late'
+            if kept.check_out:
+                worked = datetime.combine(kept.date, kept.check_out) - datetime.combine(kept.date, kept.check_in)
+                kept.worked_seconds = max(int(worked.total_seconds()), 0)
+            if kept.check_in > LATE_AFTER:
+                late = datetime.combine(kept.date, kept.check_in) - datetime.combine(kept.date, LATE_AFTER)
+                kept.late_minutes = int(late.total_seconds() // 60)
+        kept.save()
+        Attendance.objects.filter(employee_id=group['employee_id'], date=group['date']).exclude(pk=kept.pk).delete()
+        merged = True
+
+    if merged:
+        # Rollups were built from the duplicate rows; recompute them
+        apps.get_model('employees', 'AttendanceMonthlySummary').objects.all().delete()
+        apps.get_model('employees', 'AttendanceDailySummary').objects.all().delete()
+        import_module('employees.migrations.0002_attendance_rollups').populate_rollups(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_attendance_durations'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_days, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('employee', 'date'), name='unique_attendance_per_day'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:32
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Round
+
+
+def populate_ratings(apps, schema_editor):
+    Performance = apps.get_model('employees', 'Performance')
+    PerformanceSkill = apps.get_model('employees', 'PerformanceSkill')
+    average = (
+        PerformanceSkill.objects.filter(performance=models.OuterRef('pk'))
+        .values('performance').annotate(average=models.Avg('value')).values('average')
+    )
+    Performance.objects.update(
+        rating=Coalesce(Round(models.Subquery(average, output_field=models.FloatField()) / 20, 1), 0.0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_archived_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='performance',
+            name='rating',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='performance',
+            index=models.Index(fields=['-rating'], name='performance_rating_idx'),
+        ),
+        migrations.RunPython(populate_ratings, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from django.db import models
+from django.db.models.functions import Coalesce, Round
 from django.utils import timezone
-from accounts.models import EmployeeProfile
-from datetime import datetime
+from accounts.models import EmployeeProfile, GENDER_CHOICES
+from datetime import datetime, time
 
 # ===============================
 # Attendance Model
@@ -12,21 +13,57 @@ class Attendance(models.Model):
         ('Absent', 'Absent'),
         ('Late', 'Late'),
     ]
+    # Check-ins after this time are marked Late
+    LATE_AFTER = time(9, 30)
 
     employee = models.ForeignKey(EmployeeProfile, on_delete=models.CASCADE)
     date = models.DateField(default=timezone.localdate)
     check_in = models.TimeField(null=True, blank=True)
     check_out = models.TimeField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Absent')
+    worked_seconds = models.PositiveIntegerField(default=0, editable=False)
+    late_minutes = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["employee", "date"], name="unique_attendance_per_day"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "status"], name="attendance_date_status_idx"),
+        ]
+
+    @classmethod
+    def status_for(cls, check_in):
+        return "Present" if check_in <= cls.LATE_AFTER else "Late"
+
+    @classmethod
+    def durations(cls, day, check_in, check_out):
+        """Return (worked_seconds, late_minutes) for a day's check-in/check-out times."""
+        worked_seconds = late_minutes = 0
+        if check_in and check_out:
+            worked = datetime.combine(day, check_out) - datetime.combine(day, check_in)
+            worked_seconds = max(int(worked.total_seconds()), 0)
+        if check_in and check_in > cls.LATE_AFTER:
+            late = datetime.combine(day, check_in) - datetime.combine(day, cls.LATE_AFTER)
+            late_minutes = int(late.total_seconds() // 60)
+        return worked_seconds, late_minutes
+
+    def save(self, *args, **kwargs):
+        # Values posted from forms may still be strings at this point
+        self.date = self._meta.get_field("date").to_python(self.date)
+        self.check_in = self._meta.get_field("check_in").to_python(self.check_in)
+        self.check_out = self._meta.get_field("check_out").to_python(self.check_out)
+        self.worked_seconds, self.late_minutes = self.durations(self.date, self.check_in, self.check_out)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "worked_seconds", "late_minutes"}
+        super().save(*args, **kwargs)
 
     def working_hours(self):
         """Return working hours as 'Xh Ym' or '-' if not checked in/out."""
         if self.check_in and self.check_out:
-            check_in_dt = datetime.combine(self.date, self.check_in)
-            check_out_dt = datetime.combine(self.date, self.check_out)
-            diff = check_out_dt - check_in_dt
-            hours = int(diff.total_seconds() // 3600)
-            minutes = int((diff.total_seconds() % 3600) // 60)
+            hours = self.worked_seconds // 3600
+            minutes = (self.worked_seconds % 3600) // 60
             return f"{hours}h {minutes}m"
         return "-"
 
@@ -55,10 +92,64 @@ class LeaveRequest(models.Model):
     status = models.CharField(max_length=20, default="Pending")
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["employee", "status", "leave_type"], name="leave_emp_status_type_idx"),
+            models.Index(fields=["employee", "-created_at"], name="leave_emp_created_idx"),
+            models.Index(fields=["status", "-created_at"], name="leave_status_created_idx"),
+        ]
+
     def total_days(self):
         return self.number_of_days
 
 
+# ===============================
+# Leave Policy & Balance Ledger
+# ===============================
+class LeavePolicy(models.Model):
+    """
+    Yearly entitlement per leave type. Leave types restricted to one gender
+    (e.g. Maternity) are only offered to matching employees.
+    """
+    leave_type = models.CharField(max_length=20, choices=LeaveRequest.LEAVE_CHOICES, unique=True)
+    days_per_year = models.PositiveIntegerField()
+    gender = models.CharField(max_length=10, choices=GENDER_CHOICES, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Leave policies"
+
+    def applies_to(self, employee):
+        return not self.gender or (employee.gender or "").lower() == self.gender.lower()
+
+    def __str__(self):
+        return f"{self.leave_type}: {self.days_per_year} days"
+
+
+class LeaveBalance(models.Model):
+    """
+    Materialized leave usage per employee, leave type and year. Recounted
+    whenever an approved request is saved, changed or deleted; rebuild with
+    `manage.py rebuild_leave_balances`.
+    """
+    employee = models.ForeignKey(EmployeeProfile, on_delete=models.CASCADE, related_name="leave_balances")
+    leave_type = models.CharField(max_length=20, choices=LeaveRequest.LEAVE_CHOICES)
+    year = models.PositiveIntegerField()
+    entitled = models.PositiveIntegerField(default=0)
+    used = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["employee", "year", "leave_type"], name="unique_leave_balance"),
+        ]
+
+    @property
+    def remaining(self):
+        return self.entitled - self.used
+
+    def __str__(self):
+        return f"{self.employee.employee_id} - {self.leave_type} {self.year}: {self.remaining}"
+
+
 # ===============================
 # Payroll Model
 # ===============================
@@ -72,6 +163,9 @@ class Payroll(models.Model):
 
     class Meta:
         ordering = ['-month']
+        indexes = [
+            models.Index(fields=["employee", "-month"], name="payroll_emp_month_idx"),
+        ]
 
     def __str__(self):
         return f"{self.employee.employee_id} - {self.month.strftime('%B %Y')}"
@@ -100,19 +194,40 @@ class Performance(models.Model):
     projects_completed = models.IntegerField(default=0)
     achievements = models.IntegerField(default=0)
     manager_comment = models.TextField(blank=True, null=True)
+    # Average skill value (0-100) scaled to 5; kept current by the PerformanceSkill signals
+    rating = models.FloatField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-rating"], name="performance_rating_idx"),
+        ]
+
+    @staticmethod
+    def rating_expression():
+        """SQL for the rating of the Performance row in the outer query."""
+        average = (
+            PerformanceSkill.objects.filter(performance=models.OuterRef("pk"))
+            .values("performance").annotate(average=models.Avg("value")).values("average")
+        )
+        return Coalesce(Round(models.Subquery(average, output_field=models.FloatField()) / 20, 1), 0.0)
+
+    @classmethod
+    def latest(cls):
+        """Each employee's most recent record, the one the pages and leaderboards show."""
+        newer = cls.objects.filter(employee=models.OuterRef("employee"), pk__gt=models.OuterRef("pk"))
+        return cls.objects.filter(~models.Exists(newer))
+
+    @classmethod
+    def refresh_ratings(cls, **filters):
+        """Recompute the stored rating of the matching records in one UPDATE."""
+        cls.objects.filter(**filters).update(rating=cls.rating_expression())
 
     def overall_rating(self):
         """
-        Calculate overall rating scaled to 5.
+        Overall rating scaled to 5.
         """
-        skills = self.skills.all()
-        if not skills:
-            return 0
-        # 0-100 scale skills average
-        avg_percent = sum([s.value for s in skills]) / len(skills)
-        # scale to 5
-        rating = round((avg_percent / 100) * 5, 1)
-        return rating
+        return self.rating
+
     def __str__(self):
         return f"{self.employee.employee_id} Performance"
 
@@ -170,16 +285,15 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)   # <--- Add this
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["assigned_to", "status", "due_date"], name="project_assignee_status_idx"),
+            models.Index(fields=["-progress"], name="project_progress_idx"),
+        ]
+
     def assigned_by_initials(self):
         return "".join([n[0] for n in self.assigned_by.split()][:2])
 
-    @classmethod
-    def aggregate_success_rate(cls):
-        projects = cls.objects.all()
-        if not projects.exists():
-            return 0
-        return round(sum([p.progress for p in projects])/projects.count())
-
 
 # ===============================
 # Document Model
@@ -274,6 +388,109 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=["employee", "is_read", "-timestamp"], name="notification_emp_read_ts_idx"),
+            models.Index(fields=["employee", "-timestamp"], name="notification_emp_ts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} for {self.employee.full_name}"
+
+
+class NotificationBroadcast(models.Model):
+    """
+    A queued notification fan-out. Delivery walks the recipients in primary
+    key order and records its position with every chunk it writes, so a job
+    cut short by a restart resumes where it stopped. `manage.py send_broadcasts`
+    drains the queue.
+    """
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    link = models.URLField(blank=True, null=True)
+    # Recipient filters as lists of pks; None means no filter
+    departments = models.JSONField(null=True, blank=True)
+    employees = models.JSONField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    sent = models.PositiveIntegerField(default=0)
+    chunks = models.PositiveIntegerField(default=0)
+    last_employee_pk = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="broadcast_status_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.status})"
+
+
+class ArchivedNotification(models.Model):
+    """
+    Notifications past their retention period, moved out of the hot
+    Notification table (same primary key) by `manage.py archive_notifications`.
+    """
+    employee = models.ForeignKey(EmployeeProfile, on_delete=models.CASCADE, related_name="+")
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    link = models.URLField(blank=True, null=True)
+    timestamp = models.DateTimeField()
+    is_read = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+# ===============================
+# Attendance Rollups
+# ===============================
+
+class AttendanceMonthlySummary(models.Model):
+    """
+    Per-employee attendance totals for one calendar month.
+    Maintained incrementally by employees.rollups; rebuild with
+    `manage.py rebuild_attendance_rollups`.
+    """
+    employee = models.ForeignKey(EmployeeProfile, on_delete=models.CASCADE, related_name="attendance_months")
+    month = models.DateField()  # first day of the month
+    present = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    worked_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["employee", "month"], name="unique_attendance_month_per_employee"),
+        ]
+
+    @property
+    def total(self):
+        return self.present + self.late + self.absent
+
+    def __str__(self):
+        return f"{self.employee.employee_id} - {self.month.strftime('%B %Y')}"
+
+
+class AttendanceDailySummary(models.Model):
+    """
+    Organisation-wide attendance totals for one day.
+    """
+    date = models.DateField(unique=True)
+    present = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    worked_seconds = models.BigIntegerField(default=0)
+
+    @property
+    def total(self):
+        return self.present + self.late + self.absent
+
+    def __str__(self):
+        return f"Attendance {self.date}"
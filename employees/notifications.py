@@ -0,0 +1,229 @@
+"""
+Per-employee notification state for the portal top bar.
+
+The unread count is an integer kept in the cache and moved with incr/decr as
+notifications are created, read or deleted; the latest notifications are cached
+alongside it. Once warm, a page render costs one get_many and no queries.
+"""
+import asyncio
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import dateformat, timezone
+
+from .models import ArchivedNotification, Notification
+
+TOPBAR_SIZE = 20
+NOTIFICATION_CACHE_TIMEOUT = getattr(settings, "NOTIFICATION_CACHE_TIMEOUT", 3600)
+RETAIN_READ_DAYS = getattr(settings, "NOTIFICATION_RETAIN_READ_DAYS", 90)
+RETAIN_UNREAD_DAYS = getattr(settings, "NOTIFICATION_RETAIN_UNREAD_DAYS", 365)
+ARCHIVE_FIELDS = ("id", "employee_id", "title", "message", "link", "timestamp", "is_read")
+
+
+# ===============================
+# Cache Keys
+# ===============================
+def _unread_key(employee_pk):
+    return f"notifications-unread:{employee_pk}"
+
+
+def _latest_key(employee_pk):
+    return f"notifications-latest:{employee_pk}"
+
+
+# ===============================
+# Reads
+# ===============================
+def _count_unread(employee_pk):
+    unread = Notification.objects.filter(employee_id=employee_pk, is_read=False).count()
+    # add(), not set(): never overwrite a counter another request just moved
+    if not cache.add(_unread_key(employee_pk), unread, NOTIFICATION_CACHE_TIMEOUT):
+        unread = cache.get(_unread_key(employee_pk), unread)
+    return unread
+
+
+def unread_count(employee_pk):
+    unread = cache.get(_unread_key(employee_pk))
+    return max(_count_unread(employee_pk) if unread is None else unread, 0)
+
+
+def topbar(employee_pk):
+    """Return (unread count, latest notifications) for an employee."""
+    unread_key, latest_key = _unread_key(employee_pk), _latest_key(employee_pk)
+    cached = cache.get_many([unread_key, latest_key])
+
+    unread = cached.get(unread_key)
+    if unread is None:
+        unread = _count_unread(employee_pk)
+
+    latest = cached.get(latest_key)
+    if latest is None:
+        latest = list(Notification.objects.filter(employee_id=employee_pk).order_by("-timestamp")[:TOPBAR_SIZE])
+        cache.set(latest_key, latest, NOTIFICATION_CACHE_TIMEOUT)
+
+    return max(unread, 0), latest
+
+
+class NotificationBar:
+    """
+    Lazy top-bar context. Nothing is read until a template touches
+    `unread_count` or `items`, and then both come from one topbar() call.
+    """
+
+    def __init__(self, employee):
+        self._employee = employee
+        self._loaded = None
+
+    def _load(self):
+        if self._loaded is None:
+            self._loaded = topbar(self._employee.pk) if self._employee else (0, [])
+        return self._loaded
+
+    @property
+    def unread_count(self):
+        return self._load()[0]
+
+    @property
+    def items(self):
+        return self._load()[1]
+
+
+# ===============================
+# Writes
+# ===============================
+def _move_unread(employee_pk, delta):
+    if not delta:
+        return
+    try:
+        cache.incr(_unread_key(employee_pk), delta)
+    except ValueError:
+        pass  # not cached; the next read counts from the table
+
+
+def notification_changed(employee_pk, unread_delta=0):
+    """Adjust the cached unread counter and drop the cached latest list."""
+    _move_unread(employee_pk, unread_delta)
+    cache.delete(_latest_key(employee_pk))
+
+
+def bulk_created(created):
+    """
+    Refresh cached state for notifications written with bulk_create, which
+    skips the signals, and push them. One counting query per call.
+    """
+    employee_pks = {notification.employee_id for notification in created}
+    unread = dict(
+        Notification.objects.filter(employee_id__in=employee_pks, is_read=False)
+        .values("employee_id").annotate(unread=Count("id")).values_list("employee_id", "unread")
+        .order_by()
+    )
+    cache.set_many({_unread_key(pk): unread.get(pk, 0) for pk in employee_pks}, NOTIFICATION_CACHE_TIMEOUT)
+    cache.delete_many([_latest_key(pk) for pk in employee_pks])
+    push_many([(notification, unread.get(notification.employee_id, 0)) for notification in created])
+
+
+# ===============================
+# Live Push
+# ===============================
+def group_name(employee_pk):
+    """Channel layer group joined by every open top bar of an employee."""
+    return f"notifications.{employee_pk}"
+
+
+def serialize(notification):
+    return {
+        "id": notification.pk,
+        "title": notification.title,
+        "message": notification.message,
+        "link": notification.link or "",
+        "is_read": notification.is_read,
+        "timestamp": dateformat.format(timezone.localtime(notification.timestamp), "M d, H:i"),
+    }
+
+
+def _event(unread, notification=None):
+    payload = {"type": "notification" if notification else "unread", "unread_count": unread}
+    if notification:
+        payload["notification"] = serialize(notification)
+    return {"type": "notification.push", "payload": payload}
+
+
+def push(employee_pk, notification=None):
+    """
+    Send the current unread count, and `notification` if given, to the
+    employee's websockets once the surrounding transaction commits.
+    """
+    layer = get_channel_layer()
+    if layer is None:
+        return
+
+    def send():
+        event = _event(unread_count(employee_pk), notification)
+        async_to_sync(layer.group_send)(group_name(employee_pk), event)
+
+    transaction.on_commit(send)
+
+
+def push_many(notifications_with_unread):
+    """Push (notification, unread count) pairs in one trip to the channel layer."""
+    layer = get_channel_layer()
+    if layer is None or not notifications_with_unread:
+        return
+
+    async def send_all():
+        await asyncio.gather(*(
+            layer.group_send(group_name(notification.employee_id), _event(unread, notification))
+            for notification, unread in notifications_with_unread
+        ))
+
+    transaction.on_commit(async_to_sync(send_all))
+
+
+# ===============================
+# Retention
+# ===============================
+def expired(now=None):
+    """Filter for notifications past retention: read ones sooner than unread ones."""
+    now = now or timezone.now()
+    return (
+        Q(is_read=True, timestamp__lt=now - timedelta(days=RETAIN_READ_DAYS))
+        | Q(is_read=False, timestamp__lt=now - timedelta(days=RETAIN_UNREAD_DAYS))
+    )
+
+
+def archive_expired(batch_size=500, pause=0.0, purge=False, now=None):
+    """
+    Move expired notifications into ArchivedNotification (or just delete them
+    with `purge`) and yield the size of each batch. Batches walk the primary
+    key, each locked, copied and deleted in its own short transaction,
+    optionally pausing in between so the write lock is released for the
+    request path.
+    """
+    condition, last_pk = expired(now), 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Notification.objects.select_for_update().filter(condition, pk__gt=last_pk)
+                .order_by("pk").values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return
+            last_pk = rows[-1]["id"]
+
+            if not purge:
+                ArchivedNotification.objects.bulk_create(
+                    [ArchivedNotification(**row) for row in rows], ignore_conflicts=True,
+                )
+            # Re-checked, so a row that stopped matching is kept; the delete
+            # signals move the cached counters of each affected employee
+            Notification.objects.filter(condition, pk__in=[row["id"] for row in rows]).delete()
+        yield len(rows)
+
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,91 @@
+"""
+Organisation-wide project portfolio figures for the admin project list.
+
+Counts by dynamic status, stored status and priority, overdue totals and
+average progress come from one aggregate query, the per-department
+breakdown from one GROUP BY. The result is cached for the day and dropped
+whenever a project is saved or deleted, an employee moves to another
+department, or a department is renamed or removed.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .models import PRIORITY_CHOICES, STATUS_CHOICES, Project
+from .utils import DYNAMIC_STATUSES, status_key, status_q
+
+PORTFOLIO_CACHE_TIMEOUT = getattr(settings, "PROJECT_PORTFOLIO_CACHE_TIMEOUT", 3600)
+
+
+def _key(day):
+    # The day is part of the key: projects turn overdue at midnight without a save
+    return f"project-portfolio:{day.isoformat()}"
+
+
+# ===============================
+# Queries
+# ===============================
+def _aggregates(today):
+    aggregates = {
+        "total": Count("id"),
+        "average_progress": Avg("progress"),
+    }
+    for label in DYNAMIC_STATUSES:
+        aggregates[status_key(label)] = Count("id", filter=status_q(label, today))
+    for value, _ in STATUS_CHOICES:
+        aggregates[f"status_{status_key(value)}"] = Count("id", filter=Q(status=value))
+    for value, _ in PRIORITY_CHOICES:
+        aggregates[f"priority_{status_key(value)}"] = Count("id", filter=Q(priority=value))
+    return aggregates
+
+
+def build(today=None):
+    today = today or timezone.localdate()
+    totals = Project.objects.aggregate(**_aggregates(today))
+
+    departments = (
+        Project.objects.values("assigned_to__department_id", "assigned_to__department__name")
+        .annotate(
+            total=Count("id"),
+            completed=Count("id", filter=status_q("Completed", today)),
+            overdue=Count("id", filter=status_q("Overdue", today)),
+            average_progress=Avg("progress"),
+        )
+        .order_by("assigned_to__department__name")
+    )
+
+    return {
+        "total": totals["total"],
+        "success_rate": round(totals["average_progress"] or 0),
+        "dynamic_status": {label: totals[status_key(label)] for label in DYNAMIC_STATUSES},
+        "status": {value: totals[f"status_{status_key(value)}"] for value, _ in STATUS_CHOICES},
+        "priority": {value: totals[f"priority_{status_key(value)}"] for value, _ in PRIORITY_CHOICES},
+        "departments": [
+            {
+                "department": row["assigned_to__department__name"] or "Unassigned",
+                "total": row["total"],
+                "completed": row["completed"],
+                "overdue": row["overdue"],
+                "average_progress": round(row["average_progress"] or 0),
+            }
+            for row in departments
+        ],
+    }
+
+
+# ===============================
+# Cache
+# ===============================
+def stats():
+    """The cached portfolio figures, built on a miss."""
+    key = _key(timezone.localdate())
+    figures = cache.get(key)
+    if figures is None:
+        figures = build()
+        cache.set(key, figures, PORTFOLIO_CACHE_TIMEOUT)
+    return figures
+
+
+def projects_changed():
+    cache.delete(_key(timezone.localdate()))
@@ -0,0 +1,40 @@
+import csv
+
+
+class BulkReport:
+    """
+    Counters and rejected lines collected during one bulk import. Subclasses
+    list their counters and name the one reported per second.
+    """
+    counters = ()
+    rate_counter = None
+
+    def __init__(self):
+        for name in self.counters:
+            setattr(self, name, 0)
+        self.rejects = []  # (line number, raw line, reason)
+        self.seconds = 0.0
+
+    @property
+    def per_second(self):
+        return round(getattr(self, self.rate_counter) / self.seconds) if self.seconds else 0
+
+    def reject(self, line_no, raw, reason):
+        self.rejects.append((line_no, raw, reason))
+
+    def write_rejects(self, stream):
+        writer = csv.writer(stream)
+        writer.writerow(["line", "raw", "reason"])
+        writer.writerows(self.rejects)
+
+    def as_dict(self):
+        return {
+            **{name: getattr(self, name) for name in self.counters},
+            "rejected": len(self.rejects),
+            "seconds": round(self.seconds, 3),
+            f"{self.rate_counter}_per_second": self.per_second,
+            "rejects": [
+                {"line": line_no, "raw": raw, "reason": reason}
+                for line_no, raw, reason in self.rejects
+            ],
+        }
@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Attendance, AttendanceMonthlySummary, AttendanceDailySummary
+from .stats import shift_month
+
+# Fields read from an Attendance row to work out its share of the rollups
+ROLLUP_FIELDS = ("employee_id", "date", "status", "worked_seconds")
+STATUS_FIELDS = {"Present": "present", "Late": "late", "Absent": "absent"}
+
+
+# ===============================
+# Row Contribution
+# ===============================
+def snapshot(attendance):
+    """Return the rollup-relevant fields of an Attendance instance as a dict."""
+    return {field: getattr(attendance, field) for field in ROLLUP_FIELDS}
+
+
+def contribution(row):
+    """
+    Return the counters a single attendance row adds to its month and day.
+    """
+    counts = {}
+    status_field = STATUS_FIELDS.get(row["status"])
+    if status_field:
+        counts[status_field] = 1
+    if row["worked_seconds"]:
+        counts["worked_seconds"] = row["worked_seconds"]
+    return counts
+
+
+def _bump(model, lookup, counts, sign):
+    if not counts:
+        return
+    model.objects.get_or_create(**lookup)
+    model.objects.filter(**lookup).update(**{field: F(field) + sign * value for field, value in counts.items()})
+
+
+def apply(row, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one attendance row from the rollups.
+    """
+    counts = contribution(row)
+    _bump(
+        AttendanceMonthlySummary,
+        {"employee_id": row["employee_id"], "month": row["date"].replace(day=1)},
+        counts, sign,
+    )
+    _bump(AttendanceDailySummary, {"date": row["date"]}, counts, sign)
+
+
+def replace(previous, current):
+    """Swap one attendance row's old contribution for its new one."""
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous:
+            apply(previous, -1)
+        if current:
+            apply(current, 1)
+
+
+def replace_many(changes):
+    """
+    Apply many (previous, current) row changes at once, e.g. after a
+    bulk_create or bulk_update that bypassed the Attendance signals. Deltas are
+    summed per month and day first, so each rollup row is updated once.
+    """
+    months, days = {}, {}
+    for previous, current in changes:
+        for row, sign in ((previous, -1), (current, 1)):
+            if not row:
+                continue
+            month_key = (row["employee_id"], row["date"].replace(day=1))
+            for totals in (months.setdefault(month_key, {}), days.setdefault(row["date"], {})):
+                for field, value in contribution(row).items():
+                    totals[field] = totals.get(field, 0) + sign * value
+
+    with transaction.atomic():
+        AttendanceMonthlySummary.objects.bulk_create(
+            [AttendanceMonthlySummary(employee_id=employee_id, month=month) for employee_id, month in months],
+            ignore_conflicts=True,
+        )
+        AttendanceDailySummary.objects.bulk_create(
+            [AttendanceDailySummary(date=day) for day in days], ignore_conflicts=True,
+        )
+        for (employee_id, month), totals in months.items():
+            _update(AttendanceMonthlySummary, {"employee_id": employee_id, "month": month}, totals)
+        for day, totals in days.items():
+            _update(AttendanceDailySummary, {"date": day}, totals)
+
+
+def _update(model, lookup, totals):
+    changed = {field: F(field) + value for field, value in totals.items() if value}
+    if changed:
+        model.objects.filter(**lookup).update(**changed)
+
+
+# ===============================
+# Full Rebuild
+# ===============================
+def rebuild(start=None, end=None, batch_size=2000):
+    """
+    Recompute the rollups from the raw Attendance table, optionally limited to
+    the whole months from `start` to `end`. Streams attendance rows, so memory stays
+    bounded by the number of rollup rows rather than attendance rows.
+    Returns (monthly rows, daily rows) written.
+    """
+    rows = Attendance.objects.order_by()
+    monthly = AttendanceMonthlySummary.objects.all()
+    daily = AttendanceDailySummary.objects.all()
+    if start:
+        start = start.replace(day=1)
+        rows = rows.filter(date__gte=start)
+        monthly = monthly.filter(month__gte=start)
+        daily = daily.filter(date__gte=start)
+    if end:
+        end = shift_month(end, 1) - timedelta(days=1)
+        rows = rows.filter(date__lte=end)
+        monthly = monthly.filter(month__lte=end)
+        daily = daily.filter(date__lte=end)
+
+    months, days = {}, {}
+    for row in rows.values(*ROLLUP_FIELDS).iterator(chunk_size=batch_size):
+        counts = contribution(row)
+        month_key = (row["employee_id"], row["date"].replace(day=1))
+        for totals in (months.setdefault(month_key, {}), days.setdefault(row["date"], {})):
+            for field, value in counts.items():
+                totals[field] = totals.get(field, 0) + value
+
+    with transaction.atomic():
+        monthly.delete()
+        daily.delete()
+        AttendanceMonthlySummary.objects.bulk_create(
+            [AttendanceMonthlySummary(employee_id=employee_id, month=month, **totals)
+             for (employee_id, month), totals in months.items()],
+            batch_size=batch_size,
+        )
+        AttendanceDailySummary.objects.bulk_create(
+            [AttendanceDailySummary(date=day, **totals) for day, totals in days.items()],
+            batch_size=batch_size,
+        )
+    return len(months), len(days)
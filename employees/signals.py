@@ -0,0 +1,243 @@
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import EmployeeProfile
+from adminpanel import departments as department_stats
+from adminpanel.models import Department
+
+from . import dashboard_cache, kiosk, leaderboards, leave_balances, notifications, portfolio, rollups
+from .models import (
+    Attendance, LeaveRequest, LeavePolicy, Payroll, Project, Performance, PerformanceSkill, Feedback,
+    Notification,
+)
+
+
+# ===============================
+# Attendance Rollups
+# ===============================
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_state(sender, instance, raw=False, **kwargs):
+    """Keep the stored version of the row so post_save can diff against it."""
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = (
+            Attendance.objects.filter(pk=instance.pk).values(*rollups.ROLLUP_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Attendance)
+def update_attendance_rollups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.replace(getattr(instance, "_rollup_previous", None), rollups.snapshot(instance))
+
+
+@receiver(post_delete, sender=Attendance)
+def remove_attendance_from_rollups(sender, instance, **kwargs):
+    rollups.replace(rollups.snapshot(instance), None)
+
+
+# ===============================
+# Leave Balances
+# ===============================
+@receiver(pre_save, sender=LeaveRequest)
+def remember_leave_state(sender, instance, raw=False, **kwargs):
+    """Keep the stored version of the request so post_save can diff against it."""
+    instance._ledger_previous = None
+    if instance.pk and not raw:
+        instance._ledger_previous = (
+            LeaveRequest.objects.filter(pk=instance.pk).values(*leave_balances.LEDGER_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=LeaveRequest)
+def update_leave_balance(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    leave_balances.replace(getattr(instance, "_ledger_previous", None), leave_balances.snapshot(instance))
+
+
+@receiver(post_delete, sender=LeaveRequest)
+def remove_leave_from_balance(sender, instance, **kwargs):
+    leave_balances.removed(instance)
+
+
+# ===============================
+# Leave Policies
+# ===============================
+@receiver(post_save, sender=LeavePolicy)
+@receiver(post_delete, sender=LeavePolicy)
+def refresh_leave_policies(sender, instance, raw=False, **kwargs):
+    if not raw:
+        leave_balances.policy_changed(instance)
+        dashboard_cache.bump_all()
+
+
+# ===============================
+# Performance Ratings
+# ===============================
+@receiver(post_save, sender=PerformanceSkill)
+@receiver(post_delete, sender=PerformanceSkill)
+def refresh_performance_rating(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Performance.refresh_ratings(pk=instance.performance_id)
+        leaderboards.performance_changed(_performance_owner(instance))
+
+
+@receiver(post_save, sender=Performance)
+@receiver(post_delete, sender=Performance)
+def refresh_leaderboards(sender, instance, raw=False, **kwargs):
+    if not raw:
+        leaderboards.performance_changed(instance.employee_id)
+
+
+# ===============================
+# Project Portfolio
+# ===============================
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def refresh_project_portfolio(sender, instance, raw=False, **kwargs):
+    if not raw:
+        portfolio.projects_changed()
+
+
+@receiver(pre_save, sender=EmployeeProfile)
+def remember_employee_department(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the stored department so post_save can tell whether the employee moved."""
+    instance._previous_department_id = instance.department_id
+    if instance.pk and not raw and (update_fields is None or {"department", "department_id"} & set(update_fields)):
+        instance._previous_department_id = (
+            EmployeeProfile.objects.filter(pk=instance.pk).values_list("department_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=EmployeeProfile)
+def refresh_portfolio_for_moved_employee(sender, instance, created=False, raw=False, **kwargs):
+    # A new employee has no projects yet; a deleted one takes its projects (and their signals) along
+    previous = getattr(instance, "_previous_department_id", instance.department_id)
+    if not raw and not created and instance.department_id != previous:
+        portfolio.projects_changed()
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def refresh_portfolio_departments(sender, instance, raw=False, **kwargs):
+    if not raw:
+        portfolio.projects_changed()
+
+
+# ===============================
+# Department Stats
+# ===============================
+def _refresh_owner_department(instance, field, origin=None):
+    """
+    Drop the figures of the department of the employee on `field`. Rows
+    deleted along with their employee are skipped, since the employee's own
+    post_delete drops that department, and a loaded employee saves a query.
+    """
+    if isinstance(origin, EmployeeProfile) or (isinstance(origin, QuerySet) and origin.model is EmployeeProfile):
+        return
+    if instance._meta.get_field(field).is_cached(instance):
+        department_stats.department_changed(getattr(instance, field).department_id)
+    else:
+        department_stats.employee_changed(getattr(instance, f"{field}_id"))
+
+
+@receiver(post_save, sender=Payroll)
+@receiver(post_delete, sender=Payroll)
+def refresh_department_payroll(sender, instance, raw=False, origin=None, **kwargs):
+    if not raw:
+        _refresh_owner_department(instance, "employee", origin)
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_department(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the old assignee's department when the project is being reassigned."""
+    instance._previous_assignee_department_id = None
+    if instance.pk and not raw and (update_fields is None or {"assigned_to", "assigned_to_id"} & set(update_fields)):
+        instance._previous_assignee_department_id = (
+            Project.objects.filter(pk=instance.pk).exclude(assigned_to_id=instance.assigned_to_id)
+            .values_list("assigned_to__department_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def refresh_department_projects(sender, instance, raw=False, origin=None, **kwargs):
+    if not raw:
+        _refresh_owner_department(instance, "assigned_to", origin)
+        department_stats.department_changed(getattr(instance, "_previous_assignee_department_id", None))
+
+
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployeeProfile)
+def refresh_department_headcount(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # A move changes the department left behind as well
+        department_stats.department_changed(instance.department_id, getattr(instance, "_previous_department_id", None))
+
+
+# ===============================
+# Kiosk Lookups
+# ===============================
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployeeProfile)
+def forget_kiosk_employee(sender, instance, raw=False, **kwargs):
+    if not raw:
+        kiosk.forget(instance.employee_id)
+
+
+# ===============================
+# Notification Counters
+# ===============================
+@receiver(pre_save, sender=Notification)
+def remember_notification_state(sender, instance, raw=False, **kwargs):
+    instance._was_unread = False
+    if instance.pk and not raw:
+        instance._was_unread = Notification.objects.filter(pk=instance.pk, is_read=False).exists()
+
+
+@receiver(post_save, sender=Notification)
+def count_saved_notification(sender, instance, raw=False, **kwargs):
+    if not raw:
+        delta = (not instance.is_read) - getattr(instance, "_was_unread", False)
+        notifications.notification_changed(instance.employee_id, delta)
+        if kwargs.get("created"):
+            notifications.push(instance.employee_id, instance)
+        elif delta:
+            notifications.push(instance.employee_id)
+
+
+@receiver(post_delete, sender=Notification)
+def count_deleted_notification(sender, instance, **kwargs):
+    notifications.notification_changed(instance.employee_id, -(not instance.is_read))
+    if not instance.is_read:
+        notifications.push(instance.employee_id)
+
+
+# ===============================
+# Dashboard Cache Invalidation
+# ===============================
+def _performance_owner(instance):
+    return Performance.objects.filter(pk=instance.performance_id).values_list("employee_id", flat=True).first()
+
+
+DASHBOARD_SOURCES = {
+    Attendance: lambda instance: instance.employee_id,
+    LeaveRequest: lambda instance: instance.employee_id,
+    Payroll: lambda instance: instance.employee_id,
+    Project: lambda instance: instance.assigned_to_id,
+    PerformanceSkill: _performance_owner,
+    Feedback: _performance_owner,
+}
+
+
+def invalidate_dashboard(sender, instance, raw=False, **kwargs):
+    if not raw:
+        dashboard_cache.bump_version(DASHBOARD_SOURCES[sender](instance))
+
+
+for model in DASHBOARD_SOURCES:
+    post_save.connect(invalidate_dashboard, sender=model, dispatch_uid=f"dashboard-{model.__name__}-save")
+    post_delete.connect(invalidate_dashboard, sender=model, dispatch_uid=f"dashboard-{model.__name__}-delete")
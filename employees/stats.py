@@ -0,0 +1,185 @@
+from datetime import timedelta
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Attendance, AttendanceMonthlySummary, AttendanceDailySummary
+
+STATUSES = ("Present", "Late", "Absent")
+
+
+# ===============================
+# Helpers
+# ===============================
+def percent(part, whole):
+    return round((part / whole) * 100, 1) if whole else 0
+
+
+def format_duration(seconds):
+    """Return a duration in seconds as 'Xh Ym'."""
+    seconds = int(seconds or 0)
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
+
+
+def shift_month(day, months):
+    """Return the first day of the month `months` away from `day`."""
+    index = day.year * 12 + day.month - 1 + months
+    return day.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+# ===============================
+# Per-Employee Attendance Stats
+# ===============================
+class AttendanceStats:
+    """
+    Monthly, this-week and last-four-weeks attendance figures for one employee.
+
+    Monthly figures are read from the AttendanceMonthlySummary rollup and the
+    weekly counters and worked seconds come out of a single conditional
+    aggregate over the last four weeks, so the cost of a page load does not
+    grow with the employee's attendance history. The trend covers whole
+    weeks (Monday to Sunday); this week's figures stop at today.
+    """
+
+    WEEKS = 4
+
+    def __init__(self, employee, today=None):
+        self.employee = employee
+        self.today = today or timezone.localdate()
+        self.month_start = self.today.replace(day=1)
+        self.month_end = shift_month(self.today, 1) - timedelta(days=1)
+        self.week_start = self.today - timedelta(days=self.today.weekday())
+        self.week_starts = [
+            self.week_start - timedelta(weeks=i) for i in range(self.WEEKS - 1, -1, -1)
+        ]
+        self._counts = None
+        self._month = None
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    @staticmethod
+    def _window(name, start, end):
+        in_window = Q(date__gte=start, date__lte=end)
+        aggregates = {f"{name}_total": Count("id", filter=in_window)}
+        for status in STATUSES:
+            aggregates[f"{name}_{status.lower()}"] = Count("id", filter=in_window & Q(status=status))
+        return aggregates
+
+    @property
+    def counts(self):
+        if self._counts is None:
+            aggregates = {
+                "week_seconds": Sum(
+                    "worked_seconds", filter=Q(date__gte=self.week_start, date__lte=self.today)
+                ),
+            }
+            for i, start in enumerate(self.week_starts):
+                aggregates.update(self._window(f"week{i}", start, start + timedelta(days=6)))
+            # The this-week card stops at today; rows already filed for later days are not counted
+            aggregates.update(self._window("this_week", self.week_start, self.today))
+
+            self._counts = Attendance.objects.filter(
+                employee=self.employee,
+                date__gte=self.week_starts[0],
+                date__lte=self.week_starts[-1] + timedelta(days=6),
+            ).aggregate(**aggregates)
+        return self._counts
+
+    @property
+    def week_seconds(self):
+        """Seconds worked from Monday of the current week up to today."""
+        return self.counts["week_seconds"] or 0
+
+    # -----------------------------
+    # Figures
+    # -----------------------------
+    def _figures(self, name):
+        counts = self.counts
+        figures = {status.lower(): counts[f"{name}_{status.lower()}"] for status in STATUSES}
+        figures["total"] = counts[f"{name}_total"]
+        figures["percent"] = percent(figures["present"], figures["total"])
+        return figures
+
+    @property
+    def month(self):
+        if self._month is None:
+            summary = AttendanceMonthlySummary.objects.filter(
+                employee=self.employee, month=self.month_start
+            ).first() or AttendanceMonthlySummary(employee=self.employee, month=self.month_start)
+            self._month = {
+                "present": summary.present,
+                "late": summary.late,
+                "absent": summary.absent,
+                "total": summary.total,
+                "percent": percent(summary.present, summary.total),
+                "worked_seconds": summary.worked_seconds,
+            }
+        return self._month
+
+    @property
+    def this_week(self):
+        """Figures from Monday of the current week up to today."""
+        return self._figures("this_week")
+
+    @property
+    def weekly_trend(self):
+        """List of (week label, present %) for the last four weeks, oldest first."""
+        return [
+            (start.strftime("%d %b"), self._figures(f"week{i}")["percent"])
+            for i, start in enumerate(self.week_starts)
+        ]
+
+    @property
+    def week_hours(self):
+        return self.week_seconds / 3600
+
+
+# ===============================
+# Organisation-Wide Trend
+# ===============================
+def daily_attendance_total(day=None):
+    """Number of attendance rows recorded for `day` (default today)."""
+    summary = AttendanceDailySummary.objects.filter(date=day or timezone.localdate()).first()
+    return summary.total if summary else 0
+
+
+def monthly_attendance_trend(months=6, today=None):
+    """
+    Attendance rows per calendar month for the last `months` months, oldest
+    first, as a list of (label, count) pairs. Reads the daily rollup with a
+    single GROUP BY query.
+    """
+    today = today or timezone.localdate()
+    first_month = shift_month(today, -(months - 1))
+
+    rows = (
+        AttendanceDailySummary.objects.filter(date__gte=first_month)
+        .annotate(month=TruncMonth("date"))
+        .values("month")
+        .annotate(count=Sum(F("present") + F("late") + F("absent")))
+        .order_by()
+    )
+    by_month = {row["month"]: row["count"] for row in rows}
+
+    trend = []
+    for i in range(months):
+        month = shift_month(first_month, i)
+        trend.append((month.strftime("%b %Y"), by_month.get(month, 0)))
+    return trend
+
+
+def overtime_report(start, end, standard_seconds_per_day=8 * 3600):
+    """
+    Employees whose worked time between `start` and `end` exceeds the standard
+    day for the days they attended, most overtime first. A single GROUP BY query.
+    """
+    return (
+        Attendance.objects.filter(date__gte=start, date__lte=end, worked_seconds__gt=0)
+        .values("employee_id", "employee__employee_id", "employee__full_name")
+        .annotate(days=Count("id"), total_seconds=Sum("worked_seconds"))
+        .annotate(overtime_seconds=F("total_seconds") - F("days") * standard_seconds_per_day)
+        .filter(overtime_seconds__gt=0)
+        .order_by("-overtime_seconds")
+    )
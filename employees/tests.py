@@ -1,3 +1,1026 @@
-from django.test import TestCase
+import re
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import Model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+try:
+    from channels.testing import WebsocketCommunicator
+except ImportError:  # channels.testing needs daphne
+    WebsocketCommunicator = None
+
+from accounts.models import EmployeeProfile
+from adminpanel.models import Department
+from . import dashboard_cache, fanout, ingest, kiosk, leaderboards, notifications, portfolio, rollups, stats
+from .models import (
+    ArchivedNotification, Attendance, AttendanceDailySummary, AttendanceMonthlySummary, Feedback, LeaveBalance,
+    LeavePolicy, LeaveRequest, Notification, NotificationBroadcast, Payroll, Performance, PerformanceSkill, Project,
+    Skill,
+)
+from .utils import DYNAMIC_STATUSES, STATUS_BADGES, project_summary, with_dynamic_status
+
+# SQLite reports a full table scan as "SCAN <table>" (older versions: "SCAN TABLE <table>")
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+# Lookup tables that are always read whole
+REFERENCE_TABLES = {"adminpanel_department", "employees_leavepolicy", "employees_skill"}
+
+
+# ===============================
+# Query Plans
+# ===============================
+@skipUnless(connection.vendor == "sqlite", "parses SQLite EXPLAIN QUERY PLAN output")
+class QueryPlanTests(TestCase):
+    """
+    Render each view against a seeded dataset and run EXPLAIN QUERY PLAN on
+    every SELECT it issued, failing on any full table scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        today = date(2026, 10, 16)
+        department = Department.objects.create(name="Engineering")
+        cls.employees = [
+            EmployeeProfile.objects.create(full_name=f"Employee {i}", phone="0123456789", department=department)
+            for i in range(20)
+        ]
+        for employee in cls.employees:
+            Attendance.objects.bulk_create([
+                Attendance(employee=employee, date=today - timedelta(days=d), check_in=time(9), check_out=time(17), status="Present")
+                for d in range(90)
+            ])
+            LeaveRequest.objects.create(
+                employee=employee, leave_type="Sick", number_of_days=1, reason="-",
+                start_date=today, end_date=today, status="Approved",
+            )
+            Payroll.objects.create(employee=employee, month=today.replace(day=1), gross_salary=1000, deductions=100, net_pay=900)
+            Project.objects.create(
+                title="Project", description="-", assigned_to=employee, assigned_by="Team Lead",
+                due_date=today, status="In Progress",
+            )
+            Feedback.objects.create(performance=Performance.objects.create(employee=employee), author="Lead", text="-")
+            Notification.objects.create(employee=employee, title="Welcome", message="-")
+        rollups.rebuild()
+
+        cls.department = department
+        cls.employee = cls.employees[0]
+        cls.admin = User.objects.create_user("admin", password="admin", is_staff=True)
+
+    def full_scans(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        # Derived tables (e.g. the "qualify" wrapper around window filters) are not scans of stored rows
+        tables = set(connection.introspection.table_names()) - REFERENCE_TABLES
+        scans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                for row in cursor.fetchall():
+                    match = FULL_SCAN.match(row[-1])
+                    if match and match.group(1) in tables:
+                        scans.append((match.group(1), query["sql"]))
+        return scans
+
+    def assertNoFullScans(self, client, url, allowed=()):
+        scans = [(table, sql) for table, sql in self.full_scans(client, url) if table not in allowed]
+        self.assertFalse(scans, f"{url} scans whole tables: {scans}")
+
+    def test_employee_views(self):
+        session = self.client.session
+        session["employee_id"] = self.employee.employee_id
+        session.save()
+        project = Project.objects.filter(assigned_to=self.employee).first()
+
+        for name, args in [
+            ("dashboard", ()), ("attendance", ()), ("leave", ()), ("payroll", ()),
+            ("performance", ()), ("projects", ()), ("project_detail", (project.pk,)), ("profile", ()),
+        ]:
+            with self.subTest(view=name):
+                self.assertNoFullScans(self.client, reverse(f"employees:{name}", args=args))
+
+    def test_admin_views(self):
+        self.client.force_login(self.admin)
+        cache.clear()  # build the dashboard analytics snapshot inline
+        project = Project.objects.filter(assigned_to=self.employee).first()
+
+        for url, allowed in [
+            (reverse("admin_dashboard"), ()),
+            # The employee filter dropdown lists every employee
+            (reverse("admin_attendance_list") + "?date=2026-10-10", {"accounts_employeeprofile"}),
+            # The performance list shows every employee
+            (reverse("admin_performance_list"), {"accounts_employeeprofile"}),
+            (reverse("admin_department_list"), ()),
+            (reverse("admin_department_detail", args=[self.department.pk]), ()),
+            (reverse("admin_performance_detail", args=[self.employee.pk]), ()),
+            (reverse("admin_project_detail", args=[project.pk]), ()),
+        ]:
+            with self.subTest(url=url):
+                self.assertNoFullScans(self.client, url, allowed)
+
+
+# ===============================
+# Attendance Rollups
+# ===============================
+def rollup_state():
+    """Monthly and daily rollup rows, leaving out emptied ones a rebuild would not create."""
+    counters = ("present", "late", "absent", "worked_seconds")
+    return tuple(
+        [row for row in queryset.values(*fields, *counters) if any(row[field] for field in counters)]
+        for queryset, fields in (
+            (AttendanceMonthlySummary.objects.order_by("employee_id", "month"), ("employee_id", "month")),
+            (AttendanceDailySummary.objects.order_by("date"), ("date",)),
+        )
+    )
+
+
+class RollupTests(TestCase):
+    """Rollups maintained by the Attendance signals equal a rebuild from scratch."""
+
+    def assertMatchesRebuild(self):
+        incremental = rollup_state()
+        rollups.rebuild()
+        self.assertEqual(incremental, rollup_state())
+
+    def test_create_edit_move_delete(self):
+        employee = EmployeeProfile.objects.create(full_name="Rolled Up", phone="0123456789")
+        row = Attendance.objects.create(employee=employee, date=date(2026, 1, 30), status="Absent")
+        Attendance.objects.create(
+            employee=employee, date=date(2026, 1, 31), check_in=time(9), check_out=time(17), status="Present"
+        )
+        self.assertEqual(
+            AttendanceMonthlySummary.objects.values_list("present", "absent", "worked_seconds")
+            .get(employee=employee, month=date(2026, 1, 1)),
+            (1, 1, 8 * 3600),
+        )
+
+        row.check_in, row.check_out, row.status = time(10), time(12), "Late"
+        row.save()
+        self.assertMatchesRebuild()
+
+        row.date = date(2026, 2, 2)
+        row.save()
+        self.assertMatchesRebuild()
+
+        row.delete()
+        self.assertEqual(
+            AttendanceDailySummary.objects.values_list("present", "late", "absent").get(date=date(2026, 2, 2)),
+            (0, 0, 0),
+        )
+        self.assertMatchesRebuild()
+
+
+# ===============================
+# Punch Ingestion
+# ===============================
+class IngestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.first = EmployeeProfile.objects.create(full_name="First", phone="0123456789")
+        self.second = EmployeeProfile.objects.create(full_name="Second", phone="0123456789")
+        Attendance.objects.create(employee=self.first, date=date(2026, 1, 5), check_in=time(10), status="Late")
+        Attendance.objects.create(employee=self.second, date=date(2026, 3, 2), status="Absent")
+
+    def test_rollup_deltas_match_a_rebuild(self):
+        punches = "\n".join([
+            "employee_id,date,time",
+            f"{self.first.employee_id},2026-01-05,08:55",
+            f"{self.first.employee_id},2026-01-05,17:30",
+            f"{self.second.employee_id},2026-06-10,09:45",
+            f"{self.second.employee_id},2026-06-10,18:00",
+        ])
+        report = ingest.ingest(StringIO(punches))
+        self.assertEqual((report.rows_written, report.rejects), (2, []))
+
+        incremental = rollup_state()
+        rollups.rebuild()
+        self.assertEqual(incremental, rollup_state())
+        self.assertEqual(
+            AttendanceDailySummary.objects.values_list("present", "late", "absent").get(date=date(2026, 1, 5)),
+            (1, 0, 0),
+        )
+
+    def test_malformed_rows_are_rejected(self):
+        punches = "\n".join([
+            "employee_id,date,time",
+            f"{self.first.employee_id},2026-01-06,09:00,extra",
+            f"{self.first.employee_id},2026-01-06",
+            "UNKNOWN,2026-01-06,09:00",
+            f"{self.first.employee_id},2026-01-06,09:10",
+        ])
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+        upload = SimpleUploadedFile("punches.csv", punches.encode())
+        response = self.client.post(
+            reverse("admin_attendance_import"), {"file": upload}, HTTP_ACCEPT="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report["punches"], report["rows_written"], report["rejected"]), (4, 1, 3))
+        self.assertEqual([reject["line"] for reject in report["rejects"]], [2, 3, 4])
+        self.assertEqual(report["rejects"][0]["raw"], f"{self.first.employee_id},2026-01-06,09:00,extra")
+
+    @override_settings(TIME_ZONE="Europe/Berlin")
+    def test_offset_timestamps_are_filed_in_local_time(self):
+        punches = "\n".join([
+            "employee_id,timestamp",
+            f"{self.second.employee_id},2026-01-01T23:30:00-05:00",
+            f"{self.second.employee_id},2026-01-02T07:15:00",
+        ])
+        report = ingest.ingest(StringIO(punches))
+        self.assertEqual((report.rows_written, report.rejects), (1, []))
+
+        # 23:30 at UTC-5 is 05:30 the next day in Berlin; naive timestamps are already local
+        self.assertEqual(
+            Attendance.objects.values_list("date", "check_in", "check_out").get(employee=self.second, date=date(2026, 1, 2)),
+            (date(2026, 1, 2), time(5, 30), time(7, 15)),
+        )
+        self.assertFalse(Attendance.objects.filter(employee=self.second, date=date(2026, 1, 1)).exists())
+
+
+# ===============================
+# Kiosk Punches
+# ===============================
+@override_settings(KIOSK_API_TOKENS=["kiosk-token"])
+class KioskPunchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = EmployeeProfile.objects.create(full_name="Kiosk User", phone="0123456789")
+
+    def punch(self, action="check_in", key=None, token="kiosk-token"):
+        headers = {"HTTP_AUTHORIZATION": f"Token {token}"}
+        if key:
+            headers["HTTP_IDEMPOTENCY_KEY"] = key
+        return self.client.post(
+            reverse("employees:kiosk_punch"), {"employee_id": self.employee.employee_id, "action": action},
+            content_type="application/json", **headers,
+        )
+
+    def test_retry_replays_the_first_answer(self):
+        first = self.punch(key="morning")
+        self.assertEqual(first.json()["result"], "checked_in")
+        self.assertEqual(self.punch(key="morning").json(), first.json())
+        self.assertEqual(self.punch(key="other").json()["result"], "already_checked_in")
+        self.assertEqual(Attendance.objects.filter(employee=self.employee).count(), 1)
+
+    def test_retry_while_first_request_runs_conflicts(self):
+        kiosk.reserve(f"{self.employee.pk}:morning")
+        self.assertEqual(self.punch(key="morning").status_code, 409)
+        self.assertFalse(Attendance.objects.filter(employee=self.employee).exists())
+
+    def test_failed_punch_frees_its_key(self):
+        with mock.patch.dict(kiosk.ACTIONS, check_in=mock.Mock(side_effect=RuntimeError)):
+            with self.assertRaises(RuntimeError):
+                self.punch(key="morning")
+        self.assertEqual(self.punch(key="morning").json()["result"], "checked_in")
+
+    def test_rejects_unknown_token(self):
+        self.assertEqual(self.punch(token="kiosk-tokenX").status_code, 401)
+
+    def test_bulk_deactivation_drops_cached_employee(self):
+        self.assertEqual(self.punch().status_code, 200)
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+        self.client.post(reverse("admin_employee_list"), {"action": "deactivate", "employee_ids": [self.employee.pk]})
+        self.assertEqual(self.punch("check_out").status_code, 404)
+
+    def test_failed_rollup_rolls_back_the_fast_path(self):
+        now = timezone.localtime().replace(hour=9, minute=0, second=0)
+        Attendance.objects.create(employee=self.employee, date=now.date(), status="Absent")
+
+        with mock.patch.object(kiosk.rollups, "replace", side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            kiosk.check_in(self.employee.pk, now=now)
+        self.assertIsNone(Attendance.objects.get(employee=self.employee).check_in)
+
+        kiosk.check_in(self.employee.pk, now=now)
+        with mock.patch.object(kiosk.rollups, "replace", side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            kiosk.check_out(self.employee.pk, now=now.replace(hour=17))
+        self.assertIsNone(Attendance.objects.get(employee=self.employee).check_out)
+
+        incremental = rollup_state()
+        rollups.rebuild()
+        self.assertEqual(incremental, rollup_state())
+
+
+# ===============================
+# Nightly Finalize
+# ===============================
+class FinalizeAttendanceTests(TestCase):
+    day = date(2026, 10, 12)
+
+    def setUp(self):
+        cache.clear()
+        self.absent = EmployeeProfile.objects.create(full_name="Never Came", phone="0123456789")
+        self.racing = EmployeeProfile.objects.create(full_name="Just In Time", phone="0123456789")
+        self.edited = EmployeeProfile.objects.create(full_name="Hand Edited", phone="0123456789")
+        Attendance.objects.create(employee=self.edited, date=self.day, status="Present")
+
+    def test_check_in_racing_the_insert_is_not_counted_absent(self):
+        insert = Attendance.objects.bulk_create
+
+        def check_in_first(*args, **kwargs):
+            kiosk.check_in(self.racing.pk, now=timezone.make_aware(datetime.combine(self.day, time(9))))
+            return insert(*args, **kwargs)
+
+        with mock.patch.object(Attendance.objects, "bulk_create", side_effect=check_in_first):
+            call_command("finalize_attendance", date=self.day.isoformat(), stdout=StringIO())
+
+        self.assertEqual(
+            dict(Attendance.objects.filter(date=self.day).values_list("employee_id", "status")),
+            {self.absent.pk: "Absent", self.racing.pk: "Present", self.edited.pk: "Absent"},
+        )
+        incremental = rollup_state()
+        self.assertEqual(
+            AttendanceDailySummary.objects.values_list("present", "absent").get(date=self.day), (1, 2)
+        )
+        rollups.rebuild()
+        self.assertEqual(incremental, rollup_state())
+
+    def test_check_out_without_check_in_stays_late(self):
+        Attendance.objects.create(employee=self.absent, date=self.day, check_out=time(17), status="Late")
+
+        call_command("finalize_attendance", date=self.day.isoformat(), stdout=StringIO())
+
+        self.assertEqual(
+            dict(Attendance.objects.filter(date=self.day).values_list("employee_id", "status")),
+            {self.absent.pk: "Late", self.racing.pk: "Absent", self.edited.pk: "Absent"},
+        )
+
+
+# ===============================
+# Employee Dashboard Cache
+# ===============================
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.employee = EmployeeProfile.objects.create(full_name="Dashboard Employee", phone="0123456789")
+        Project.objects.create(
+            title="Roadmap", description="-", assigned_to=self.employee, assigned_by="HR",
+            progress=40, due_date=timezone.localdate(),
+        )
+        session = self.client.session
+        session["employee_id"] = self.employee.employee_id
+        session.save()
+        self.url = reverse("employees:dashboard")
+
+    def version(self):
+        return dashboard_cache.get_version(self.employee.pk), dashboard_cache.get_version(dashboard_cache.ALL_EMPLOYEES)
+
+    def test_warm_dashboard_costs_session_and_profile_queries(self):
+        self.client.get(self.url)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.context["projects"], [{"title": "Roadmap", "progress": 40}])
+
+    def test_payload_holds_plain_values(self):
+        Attendance.objects.create(employee=self.employee, date=timezone.localdate(), check_in=time(9), status="Present")
+        self.client.get(self.url)
+
+        payload = dashboard_cache.get_or_build(self.employee, timezone.localdate(), build=None)
+        self.assertEqual(payload["today_record"], {"status": "Present", "check_in": time(9), "check_out": None})
+        self.assertEqual(payload["projects"], [{"title": "Roadmap", "progress": 40}])
+        values = [*payload.values(), *payload["recent_activity"]]
+        self.assertFalse([value for value in values if isinstance(value, Model)])
+
+    def test_attendance_and_leave_writes_bump_the_version(self):
+        before = self.version()
+        Attendance.objects.create(employee=self.employee, date=timezone.localdate(), check_in=time(9), status="Present")
+        self.assertNotEqual(self.version(), before)
+
+        before = self.version()
+        LeaveRequest.objects.create(
+            employee=self.employee, leave_type="Sick", number_of_days=1, reason="-",
+            start_date=timezone.localdate(), end_date=timezone.localdate(),
+        )
+        self.assertNotEqual(self.version(), before)
+
+    def test_leave_policy_edits_drop_every_dashboard(self):
+        policy = LeavePolicy.objects.get(leave_type="Annual")
+        balance = self.client.get(self.url).context["balances"]["Annual"]
+        before = self.version()
+
+        policy.days_per_year += 5
+        policy.save()
+
+        self.assertEqual(self.version()[0], before[0])
+        self.assertNotEqual(self.version()[1], before[1])
+        self.assertEqual(self.client.get(self.url).context["balances"]["Annual"], balance + 5)
+
+        policy.delete()
+        self.assertNotIn("Annual", self.client.get(self.url).context["balances"])
+
+    def test_notifications_are_live_on_a_warm_dashboard(self):
+        # The bar reads its own counters, so notifications need no dashboard rebuild
+        self.client.get(self.url)
+        notification = Notification.objects.create(employee=self.employee, title="Hello", message="-")
+        self.assertEqual(self.client.get(self.url).context["notification_bar"].unread_count, 1)
+
+        notification.is_read = True
+        notification.save()
+        self.assertEqual(self.client.get(self.url).context["notification_bar"].unread_count, 0)
+
+
+# ===============================
+# Attendance Stats
+# ===============================
+class AttendanceStatsTests(TestCase):
+    # A Wednesday; the current week runs from Monday 2026-03-09
+    TODAY = date(2026, 3, 11)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeProfile.objects.create(full_name="Stats Employee", phone="0123456789")
+        other = EmployeeProfile.objects.create(full_name="Someone Else", phone="0123456789")
+        rows = [
+            (date(2026, 2, 27), time(9), time(17), "Present"),   # last month, three weeks back
+            (date(2026, 3, 2), time(9), time(17), "Present"),
+            (date(2026, 3, 4), time(10), time(17), "Late"),
+            (date(2026, 3, 6), None, None, "Absent"),
+            (date(2026, 3, 9), time(8), time(18), "Present"),
+            (date(2026, 3, 10), time(9, 45), time(17), "Late"),
+            (date(2026, 3, 11), time(9), None, "Present"),
+            (date(2026, 3, 13), None, None, "Absent"),           # filed ahead for Friday
+        ]
+        for day, check_in, check_out, status in rows:
+            Attendance.objects.create(
+                employee=cls.employee, date=day, check_in=check_in, check_out=check_out, status=status
+            )
+        Attendance.objects.create(employee=other, date=date(2026, 3, 9), check_in=time(8), check_out=time(20), status="Present")
+
+    def direct(self, start, end):
+        """The same figures aggregated straight from the attendance rows."""
+        rows = Attendance.objects.filter(employee=self.employee, date__gte=start, date__lte=end)
+        figures = {status.lower(): rows.filter(status=status).count() for status in stats.STATUSES}
+        figures["total"] = rows.count()
+        figures["percent"] = stats.percent(figures["present"], figures["total"])
+        return figures
+
+    def test_month_figures_match_the_attendance_rows(self):
+        figures = stats.AttendanceStats(self.employee, today=self.TODAY)
+        month = figures.month
+
+        self.assertEqual(
+            {key: month[key] for key in ("present", "late", "absent", "total", "percent")},
+            self.direct(date(2026, 3, 1), date(2026, 3, 31)),
+        )
+        self.assertEqual(month["worked_seconds"], (8 + 7 + 10 + 7.25) * 3600)
+
+    def test_this_week_runs_from_monday_to_today(self):
+        figures = stats.AttendanceStats(self.employee, today=self.TODAY)
+
+        self.assertEqual(figures.this_week, self.direct(date(2026, 3, 9), self.TODAY))
+        self.assertEqual(figures.this_week["total"], 3)
+        self.assertEqual(figures.week_seconds, (10 + 7.25) * 3600)
+
+    def test_weekly_trend_covers_whole_weeks(self):
+        figures = stats.AttendanceStats(self.employee, today=self.TODAY)
+
+        expected = []
+        for start in (date(2026, 2, 16), date(2026, 2, 23), date(2026, 3, 2), date(2026, 3, 9)):
+            expected.append((start.strftime("%d %b"), self.direct(start, start + timedelta(days=6))["percent"]))
+        self.assertEqual(figures.weekly_trend, expected)
+        self.assertEqual(expected[-1][1], 50.0)  # Friday's Absent row counts toward the whole week
+
+    def test_figures_take_two_queries(self):
+        figures = stats.AttendanceStats(self.employee, today=self.TODAY)
+        with self.assertNumQueries(2):
+            figures.month, figures.this_week, figures.weekly_trend, figures.week_seconds
+
+
+# ===============================
+# Overtime
+# ===============================
+class OvertimeReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.long_days = EmployeeProfile.objects.create(full_name="Long Days", phone="0123456789")
+        cls.short_days = EmployeeProfile.objects.create(full_name="Short Days", phone="0123456789")
+        for day in (date(2026, 9, 1), date(2026, 9, 2)):
+            Attendance.objects.create(employee=cls.long_days, date=day, check_in=time(8), check_out=time(18), status="Present")
+            Attendance.objects.create(employee=cls.short_days, date=day, check_in=time(9), check_out=time(16), status="Present")
+        # Outside the reported month
+        Attendance.objects.create(employee=cls.long_days, date=date(2026, 10, 1), check_in=time(6), check_out=time(22), status="Present")
+
+    def test_overtime_beyond_standard_day(self):
+        rows = list(stats.overtime_report(date(2026, 9, 1), date(2026, 9, 30)))
+        self.assertEqual([row["employee_id"] for row in rows], [self.long_days.pk])
+        self.assertEqual(rows[0]["days"], 2)
+        self.assertEqual(rows[0]["overtime_seconds"], 4 * 3600)
+
+    def test_admin_attendance_page_lists_month_overtime(self):
+        self.client.force_login(User.objects.create_user("admin", password="admin", is_staff=True))
+        response = self.client.get(reverse("admin_attendance_list") + "?date=2026-09-02")
+        self.assertEqual(response.context["overtime"], [
+            {"employee": "Long Days", "employee_id": self.long_days.employee_id, "days": 2, "hours": 4.0},
+        ])
+
+
+# ===============================
+# Leave Balances
+# ===============================
+class LeaveBalanceTests(TestCase):
+    """The ledger follows every write path of a leave request."""
+
+    def setUp(self):
+        cache.clear()
+        self.employee = EmployeeProfile.objects.create(full_name="On Leave", phone="0123456789")
+        self.leave = LeaveRequest.objects.create(
+            employee=self.employee, leave_type="Sick", number_of_days=3, reason="-",
+            start_date=date(2026, 3, 2), end_date=date(2026, 3, 4),
+        )
+        self.admin = User.objects.create_superuser("admin", password="admin")
+        self.client.force_login(self.admin)
+
+    def used(self, leave_type="Sick", year=2026):
+        return LeaveBalance.objects.filter(
+            employee=self.employee, leave_type=leave_type, year=year
+        ).values_list("used", flat=True).first()
+
+    def panel(self, action):
+        self.client.get(reverse("admin_leave_update", args=[self.leave.pk, action]))
+
+    def test_approve_reject_reapprove(self):
+        self.assertIsNone(self.used())
+        self.panel("approve")
+        self.assertEqual(self.used(), 3)
+        self.panel("approve")
+        self.assertEqual(self.used(), 3)
+        self.panel("reject")
+        self.assertEqual(self.used(), 0)
+        self.panel("reject")
+        self.assertEqual(self.used(), 0)
+        self.panel("approve")
+        self.assertEqual(self.used(), 3)
+
+    def test_delete_returns_days(self):
+        self.panel("approve")
+        self.leave.delete()
+        self.assertEqual(self.used(), 0)
+
+    def test_edit_moves_days_between_balances(self):
+        self.panel("approve")
+        self.leave.refresh_from_db()
+        self.leave.leave_type = "Annual"
+        self.leave.number_of_days = 2
+        self.leave.start_date = self.leave.end_date = date(2027, 1, 4)
+        self.leave.save()
+        self.assertEqual(self.used("Sick", 2026), 0)
+        self.assertEqual(self.used("Annual", 2027), 2)
+
+    def test_django_admin_approval_then_panel_rejection(self):
+        url = reverse("admin:employees_leaverequest_change", args=[self.leave.pk])
+        response = self.client.post(url, {
+            "employee": self.employee.pk, "leave_type": "Sick", "number_of_days": 3,
+            "start_date": "2026-03-02", "end_date": "2026-03-04", "reason": "-", "status": "Approved",
+            "created_at_0": "2026-03-01", "created_at_1": "09:00:00",
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.used(), 3)
+
+        self.panel("reject")
+        self.assertEqual(self.used(), 0)
+
+
+# ===============================
+# Notification Fan-Out
+# ===============================
+class BroadcastTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="Support")
+        self.members = [
+            EmployeeProfile.objects.create(full_name=f"Member {i}", phone="0123456789", department=self.department)
+            for i in range(3)
+        ]
+        EmployeeProfile.objects.create(full_name="Gone", phone="0123456789", department=self.department, is_active=False)
+        self.outsider = EmployeeProfile.objects.create(full_name="Outsider", phone="0123456789")
+
+    def queue(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            job_id = fanout.start("Maintenance", "Tonight at 10", departments=[self.department])
+        self.assertEqual(len(callbacks), 1)  # the background kick-off
+        return job_id
+
+    def test_delivers_to_active_members_and_bumps_counters(self):
+        self.assertEqual(notifications.unread_count(self.members[0].pk), 0)  # cached counter
+        job_id = self.queue()
+
+        self.assertEqual(fanout.run(job_id, chunk_size=2), 3)
+        self.assertEqual(
+            sorted(Notification.objects.values_list("employee_id", flat=True)),
+            [member.pk for member in self.members],
+        )
+        self.assertEqual(notifications.unread_count(self.members[0].pk), 1)
+        self.assertEqual(fanout.progress(job_id), {"status": "done", "total": 3, "sent": 3, "chunks": 2, "error": ""})
+        self.assertEqual(fanout.run(job_id), 0)  # finished jobs are never claimed again
+
+    def test_failure_is_recorded(self):
+        job_id = self.queue()
+        insert = Notification.objects.bulk_create
+        calls = []
+
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise DatabaseError("disk full")
+            return insert(*args, **kwargs)
+
+        with mock.patch.object(Notification.objects, "bulk_create", side_effect=fail_second_chunk):
+            with self.assertRaises(DatabaseError), self.assertLogs("employees.fanout", "ERROR"):
+                fanout.run(job_id, chunk_size=2)
+        self.assertEqual(
+            fanout.progress(job_id), {"status": "failed", "total": 3, "sent": 2, "chunks": 1, "error": "disk full"}
+        )
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_orphaned_job_resumes_without_duplicates(self):
+        job_id = self.queue()
+        # A worker that died after writing its first chunk
+        NotificationBroadcast.objects.filter(pk=job_id).update(
+            status="running", total=3, sent=1, chunks=1, last_employee_pk=self.members[0].pk,
+            updated_at=timezone.now() - timedelta(hours=1),
+        )
+        Notification.objects.create(employee=self.members[0], title="Maintenance", message="Tonight at 10")
+
+        call_command("send_broadcasts", stdout=StringIO())
+        self.assertEqual(
+            sorted(Notification.objects.values_list("employee_id", flat=True)),
+            [member.pk for member in self.members],
+        )
+        self.assertEqual(fanout.progress(job_id)["status"], "done")
+
+
+# ===============================
+# Notification Retention
+# ===============================
+class ArchiveNotificationsTests(TestCase):
+    now = timezone.make_aware(datetime(2026, 10, 1, 12))
+
+    def setUp(self):
+        cache.clear()
+        employee = EmployeeProfile.objects.create(full_name="Archived", phone="0123456789")
+        self.employee = employee
+
+        def notification(days_ago, is_read):
+            return Notification.objects.create(
+                employee=employee, title=f"{days_ago}d", message="-", is_read=is_read,
+                timestamp=self.now - timedelta(days=days_ago),
+            ).pk
+
+        self.expired = [notification(100, True), notification(400, False), notification(500, True)]
+        self.kept = [notification(10, True), notification(100, False), notification(300, False)]
+
+    def test_moves_exactly_the_expired_rows(self):
+        self.assertEqual(notifications.unread_count(self.employee.pk), 3)
+        batches = list(notifications.archive_expired(batch_size=2, now=self.now))
+
+        self.assertEqual(batches, [2, 1])
+        self.assertEqual(sorted(Notification.objects.values_list("pk", flat=True)), self.kept)
+        self.assertEqual(sorted(ArchivedNotification.objects.values_list("pk", flat=True)), self.expired)
+        self.assertEqual(
+            list(ArchivedNotification.objects.filter(pk=self.expired[1]).values_list("title", "is_read")),
+            [("400d", False)],
+        )
+        self.assertEqual(notifications.unread_count(self.employee.pk), 2)
+
+    def test_purge_deletes_without_archiving(self):
+        self.assertEqual(sum(notifications.archive_expired(purge=True, now=self.now)), 3)
+        self.assertEqual(sorted(Notification.objects.values_list("pk", flat=True)), self.kept)
+        self.assertFalse(ArchivedNotification.objects.exists())
+
+
+# ===============================
+# Project Status
+# ===============================
+class ProjectStatusTests(TestCase):
+    def setUp(self):
+        self.employee = EmployeeProfile.objects.create(full_name="Project Owner", phone="0123456789")
+        other = EmployeeProfile.objects.create(full_name="Someone Else", phone="0123456789")
+        today = timezone.localdate()
+        rows = (
+            [(100, today - timedelta(days=5))] * 2    # done late still counts as Completed
+            + [(40, today - timedelta(days=1))] * 3   # Overdue
+            + [(10, today)] * 12                      # In Progress, due today
+        )
+        Project.objects.bulk_create([
+            Project(title=f"P{number}", description="-", assigned_to=self.employee, assigned_by="HR",
+                    progress=progress, due_date=due_date)
+            for number, (progress, due_date) in enumerate(rows)
+        ])
+        Project.objects.create(title="Not mine", description="-", assigned_to=other, assigned_by="HR",
+                               progress=0, due_date=today - timedelta(days=1))
+        session = self.client.session
+        session["employee_id"] = self.employee.employee_id
+        session.save()
+
+    def test_summary_counts_each_status_once(self):
+        summary = project_summary(Project.objects.filter(assigned_to=self.employee))
+        self.assertEqual(
+            summary, {"total": 17, "completed": 2, "overdue": 3, "in_progress": 12, "success_rate": 26}
+        )
+        labels = with_dynamic_status(Project.objects.filter(assigned_to=self.employee)).values_list(
+            "dynamic_status", flat=True
+        )
+        self.assertEqual(sorted(set(labels)), sorted(DYNAMIC_STATUSES))
+
+    def test_status_filter_and_pagination(self):
+        response = self.client.get(reverse("employees:projects"), {"status": "In Progress", "page": 2})
+        page = response.context["page_obj"]
+        self.assertEqual((page.number, page.paginator.count, page.paginator.num_pages), (2, 12, 2))
+        self.assertEqual([project.dynamic_status for project in page], ["In Progress"] * 2)
+
+        response = self.client.get(reverse("employees:projects"), {"status": "Overdue"})
+        page = response.context["page_obj"]
+        self.assertEqual(page.paginator.count, 3)
+        self.assertTrue(all(project.status_badge == STATUS_BADGES["Overdue"] for project in page))
+        # The cards count every project of the employee, whatever the filter
+        self.assertEqual([stat["value"] for stat in response.context["project_stats"]], [12, 2, 3, "26%"])
+
+    def test_unknown_status_lists_everything(self):
+        response = self.client.get(reverse("employees:projects"), {"status": "Upcoming"})
+        self.assertIsNone(response.context["status"])
+        self.assertEqual(response.context["page_obj"].paginator.count, 17)
+
+
+# ===============================
+# Project Portfolio
+# ===============================
+class PortfolioTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.sales, self.support = Department.objects.create(name="Sales"), Department.objects.create(name="Support")
+        self.employee = EmployeeProfile.objects.create(full_name="Owner", phone="0123456789", department=self.sales)
+        Project.objects.create(
+            title="Roadmap", description="-", assigned_to=self.employee, assigned_by="HR",
+            progress=50, due_date=timezone.localdate(),
+        )
+
+    def breakdown(self):
+        return [(row["department"], row["total"]) for row in portfolio.stats()["departments"]]
+
+    def test_unrelated_employee_saves_keep_the_cache(self):
+        portfolio.stats()
+        self.employee.set_password("secret1")
+        self.employee.full_name = "Renamed Owner"
+        self.employee.save()
+
+        with self.assertNumQueries(0):
+            portfolio.stats()
+
+    def test_moving_an_employee_refreshes_the_breakdown(self):
+        self.assertEqual(self.breakdown(), [("Sales", 1)])
+
+        self.employee.department = self.support
+        self.employee.save()
+        self.assertEqual(self.breakdown(), [("Support", 1)])
+
+        self.employee.department = self.sales
+        self.employee.save(update_fields=["department"])
+        self.assertEqual(self.breakdown(), [("Sales", 1)])
+
+    def test_renamed_or_deleted_department_refreshes_the_breakdown(self):
+        self.assertEqual(self.breakdown(), [("Sales", 1)])
+
+        self.sales.name = "Revenue"
+        self.sales.save()
+        self.assertEqual(self.breakdown(), [("Revenue", 1)])
+
+        self.sales.delete()
+        self.assertEqual(self.breakdown(), [("Unassigned", 1)])
+
+
+# ===============================
+# Leaderboards
+# ===============================
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.sales, self.support = Department.objects.create(name="Sales"), Department.objects.create(name="Support")
+
+    def performer(self, name, department, rating, goals=0, projects=0, is_active=True):
+        employee = EmployeeProfile.objects.create(
+            full_name=name, phone="0123456789", department=department, is_active=is_active
+        )
+        return Performance.objects.create(
+            employee=employee, rating=rating, goals_achieved=goals, projects_completed=projects
+        )
+
+    def board(self, rows):
+        return [(row["employee__full_name"], row["rank"]) for row in rows]
+
+    def test_company_ranks_break_ties_and_share_exact_ones(self):
+        self.performer("Goals", self.sales, 4.5, goals=3)
+        self.performer("Top", self.support, 4.8)
+        self.performer("Projects", self.sales, 4.5, goals=3, projects=2)
+        self.performer("Tied", self.support, 4.5, goals=1)
+        self.performer("Also Tied", self.sales, 4.5, goals=1)
+        self.performer("Last", self.support, 3.0)
+        self.performer("Inactive", self.sales, 5.0, is_active=False)
+
+        board = self.board(leaderboards.company())
+
+        self.assertEqual(board[:3], [("Top", 1), ("Projects", 2), ("Goals", 3)])
+        self.assertEqual(sorted(board[3:5]), [("Also Tied", 4), ("Tied", 4)])
+        self.assertEqual(board[5], ("Last", 6))
+        self.assertEqual(self.board(leaderboards.company(limit=2)), [("Top", 1), ("Projects", 2)])
+
+    def test_department_boards_rank_within_the_department(self):
+        self.performer("Sales Best", self.sales, 4.0)
+        self.performer("Sales Next", self.sales, 3.0)
+        self.performer("Support Only", self.support, 2.0)
+        empty = Department.objects.create(name="Empty")
+
+        boards = leaderboards.departments([self.sales.pk, self.support.pk, empty.pk])
+
+        self.assertEqual(self.board(boards[self.sales.pk]), [("Sales Best", 1), ("Sales Next", 2)])
+        self.assertEqual(self.board(boards[self.support.pk]), [("Support Only", 1)])
+        self.assertEqual(boards[empty.pk], [])
+        self.assertEqual(self.board(leaderboards.department(self.sales.pk, limit=1)), [("Sales Best", 1)])
+
+    def test_top_n_is_cut_at_the_rank(self):
+        for number in range(leaderboards.LEADERBOARD_SIZE + 2):
+            self.performer(f"Employee {number}", self.sales, number)
+
+        board = self.board(leaderboards.company())
+
+        self.assertEqual(len(board), leaderboards.LEADERBOARD_SIZE)
+        self.assertEqual(board[0], (f"Employee {leaderboards.LEADERBOARD_SIZE + 1}", 1))
+
+    def test_boards_are_cached_until_a_performance_changes(self):
+        first = self.performer("First", self.sales, 4.0)
+        second = self.performer("Second", self.sales, 3.0)
+        leaderboards.company()
+        leaderboards.department(self.sales.pk)
+
+        with self.assertNumQueries(0):
+            leaderboards.company()
+            leaderboards.department(self.sales.pk)
+
+        second.rating = 5.0
+        second.save()
+        self.assertEqual(self.board(leaderboards.company()), [("Second", 1), ("First", 2)])
+
+        first.delete()
+        self.assertEqual(self.board(leaderboards.department(self.sales.pk)), [("Second", 1)])
+
+
+    def test_employee_with_several_records_is_ranked_once_on_the_latest(self):
+        old = self.performer("Reviewed Twice", self.sales, 5.0)
+        self.performer("Other", self.sales, 4.0)
+        Performance.objects.create(employee=old.employee, rating=3.0)
+
+        self.assertEqual(self.board(leaderboards.company()), [("Other", 1), ("Reviewed Twice", 2)])
+        self.assertEqual(self.board(leaderboards.department(self.sales.pk)), [("Other", 1), ("Reviewed Twice", 2)])
+        self.assertEqual([row["rating"] for row in leaderboards.company()], [4.0, 3.0])
+
+    def test_rating_is_recomputed_when_its_skills_change(self):
+        first = self.performer("First", self.sales, 0)
+        second = self.performer("Second", self.sales, 3.0)
+        teamwork, speed = Skill.objects.create(name="Teamwork"), Skill.objects.create(name="Speed")
+
+        def rating():
+            return Performance.objects.get(pk=first.pk).rating
+
+        skill = PerformanceSkill.objects.create(performance=first, skill=teamwork, value=80)
+        self.assertEqual(rating(), 4.0)
+        self.assertEqual(self.board(leaderboards.company()), [("First", 1), ("Second", 2)])
+
+        skill.value = 50
+        skill.save()
+        self.assertEqual(rating(), 2.5)
+        self.assertEqual(self.board(leaderboards.company()), [("Second", 1), ("First", 2)])
+
+        PerformanceSkill.objects.create(performance=first, skill=speed, value=93)
+        self.assertEqual(rating(), 3.6)  # (50 + 93) / 2 / 20, to one decimal
+
+        skill.delete()
+        self.assertEqual(rating(), 4.7)
+        PerformanceSkill.objects.filter(performance=first).delete()  # queryset delete still sends post_delete
+        self.assertEqual(rating(), 0)
+        self.assertEqual(Performance.objects.get(pk=second.pk).rating, 3.0)
+
+
+# ===============================
+# Notification Bar
+# ===============================
+class NotificationBarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.employee = EmployeeProfile.objects.create(full_name="Bar Employee", phone="0123456789")
+        session = self.client.session
+        session["employee_id"] = self.employee.employee_id
+        session.save()
+
+    def notify(self, count, **fields):
+        return [
+            Notification.objects.create(employee=self.employee, title=f"Note {number}", message="-", **fields)
+            for number in range(count)
+        ]
+
+    def assertCounterMatches(self):
+        stored = Notification.objects.filter(employee=self.employee, is_read=False).count()
+        self.assertEqual(notifications.unread_count(self.employee.pk), stored)
+        return stored
+
+    def test_counter_follows_create_read_and_delete(self):
+        self.assertEqual(self.assertCounterMatches(), 0)  # warms the counter
+        unread = self.notify(3)
+        read = self.notify(1, is_read=True)
+        self.assertEqual(self.assertCounterMatches(), 3)
+
+        unread[0].is_read = True
+        unread[0].save()
+        unread[0].save()  # saving a read notification again changes nothing
+        self.assertEqual(self.assertCounterMatches(), 2)
+
+        unread[1].delete()
+        read[0].delete()
+        self.assertEqual(self.assertCounterMatches(), 1)
+
+        Notification.objects.bulk_create([Notification(employee=self.employee, title="Bulk", message="-")])
+        notifications.bulk_created(Notification.objects.filter(title="Bulk"))
+        self.assertEqual(self.assertCounterMatches(), 2)
+
+    def notification_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("employees:attendance"))
+        self.assertEqual(response.status_code, 200)
+        return [query for query in queries if '"employees_notification"' in query["sql"]]
+
+    def test_bar_renders_without_per_item_queries(self):
+        self.notify(2)
+        few = len(self.notification_queries())
+        cache.clear()
+        self.notify(notifications.TOPBAR_SIZE + 5)
+        self.assertEqual(len(self.notification_queries()), few)
+
+        # Warm: the count and the latest items come from the cache
+        self.assertEqual(self.notification_queries(), [])
+        response = self.client.get(reverse("employees:attendance"))
+        self.assertEqual(response.context["notification_bar"].unread_count, notifications.TOPBAR_SIZE + 7)
+        self.assertEqual(len(response.context["notification_bar"].items), notifications.TOPBAR_SIZE)
+
+
+# ===============================
+# Live Notifications
+# ===============================
+@skipIf(WebsocketCommunicator is None, "channels.testing requires daphne")
+class NotificationPushTests(TransactionTestCase):
+    """Websocket feed over the in-memory channel layer configured in settings."""
+
+    def setUp(self):
+        cache.clear()
+        self.employee = EmployeeProfile.objects.create(full_name="Live Feed", phone="0123456789")
+        session = SessionStore()
+        session["employee_id"] = self.employee.employee_id
+        session.save()
+        self.cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}".encode()
+
+    def communicator(self, headers=()):
+        from employeemanagement.asgi import application
+        return WebsocketCommunicator(
+            application, "/ws/notifications/", headers=[(b"origin", b"http://localhost"), *headers]
+        )
+
+    async def test_pushes_new_notifications_and_unread_count(self):
+        communicator = self.communicator([(b"cookie", self.cookie)])
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(await communicator.receive_json_from(), {"type": "unread", "unread_count": 0})
+
+        notification = await sync_to_async(Notification.objects.create)(
+            employee=self.employee, title="Payslip ready", message="October payslip"
+        )
+        message = await communicator.receive_json_from()
+        self.assertEqual(message["type"], "notification")
+        self.assertEqual(message["unread_count"], 1)
+        self.assertEqual(message["notification"]["title"], "Payslip ready")
+
+        notification.is_read = True
+        await sync_to_async(notification.save)()
+        self.assertEqual(await communicator.receive_json_from(), {"type": "unread", "unread_count": 0})
+        await communicator.disconnect()
+
+    async def test_rejects_anonymous_socket(self):
+        connected, _ = await self.communicator().connect()
+        self.assertFalse(connected)
@@ -5,6 +5,7 @@ app_name = 'employees'
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
     path('attendance/', views.attendance_view, name='attendance'),
+    path('api/punch/', views.kiosk_punch_view, name='kiosk_punch'),
     path("leave/", views.leave_view, name="leave"),
     path("leave/apply/", views.apply_leave_view, name="apply_leave"),
     path('payroll/', views.payroll_view, name='payroll'),
@@ -1,31 +1,78 @@
+from django.db.models import Avg, Case, CharField, Count, Q, Value, When
 from django.utils import timezone
 
+# ===============================
+# Dynamic Project Status
+# ===============================
+# First matching rule wins; anything left over is "In Progress". There is no
+# "Upcoming" status: it needs a start date, which Project does not have.
+IN_PROGRESS = "In Progress"
+STATUS_BADGES = {
+    "Completed": "bg-green-100 text-green-800 dark:bg-green-900 dark:text-green-200",
+    "Overdue": "bg-red-100 text-red-800 dark:bg-red-900 dark:text-red-200",
+    IN_PROGRESS: "bg-blue-100 text-blue-800 dark:bg-blue-900 dark:text-blue-200",
+}
+DYNAMIC_STATUSES = ("Completed", "Overdue", IN_PROGRESS)
+
+
+def _rules(today):
+    return [
+        ("Completed", Q(progress__gte=100)),
+        ("Overdue", Q(due_date__lt=today)),
+    ]
+
+
+def status_q(label, today=None):
+    """Filter matching projects whose dynamic status is `label`."""
+    today = today or timezone.localdate()
+    earlier = Q()
+    for rule_label, condition in _rules(today):
+        if rule_label == label:
+            return condition & ~earlier if earlier else condition
+        earlier |= condition
+    if label == IN_PROGRESS:
+        return ~earlier
+    raise ValueError(f"Unknown project status '{label}'.")
+
+
+def dynamic_status(today=None):
+    """Case/When expression giving each project's dynamic status label."""
+    today = today or timezone.localdate()
+    return Case(
+        *(When(condition, then=Value(label)) for label, condition in _rules(today)),
+        default=Value(IN_PROGRESS),
+        output_field=CharField(),
+    )
+
+
+def with_dynamic_status(queryset, status=None, today=None):
+    """Annotate `dynamic_status` and optionally keep only projects with that status."""
+    queryset = queryset.annotate(dynamic_status=dynamic_status(today))
+    if status:
+        queryset = queryset.filter(status_q(status, today))
+    return queryset
+
+
+def status_key(label):
+    """'In Progress' -> 'in_progress', as used by project_summary()."""
+    return label.lower().replace(" ", "_")
+
+
+def project_summary(queryset, today=None):
+    """
+    Count of projects per dynamic status (keyed by status_key), total and
+    success rate (average progress, rounded), from a single aggregate query.
+    """
+    today = today or timezone.localdate()
+    totals = queryset.aggregate(
+        total=Count("id"),
+        average_progress=Avg("progress"),
+        **{status_key(label): Count("id", filter=status_q(label, today)) for label in DYNAMIC_STATUSES},
+    )
+    totals["success_rate"] = round(totals.pop("average_progress") or 0)
+    return totals
+
+
 def get_project_status(project):
-    today = timezone.localdate()
-
-    # Completed
-    if project.progress >= 100:
-        return {
-            "label": "Completed",
-            "badge": "bg-green-100 text-green-800 dark:bg-green-900 dark:text-green-200"
-        }
-
-    # Overdue (Past due date but not completed)
-    if project.due_date < today:
-        return {
-            "label": "Overdue",
-            "badge": "bg-red-100 text-red-800 dark:bg-red-900 dark:text-red-200"
-        }
-
-    # Upcoming (Future start date)
-    if hasattr(project, "start_date") and project.start_date and project.start_date > today:
-        return {
-            "label": "Upcoming",
-            "badge": "bg-purple-100 text-purple-800 dark:bg-purple-900 dark:text-purple-200"
-        }
-
-    # Active / In Progress
-    return {
-        "label": "In Progress",
-        "badge": "bg-blue-100 text-blue-800 dark:bg-blue-900 dark:text-blue-200"
-    }
+    """Status label and badge of a project loaded through with_dynamic_status()."""
+    return {"label": project.dynamic_status, "badge": STATUS_BADGES[project.dynamic_status]}
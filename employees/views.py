@@ -1,13 +1,15 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.utils import timezone
-from datetime import datetime, timedelta  # <-- correct import
-from django.db.models import Sum, Q, Count
-from accounts.models import EmployeeProfile
+from datetime import datetime
+from django.db.models import Sum
+from accounts.middleware import get_employee
 from .models import (
-    Attendance, LeaveRequest, Payroll, Performance, Project, EmployeeData, Document
+    Attendance, LeaveRequest, Payroll, Performance, Project
 )
 from .forms import LeaveRequestForm
+from . import dashboard_cache, leave_balances
+from .stats import AttendanceStats, format_duration
 from django.utils.timezone import make_aware
 
 # -------------------------------
@@ -16,23 +18,15 @@ from django.utils.timezone import make_aware
 def get_logged_in_employee(request):
     """
     Retrieve the currently logged-in employee using session.
-    Returns None if not found.
+    Returns None if not found. Shares the per-request lookup behind request.employee.
     """
-    employee_id = request.session.get('employee_id')
-    if not employee_id:
-        return None
-    try:
-        return EmployeeProfile.objects.get(employee_id=employee_id)
-    except EmployeeProfile.DoesNotExist:
-        return None
+    return get_employee(request)
 
 # ===============================
 # DASHBOARD VIEW
 # ===============================
 
 # employees/views.py
-from .models import Document, Payroll
-from django.urls import reverse
 
 def dashboard_view(request):
     employee = get_logged_in_employee(request)
@@ -40,63 +34,43 @@ def dashboard_view(request):
         return redirect("accounts:employee_login_page")
 
     today = timezone.localdate()
+    payload = dashboard_cache.get_or_build(
+        employee, today, lambda: build_dashboard_payload(employee, today)
+    )
 
-    # -----------------------------
-    # Today Attendance
-    # -----------------------------
-    today_record, _ = Attendance.objects.get_or_create(employee=employee, date=today)
+    context = {"employee": employee, **payload}
+    return render(request, "employee_dashboard.html", context)
 
-    # -----------------------------
-    # Monthly Attendance %
-    # -----------------------------
-    month_records = Attendance.objects.filter(employee=employee, date__month=today.month).order_by('date')
-    total_present = month_records.filter(status="Present").count()
-    total_absent = month_records.filter(status="Absent").count()
-    late_days = month_records.filter(status="Late").count()
-    attendance_percent = round((total_present / month_records.count()) * 100, 1) if month_records.exists() else 0
 
+def build_dashboard_payload(employee, today):
+    """
+    Everything the employee dashboard shows apart from the profile itself.
+    Cached per employee by employees.dashboard_cache.
+    """
     # -----------------------------
-    # Weekly Attendance % (Last 4 Weeks)
+    # Today Attendance
     # -----------------------------
-    weekly_percentages = []
-    week_labels = []
-    for i in range(3, -1, -1):
-        start_of_week = today - timedelta(days=today.weekday() + i*7)
-        end_of_week = start_of_week + timedelta(days=6)
-        week_records = Attendance.objects.filter(employee=employee, date__gte=start_of_week, date__lte=end_of_week)
-        total_days = week_records.count()
-        present_days = week_records.filter(status="Present").count()
-        percent = round((present_days / total_days) * 100, 1) if total_days else 0
-        weekly_percentages.append(percent)
-        week_labels.append(f"{start_of_week.strftime('%d %b')}")
-
-    # This week % (for card)
-    this_week_records = Attendance.objects.filter(employee=employee, date__gte=today - timedelta(days=today.weekday()))
-    week_present = this_week_records.filter(status="Present").count()
-    week_total_days = this_week_records.count()
-    this_week_percent = round((week_present / week_total_days) * 100, 1) if week_total_days else 0
+    # Read-only: rows are created by check-in or the finalize_attendance job
+    today_record = (
+        Attendance.objects.filter(employee=employee, date=today)
+        .values("status", "check_in", "check_out").first()
+    )
 
     # -----------------------------
-    # Weekly Hours
+    # Attendance Stats (Month, Weeks, Hours)
     # -----------------------------
-    week_records = Attendance.objects.filter(employee=employee, date__gte=today - timedelta(days=7))
-    total_week_hours = sum(
-        ((timezone.datetime.combine(r.date, r.check_out) - timezone.datetime.combine(r.date, r.check_in)).total_seconds() / 3600)
-        for r in week_records if r.check_in and r.check_out
-    )
-    total_week_hours_formatted = f"{int(total_week_hours)}h {int((total_week_hours*60)%60)}m"
+    stats = AttendanceStats(employee, today=today)
+    attendance_percent = stats.month["percent"]
+    this_week_percent = stats.this_week["percent"]
+    week_labels = [label for label, _ in stats.weekly_trend]
+    weekly_percentages = [value for _, value in stats.weekly_trend]
+    total_week_hours_formatted = format_duration(stats.week_seconds)
 
     # -----------------------------
     # Leave Balances
     # -----------------------------
+    balances = leave_balances.balances_for(employee, year=today.year)
     leave_requests = LeaveRequest.objects.filter(employee=employee, status="Approved")
-    balances = {
-        "Annual": 18 - sum(l.total_days() for l in leave_requests.filter(leave_type="Annual")),
-        "Sick": 8 - sum(l.total_days() for l in leave_requests.filter(leave_type="Sick")),
-        "Personal": 5 - sum(l.total_days() for l in leave_requests.filter(leave_type="Personal")),
-        "Maternity": 90 - sum(l.total_days() for l in leave_requests.filter(leave_type="Maternity")),
-        "Emergency": 5 - sum(l.total_days() for l in leave_requests.filter(leave_type="Emergency")),
-    }
 
     # -----------------------------
     # Payrolls
@@ -113,11 +87,11 @@ def dashboard_view(request):
     # -----------------------------
     # Performance
     # -----------------------------
-    performance = Performance.objects.filter(employee=employee).first()
+    performance = Performance.objects.filter(employee=employee).last()
     skill_labels = []
     skill_values = []
     if performance:
-        for ps in performance.skills.all():
+        for ps in performance.skills.select_related("skill"):
             skill_labels.append(ps.skill.name)
             skill_values.append(ps.value)
 
@@ -169,10 +143,9 @@ def dashboard_view(request):
 
 
     # -----------------------------
-    # Context
+    # Payload
     # -----------------------------
-    context = {
-        "employee": employee,
+    return {
         "today_record": today_record,
         "attendance_percent": attendance_percent,
         "this_week_percent": this_week_percent,
@@ -181,29 +154,26 @@ def dashboard_view(request):
         "total_week_hours": total_week_hours_formatted,
         "balances": balances,
         "ytd_earnings": ytd_earnings,
-        "projects": projects,
+        "projects": list(projects.values("title", "progress")),
         "active_projects": active_projects,
         "skill_labels": skill_labels,
         "skill_values": skill_values,
         "recent_activity": recent_activity,
     }
 
-    return render(request, "employee_dashboard.html", context)
-
 # ===============================
 # Attendance
 # ===============================
 from django.shortcuts import render
 from django.utils import timezone
-from employees.models import Attendance, EmployeeProfile
-from django.http import HttpResponse
+from employees.models import Attendance
 from django.shortcuts import render
 from django.utils import timezone
 from employees.models import Attendance
 
 from django.shortcuts import render, redirect
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime
 from employees.models import Attendance
 from django.contrib import messages
 
@@ -225,11 +195,7 @@ def attendance_view(request):
         if action == "check_in":
             if not attendance_record.check_in:
                 attendance_record.check_in = current_time
-                # Set status
-                if current_time <= datetime.strptime("09:30:00", "%H:%M:%S").time():
-                    attendance_record.status = "Present"
-                else:
-                    attendance_record.status = "Late"
+                attendance_record.status = Attendance.status_for(current_time)
                 attendance_record.save()
                 messages.success(request, f"Checked in at {current_time.strftime('%H:%M')}")
             else:
@@ -252,33 +218,89 @@ def attendance_view(request):
     # Today's record
     today_record = Attendance.objects.filter(employee=employee, date=today).first()
 
-    # Weekly data (current week)
-    week_start = today - timedelta(days=today.weekday())
-    week_records = Attendance.objects.filter(employee=employee, date__gte=week_start, date__lte=today)
-    week_days_present = week_records.filter(status='Present').count()
-    week_total_days = week_records.count()
-    total_week_hours = sum(
-        ((datetime.combine(r.date, r.check_out) - datetime.combine(r.date, r.check_in)).total_seconds() / 3600)
-        for r in week_records if r.check_in and r.check_out
+    # Weekly and monthly figures
+    stats = AttendanceStats(employee, today=today)
+    week = stats.this_week
+    month = stats.month
+    month_records = Attendance.objects.filter(
+        employee=employee, date__gte=stats.month_start, date__lte=stats.month_end
     )
 
-    # Monthly data
-    month_records = Attendance.objects.filter(employee=employee, date__month=today.month, date__year=today.year)
-    late_days = month_records.filter(status='Late').count()
-    attendance_percent = round((month_records.filter(status='Present').count() / month_records.count()) * 100, 1) if month_records.exists() else 0
-
     context = {
         'today_record': today_record,
-        'week_days_present': week_days_present,
-        'week_total_days': week_total_days,
-        'total_week_hours': round(total_week_hours, 2),
-        'attendance_percent': attendance_percent,
-        'late_days': late_days,
+        'week_days_present': week["present"],
+        'week_total_days': week["total"],
+        'total_week_hours': round(stats.week_hours, 2),
+        'attendance_percent': month["percent"],
+        'late_days': month["late"],
         'month_records': month_records
     }
 
     return render(request, 'attendance.html', context)
 
+# ===============================
+# Kiosk / Mobile Punch API
+# ===============================
+import json
+from django.http import JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from . import kiosk
+
+@csrf_exempt
+@require_POST
+def kiosk_punch_view(request):
+    """
+    JSON check-in / check-out for kiosks and mobile devices.
+
+    Kiosks send `Authorization: Token <token>` (see KIOSK_API_TOKENS) plus the
+    employee_id; logged-in employees use their session and a CSRF token.
+    Send an `Idempotency-Key` header so a retried punch gets the first answer;
+    a retry that arrives while the first request is still running gets 409.
+    """
+    try:
+        data = json.loads(request.body or b"{}") if request.content_type == "application/json" else request.POST
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON body."}, status=400)
+
+    token = request.headers.get("Authorization", "").removeprefix("Token ").strip()
+    if token:
+        if not kiosk.valid_token(token):
+            return JsonResponse({"error": "Invalid kiosk token."}, status=401)
+        employee_id = data.get("employee_id")
+    else:
+        if CsrfViewMiddleware(lambda r: None).process_view(request, None, (), {}):
+            return JsonResponse({"error": "CSRF check failed."}, status=403)
+        employee = get_employee(request)
+        employee_id = employee.employee_id if employee else None
+
+    pk = kiosk.employee_pk(employee_id) if employee_id else None
+    if pk is None:
+        return JsonResponse({"error": "Unknown or inactive employee."}, status=404)
+
+    action = kiosk.ACTIONS.get(data.get("action"))
+    if action is None:
+        return JsonResponse({"error": "action must be check_in or check_out."}, status=400)
+
+    idempotency_key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+    if idempotency_key:
+        idempotency_key = f"{pk}:{idempotency_key}"
+        stored = kiosk.reserve(idempotency_key)
+        if stored == kiosk.PENDING:
+            return JsonResponse({"error": "A request with this Idempotency-Key is still in progress."}, status=409)
+        if stored is not None:
+            return JsonResponse(stored)
+
+    try:
+        result = action(pk)
+    except Exception:
+        kiosk.release(idempotency_key)
+        raise
+    kiosk.remember(idempotency_key, result)
+    return JsonResponse(result)
+
+
 # ===============================
 # Leave
 # ===============================
@@ -303,18 +325,8 @@ def leave_view(request):
 
     leave_requests = LeaveRequest.objects.filter(employee=employee).order_by("-created_at")
 
-        # Calculate leave balances
-    balances = {
-        "Annual": 18 - sum(l.total_days() for l in leave_requests.filter(leave_type="Annual", status="Approved")),
-        "Sick": 8 - sum(l.total_days() for l in leave_requests.filter(leave_type="Sick", status="Approved")),
-        "Personal": 5 - sum(l.total_days() for l in leave_requests.filter(leave_type="Personal", status="Approved")),
-        "Emergency": 5 - sum(l.total_days() for l in leave_requests.filter(leave_type="Emergency", status="Approved")),
-    }
-
-    # Only show Maternity Leave for female employees
-    if employee.gender.lower() == "female":
-        balances["Maternity"] = 90 - sum(l.total_days() for l in leave_requests.filter(leave_type="Maternity", status="Approved"))
-
+    # Leave balances (Maternity only shows for the employees its policy applies to)
+    balances = leave_balances.balances_for(employee)
 
     context = {
         "form": form,
@@ -379,7 +391,7 @@ def performance_view(request):
     if not employee:
         return render(request, "performance.html", {"error": "Employee profile not found."})
 
-    performance = Performance.objects.filter(employee=employee).first()
+    performance = Performance.objects.filter(employee=employee).last()
     skill_list = []
 
     if performance:
@@ -397,10 +409,12 @@ def performance_view(request):
     return render(request, "performance.html", context)
 
 
+from django.core.paginator import Paginator
 from django.shortcuts import render, redirect
-from django.utils import timezone
 from .models import Project
-from .utils import get_project_status  # if in utils.py
+from .utils import DYNAMIC_STATUSES, STATUS_BADGES, project_summary, with_dynamic_status
+
+PROJECTS_PER_PAGE = 10
 
 def projects_view(request):
     employee = get_logged_in_employee(request)
@@ -408,45 +422,44 @@ def projects_view(request):
         return redirect("accounts:login")
 
     projects = Project.objects.filter(assigned_to=employee)
-
-    # Attach dynamic status to each project
-    for project in projects:
-        status_info = get_project_status(project)
-        project.dynamic_status = status_info["label"]
-        project.status_badge = status_info["badge"]
-
-    # Success rate
-    success_rate = (
-        round(sum(p.progress for p in projects) / projects.count())
-        if projects.exists()
-        else 0
-    )
+    # Status counts and success rate in one aggregate query
+    summary = project_summary(projects)
+
+    # Dynamic status is computed, filtered and paginated in SQL
+    status = request.GET.get("status")
+    if status not in DYNAMIC_STATUSES:
+        status = None
+    page = Paginator(
+        with_dynamic_status(projects, status).order_by("due_date", "pk"), PROJECTS_PER_PAGE
+    ).get_page(request.GET.get("page"))
+    for project in page:
+        project.status_badge = STATUS_BADGES[project.dynamic_status]
 
     project_stats = [
         {
             "label": "Active Projects",
-            "value": len([p for p in projects if p.dynamic_status == "In Progress"]),
+            "value": summary["in_progress"],
             "icon": "fas fa-tasks",
             "icon_color": "text-blue-600",
             "icon_bg": "bg-blue-100 dark:bg-blue-900"
         },
         {
             "label": "Completed",
-            "value": len([p for p in projects if p.dynamic_status == "Completed"]),
+            "value": summary["completed"],
             "icon": "fas fa-check-circle",
             "icon_color": "text-green-600",
             "icon_bg": "bg-green-100 dark:bg-green-900"
         },
         {
             "label": "Overdue",
-            "value": len([p for p in projects if p.dynamic_status == "Overdue"]),
+            "value": summary["overdue"],
             "icon": "fas fa-exclamation-circle",
             "icon_color": "text-red-600",
             "icon_bg": "bg-red-100 dark:bg-red-900"
         },
         {
             "label": "Success Rate",
-            "value": f"{success_rate}%",
+            "value": f"{summary['success_rate']}%",
             "icon": "fas fa-percentage",
             "icon_color": "text-purple-600",
             "icon_bg": "bg-purple-100 dark:bg-purple-900"
@@ -454,8 +467,11 @@ def projects_view(request):
     ]
 
     return render(request, "projects.html", {
-        "projects": projects,
+        "projects": page,
+        "page_obj": page,
         "project_stats": project_stats,
+        "statuses": DYNAMIC_STATUSES,
+        "status": status,
     })
 
 #--------------------------------
@@ -491,9 +507,8 @@ def project_detail_view(request, pk):
 # Profile View and Edit
 #=============================
 
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.contrib import messages
-from employees.models import EmployeeProfile
 from adminpanel.models import Department
 
 def profile_view(request):
@@ -510,8 +525,7 @@ def profile_view(request):
             new_password = request.POST.get("new_password")
             confirm_password = request.POST.get("confirm_password")
             if new_password and new_password == confirm_password:
-                profile.password = new_password  # ⚠️ Use hashing in production
-                profile.save()
+                profile.set_password(new_password)
                 messages.success(request, "Password changed successfully!")
             else:
                 messages.error(request, "Passwords do not match!")
@@ -566,45 +580,3 @@ def profile_view(request):
         "profile": profile,
         "departments": departments,
     })
-
-# ========================
-# Notifications Context Processor
-# ========================
-
-from .models import Notification, EmployeeProfile
-from django.utils import timezone
-
-def base_notifications(request):
-    """
-    Context processor to provide real notifications for the topbar dropdown.
-    Shows the latest 20 notifications for the logged-in employee.
-    """
-    employee_id = request.session.get("employee_id")
-    notifications = []
-    unread_count = 0
-
-    if employee_id:
-        try:
-            employee = EmployeeProfile.objects.get(employee_id=employee_id)
-            
-            # Fetch latest 20 notifications for this employee
-            notifications_qs = Notification.objects.filter(employee=employee).order_by("-timestamp")[:20]
-            
-            # Convert to list so we can loop safely in template
-            notifications = list(notifications_qs)
-            
-            # Count unread
-            unread_count = Notification.objects.filter(employee=employee, is_read=False).count()
-            
-            # Format timestamp for template
-            for n in notifications:
-                n.time_display = timezone.localtime(n.timestamp).strftime("%b %d, %H:%M")
-                
-        except EmployeeProfile.DoesNotExist:
-            notifications = []
-            unread_count = 0
-
-    return {
-        "notifications": notifications,
-        "unread_count": unread_count,
-    }